@@ -0,0 +1,141 @@
+"""
+Trasy alternatywne z dwóch drzew najkrótszych ścieżek (metoda plateau / via-node).
+
+Drzewo w przód z `start` i wstecz do `end` (oba ograniczone do (1 + max_stretch) * opt).
+Krawędź u -> v leżąca w obu drzewach należy do plateau; każdy łańcuch takich krawędzi
+wyznacza jedną trasę start -> ... -> plateau -> ... -> end (via-node). Kandydaci brani
+rosnąco po koszcie, odrzucani gdy: za długi objazd (stretch), za duże pokrycie z już
+wybranymi trasami (overlap), za krótkie plateau (brak lokalnej optymalności) albo pętla.
+Graf nie jest modyfikowany - wszystkie stany w lokalnych tablicach.
+"""
+from array import array
+from heapq import heappush, heappop
+from typing import Dict, List, NamedTuple, Set
+
+from components import maybe_reachable
+from csr_graph import CSRGraph
+from routing import INF, METRICS, SPEED_KPH, SearchResult, metric_weights
+
+
+class SPTree(NamedTuple):
+    dist: array             # 'd' koszt od korzenia (w drzewie wstecz - do korzenia), INF = poza drzewem
+    parent: array           # 'i' slot krawędzi drzewa przy wierzchołku (-1 = korzeń / brak)
+    order: List[int]        # rozliczone wierzchołki w kolejności rozliczenia (tylko one mają koszt)
+    settled: int
+    neighbors_checked: int
+
+
+def shortest_path_tree(graph: CSRGraph, weights, root: int, reverse: bool = False,
+                       limit: float = INF, target: int = -1, stretch: float = 0.0) -> SPTree:
+    """
+    Dijkstra jeden-do-wszystkich po `weights` (per slot). W przód parent[v] = slot u -> v,
+    wstecz (reverse=True, po in_offsets) parent[u] = slot u -> v w stronę korzenia.
+    Wierzchołki o koszcie > limit nie są rozliczane; po rozliczeniu `target`
+    limit spada do (1 + stretch) * koszt(target).
+    """
+    n = graph.max_vid + 1
+    if reverse:
+        offsets, slots, ends = graph.in_offsets, graph.in_slots, graph.sources
+    else:
+        offsets, slots, ends = graph.offsets, None, graph.targets
+    dist = array("d", [INF]) * n
+    parent = array("i", [-1]) * n
+    done = bytearray(n)
+    order: List[int] = []
+    reached = [root]                        # wierzchołki z kosztem - tylko je trzeba potem czyścić
+    neighbors_checked = 0
+    dist[root] = 0.0
+    pq = [(0.0, root)]
+    while pq:
+        d, u = heappop(pq)
+        if done[u]: continue
+        if d > limit: break
+        done[u] = 1; order.append(u)
+        if u == target:
+            limit = min(limit, d * (1.0 + stretch))
+        for i in range(offsets[u], offsets[u + 1]):
+            neighbors_checked += 1
+            s = slots[i] if slots is not None else i
+            nd = d + weights[s]
+            v = ends[s]
+            if nd < dist[v]:
+                if dist[v] == INF:
+                    reached.append(v)
+                dist[v] = nd; parent[v] = s; heappush(pq, (nd, v))
+    # nierozliczone (poza limitem) - bez kosztu, żeby nie tworzyły fałszywych tras
+    for v in reached:
+        if not done[v]:
+            dist[v] = INF; parent[v] = -1
+    return SPTree(dist, parent, order, len(order), neighbors_checked)
+
+
+def _via_route(graph: CSRGraph, fwd: SPTree, bwd: SPTree, start: int, via: int, end: int):
+    """(wierzchołki, sloty) trasy start -> via (drzewo w przód) -> end (drzewo wstecz)."""
+    sources, targets = graph.sources, graph.targets
+    nodes, slots = [via], []
+    cur = via
+    while cur != start:
+        s = fwd.parent[cur]
+        slots.append(s); cur = sources[s]; nodes.append(cur)
+    nodes.reverse(); slots.reverse()
+    cur = via
+    while cur != end:
+        s = bwd.parent[cur]
+        slots.append(s); cur = targets[s]; nodes.append(cur)
+    return nodes, slots
+
+
+def alternatives(graph: CSRGraph, start_vertex_id: int, end_vertex_id: int, k: int = 3,
+                 metric: str = "time", max_stretch: float = 0.25, max_overlap: float = 0.6,
+                 min_plateau: float = 0.2, speed_kph: Dict[str, float] = SPEED_KPH) -> List[SearchResult]:
+    """
+    Do `k` tras (pierwsza = najkrótsza), każda o koszcie <= (1 + max_stretch) * opt,
+    dzieląca z każdą wcześniej wybraną co najwyżej max_overlap swojego kosztu
+    i z plateau >= min_plateau kosztu (odcinek trasy, który jest najkrótszy w obu drzewach).
+    settled / neighbors_checked w wynikach dotyczą obu drzew łącznie.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Nieznana metryka: {metric}")
+    if not maybe_reachable(graph, start_vertex_id, end_vertex_id):
+        return []
+    weights = metric_weights(graph, metric, speed_kph)
+    fwd = shortest_path_tree(graph, weights, start_vertex_id, target=end_vertex_id, stretch=max_stretch)
+    opt = fwd.dist[end_vertex_id]
+    if opt == INF:
+        return []
+    bound = opt * (1.0 + max_stretch)
+    bwd = shortest_path_tree(graph, weights, end_vertex_id, reverse=True, limit=bound)
+    settled = fwd.settled + bwd.settled
+    checked = fwd.neighbors_checked + bwd.neighbors_checked
+    edge_ids, sources, targets = graph.edge_ids, graph.sources, graph.targets
+    df, db, pf, pb = fwd.dist, bwd.dist, fwd.parent, bwd.parent
+
+    # łańcuchy plateau: krawędź u -> v w obu drzewach; (koszt trasy, długość plateau, wierzchołek startu)
+    def on_plateau(s: int) -> bool:
+        return s >= 0 and pf[targets[s]] == s and pb[sources[s]] == s
+    candidates = []
+    for a in fwd.order:                                   # poza drzewem w przód df = INF
+        if df[a] + db[a] > bound or on_plateau(pf[a]):
+            continue                                      # poza granicą albo środek łańcucha
+        b = a
+        while on_plateau(pb[b]):
+            b = targets[pb[b]]
+        candidates.append((df[a] + db[a], -(df[b] - df[a]), a))
+    candidates.sort()
+
+    chosen: List[SearchResult] = []
+    chosen_slots: List[Set[int]] = []
+    for cost, neg_plateau, via in candidates:
+        if len(chosen) >= k:
+            break
+        if chosen and -neg_plateau < min_plateau * cost:
+            continue
+        nodes, slots = _via_route(graph, fwd, bwd, start_vertex_id, via, end_vertex_id)
+        if len(set(nodes)) != len(nodes):
+            continue                                      # trasa z pętlą
+        slot_set = set(slots)
+        if any(sum(weights[s] for s in slot_set & other) > max_overlap * cost for other in chosen_slots):
+            continue
+        chosen.append(SearchResult(nodes, [edge_ids[s] for s in slots], cost, settled, checked))
+        chosen_slots.append(slot_set)
+    return chosen
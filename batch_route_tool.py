@@ -0,0 +1,87 @@
+import multiprocessing
+import os
+import sys
+import time
+
+from batch_routing import ALGORITHMS, route_pairs
+from routing import INF
+from segment_geometry import GEOMETRY_EXT, open_geometry, route_coords
+
+
+def main() -> None:
+    # arcpy tylko w procesie narzędzia - procesy puli (spawn) importują ten plik jako __mp_main__
+    import arcpy
+    from gdb_graph import load_graph
+
+    # Parametry
+    nodes_fc  = arcpy.GetParameterAsText(0)
+    edges_fc  = arcpy.GetParameterAsText(1)
+    pairs_tbl = arcpy.GetParameterAsText(2)       # tabela / CSV / klasa obiektów z parami
+    start_field = arcpy.GetParameterAsText(3) or "start_id"
+    end_field   = arcpy.GetParameterAsText(4) or "end_id"
+    algorithm = arcpy.GetParameterAsText(5) or "A* (prędkość)"
+    processes = int(arcpy.GetParameterAsText(6) or 1)
+    gdb_path  = arcpy.GetParameterAsText(7)
+    out_fc    = arcpy.GetParameterAsText(8)
+    with_geometry = arcpy.GetParameter(9) if arcpy.GetParameterAsText(9) else True
+
+    if algorithm not in ALGORITHMS:
+        arcpy.AddError(f"Nieznany algorytm: {algorithm}")
+        return
+
+    graph, snap_path, signature = load_graph(nodes_fc, edges_fc)
+    if processes > 1 and not os.path.exists(snap_path):
+        arcpy.AddWarning("Brak snapshotu grafu na dysku - liczę w jednym procesie")
+        processes = 1
+    # pełna geometria odcinków z graph.py (<snapshot>.geom); brak lub nieaktualna -> linie węzeł-węzeł
+    geometry = open_geometry(snap_path + GEOMETRY_EXT, signature) if with_geometry else None
+    if with_geometry and geometry is None:
+        arcpy.AddMessage("[Wsad] Brak geometrii odcinków - trasy jako linie między węzłami")
+    if processes > 1:
+        # ArcGIS Pro uruchamia skrypt w swoim procesie - procesy puli muszą startować z python.exe
+        multiprocessing.set_executable(os.path.join(sys.exec_prefix, "python.exe"))
+
+    with arcpy.da.SearchCursor(pairs_tbl, [start_field, end_field]) as cur:
+        pairs = [(int(s), int(t)) for s, t in cur if s is not None and t is not None]
+    arcpy.AddMessage(f"[Wsad] Par do policzenia: {len(pairs)} ({algorithm}, procesów: {processes})")
+
+    # Tworzymy output: jedna linia (albo rekord bez geometrii) na parę
+    sr = arcpy.Describe(nodes_fc).spatialReference
+    if arcpy.Exists(out_fc):
+        arcpy.management.Delete(out_fc)
+    arcpy.management.CreateFeatureclass(gdb_path, os.path.basename(out_fc), "POLYLINE", spatial_reference=sr)
+    unit = ALGORITHMS[algorithm][1]
+    arcpy.management.AddField(out_fc, "start_id", "LONG")
+    arcpy.management.AddField(out_fc, "end_id", "LONG")
+    arcpy.management.AddField(out_fc, f"cost_{unit}", "DOUBLE")
+    arcpy.management.AddField(out_fc, "length_m", "DOUBLE")
+    arcpy.management.AddField(out_fc, "edge_ids", "TEXT", field_length=1000000)
+
+    t0 = time.perf_counter()
+    found = 0
+    with arcpy.da.InsertCursor(out_fc, ["SHAPE@", "start_id", "end_id", f"cost_{unit}", "length_m", "edge_ids"]) as cur:
+        for i, r in enumerate(route_pairs(pairs, algorithm, graph=graph, snapshot_path=snap_path,
+                                          processes=processes), 1):
+            shape = None
+            if r.cost == INF:
+                cur.insertRow([None, r.start, r.end, None, None, ""])
+            else:
+                found += 1
+                if with_geometry and r.edges:
+                    arr = arcpy.Array([arcpy.Point(x, y) for x, y in route_coords(graph, r.edges, geometry)])
+                    shape = arcpy.Polyline(arr, sr)
+                cur.insertRow([shape, r.start, r.end, r.cost, r.length, ";".join(map(str, r.edges))])
+            if i % 10000 == 0:
+                arcpy.AddMessage(f"[Wsad] {i} / {len(pairs)} ({i / (time.perf_counter() - t0):.1f} par/s)")
+
+    dt = time.perf_counter() - t0
+    arcpy.AddMessage(f"[Wsad] {len(pairs)} par w {dt:.2f} s = {len(pairs) / dt if dt else 0.0:.1f} par/s "
+                     f"(znaleziono tras: {found})")
+    if found < len(pairs):
+        arcpy.AddWarning(f"[Wsad] Brak ścieżki dla {len(pairs) - found} par")
+    arcpy.AddMessage("Zapisano trasy do: " + out_fc)
+
+
+# procesy puli (spawn) importują ten skrypt ponownie - narzędzie uruchamiamy tylko w głównym
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Trasy wsadowo dla tabeli par (start, koniec) - jeden graf, wiele procesów.
+
+Graf wczytywany jest raz jako snapshot (.pag2graph); każdy proces puli mapuje ten
+sam plik (mmap), więc tablice grafu są współdzielone przez cache stron systemu,
+a nie kopiowane ani serializowane. Do procesów trafiają tylko pary id.
+
+Uruchomienie (bez arcpy):
+    python batch_routing.py graf.pag2graph pary.csv --algorithm "A* (prędkość)" --out trasy.csv
+Plik par: CSV z dwiema pierwszymi kolumnami = node_id startu i końca (nagłówek pomijany).
+--departure HH:MM - czasy zależne od godziny wyjazdu (time_dependent.py) dla algorytmów czasowych.
+--queue radix:0.5 - kolejka priorytetowa wyszukiwań (priority_queues.py; kubełkowe tylko jednokierunkowe).
+"""
+from functools import partial
+from multiprocessing import Pool
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+import argparse
+import csv
+import os
+import time
+
+import routing
+from csr_graph import CSRGraph
+from graph_snapshot import open_snapshot
+from priority_queues import parse_queue
+from profiles import load_profile
+
+# nazwy jak w route_finder.atbx -> (funkcja wyszukiwania, jednostka kosztu)
+ALGORITHMS: Dict[str, Tuple[Callable[..., routing.SearchResult], str]] = {
+    "Dijkstra": (routing.dijkstra, "m"),
+    "A* (długość)": (routing.a_star_length, "m"),
+    "A* (prędkość)": (routing.a_star_speed, "s"),
+    "Dijkstra dwukierunkowy": (routing.bidirectional_dijkstra, "m"),
+    "A* dwukierunkowy (długość)": (routing.bidirectional_a_star_length, "m"),
+    "A* dwukierunkowy (prędkość)": (routing.bidirectional_a_star_speed, "s"),
+}
+
+
+class PairRoute(NamedTuple):
+    start: int
+    end: int
+    cost: float             # jednostka algorytmu (INF = brak ścieżki)
+    length: float           # [m]
+    edges: List[int]        # edge_id trasy
+
+
+def route_pair(graph: CSRGraph, search, start_vertex_id: int, end_vertex_id: int) -> PairRoute:
+    if not (graph.has_vertex(start_vertex_id) and graph.has_vertex(end_vertex_id)):
+        return PairRoute(start_vertex_id, end_vertex_id, routing.INF, routing.INF, [])
+    res = search(graph, start_vertex_id, end_vertex_id)
+    length = sum(graph.edge_length(eid) for eid in res.edges) if res.cost != routing.INF else routing.INF
+    return PairRoute(start_vertex_id, end_vertex_id, res.cost, length, res.edges)
+
+
+def _search(algorithm: str, speed_kph: Dict[str, float], departure_s: Optional[float] = None,
+            queue: str = "heapq"):
+    """
+    Funkcja wyszukiwania algorytmu; algorytmy czasowe z wybranym profilem prędkości,
+    a przy `departure_s` - A* zależny od godziny wyjazdu (time_dependent.td_a_star).
+    `queue` - kolejka priorytetowa z priority_queues.QUEUES (td_a_star: tylko heapq).
+    """
+    search, unit = ALGORITHMS[algorithm]
+    parse_queue(queue)
+    if departure_s is not None:
+        if unit != "s":
+            raise ValueError(f"Godzina wyjazdu wymaga algorytmu czasowego (nie: {algorithm})")
+        if queue != "heapq":
+            raise ValueError(f"A* zależny od godziny wyjazdu liczy tylko z kolejką heapq (nie: {queue})")
+        from time_dependent import td_search        # numpy potrzebny tylko tutaj
+        return td_search(departure_s, speed_kph)
+    if unit == "s":
+        return partial(search, speed_kph=speed_kph, queue=queue)
+    return partial(search, queue=queue) if queue != "heapq" else search
+
+
+# --- pula procesów: każdy proces mapuje snapshot raz (initializer) ---
+_worker: Dict[str, object] = {}
+
+def _init_worker(snapshot_path: str, algorithm: str, speed_kph: Dict[str, float],
+                 departure_s: Optional[float] = None, queue: str = "heapq") -> None:
+    _worker["graph"] = open_snapshot(snapshot_path)
+    _worker["search"] = _search(algorithm, speed_kph, departure_s, queue)
+
+def _worker_route(pair: Tuple[int, int]) -> PairRoute:
+    return route_pair(_worker["graph"], _worker["search"], pair[0], pair[1])
+
+
+def route_pairs(pairs: Sequence[Tuple[int, int]], algorithm: str = "A* (prędkość)",
+                graph: Optional[CSRGraph] = None, snapshot_path: Optional[str] = None,
+                processes: int = 1, speed_kph: Dict[str, float] = routing.SPEED_KPH,
+                departure_s: Optional[float] = None, queue: str = "heapq") -> Iterator[PairRoute]:
+    """
+    Trasy dla `pairs` w kolejności wejścia (generator - wyniki można zapisywać na bieżąco).
+    Dla processes > 1 wymagany jest snapshot_path (procesy mapują go same).
+    """
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Nieznany algorytm: {algorithm}")
+    if processes <= 1:
+        if graph is None:
+            graph = open_snapshot(snapshot_path)
+        search = _search(algorithm, speed_kph, departure_s, queue)
+        for s, t in pairs:
+            yield route_pair(graph, search, s, t)
+        return
+
+    if snapshot_path is None:
+        raise ValueError("Dla puli procesów podaj snapshot_path grafu")
+    _search(algorithm, speed_kph, departure_s, queue)      # błędne parametry przed startem puli
+    chunk = max(1, min(256, len(pairs) // (processes * 8)))
+    with Pool(processes, _init_worker, (snapshot_path, algorithm, speed_kph, departure_s, queue)) as pool:
+        yield from pool.imap(_worker_route, pairs, chunksize=chunk)
+
+
+def read_pairs_csv(path: str) -> List[Tuple[int, int]]:
+    pairs = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if len(row) >= 2 and all(c.strip().lstrip("-").isdigit() for c in row[:2]):
+                pairs.append((int(row[0]), int(row[1])))
+    return pairs
+
+
+def write_routes_csv(path: str, routes, unit: str) -> int:
+    """CSV: start, end, koszt, długość, lista edge_id (';'); puste pola = brak ścieżki."""
+    n = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["start_id", "end_id", f"cost_{unit}", "length_m", "edge_ids"])
+        for r in routes:
+            found = r.cost != routing.INF
+            w.writerow([r.start, r.end, f"{r.cost:.3f}" if found else "",
+                        f"{r.length:.3f}" if found else "", ";".join(map(str, r.edges))])
+            n += 1
+    return n
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Trasy wsadowo dla tabeli par na snapshocie grafu")
+    ap.add_argument("snapshot", help="plik .pag2graph zapisany przez graph.py")
+    ap.add_argument("pairs", help="CSV z parami node_id (start, koniec)")
+    ap.add_argument("--algorithm", choices=list(ALGORITHMS), default="A* (prędkość)")
+    ap.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--profile", default="car", help="profil prędkości: car, truck albo plik JSON")
+    ap.add_argument("--departure", help="godzina wyjazdu HH:MM - czasy zależne od pory dnia")
+    ap.add_argument("--queue", default="heapq", help="kolejka priorytetowa: heapq, binary, 4ary, radix[:szer.], dial[:szer.]")
+    ap.add_argument("--out", required=True, help="wynikowy CSV")
+    args = ap.parse_args(argv)
+    departure_s = None
+    if args.departure:
+        from time_dependent import parse_clock
+        departure_s = parse_clock(args.departure)
+
+    pairs = read_pairs_csv(args.pairs)
+    t0 = time.perf_counter()
+    n = write_routes_csv(args.out, route_pairs(pairs, args.algorithm, snapshot_path=args.snapshot,
+                                               processes=args.processes,
+                                               speed_kph=load_profile(args.profile),
+                                               departure_s=departure_s, queue=args.queue),
+                         ALGORITHMS[args.algorithm][1])
+    dt = time.perf_counter() - t0
+    print(f"[Wsad] {n} par ({args.algorithm}{', wyjazd ' + args.departure if args.departure else ''}) w {dt:.2f} s = {n / dt if dt else 0.0:.1f} par/s "
+          f"({args.processes} proc.) -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
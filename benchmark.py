@@ -0,0 +1,224 @@
+"""
+Benchmark algorytmów wyszukiwania tras na snapshocie albo sieci syntetycznej (synthetic.py).
+
+Dla każdego algorytmu ten sam stały zbiór losowych par (ziarno; oba końce w największej
+silnie spójnej składowej, więc każda para ma trasę). Pierwszy przebieg mierzy czas zapytań,
+drugi - liczniki kopca z instrumentation.py (wstawienia, nieaktualne zdjęcia, maks. rozmiar)
+i szczyt pamięci zapytania (tracemalloc), żeby narzut pomiarów nie wpływał na czasy. Koszty tras
+porównywane są z pierwszym algorytmem tej samej metryki (mismatches).
+Wyniki w JSON; --compare wypisuje zmianę względem poprzedniego pliku.
+
+Uruchomienie (bez arcpy):
+    python benchmark.py grid:200000 --queries 200 --out wyniki.json
+    python benchmark.py graf.pag2graph --algorithms "A* (prędkość),CH (prędkość)" --compare wyniki.json
+"""
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import argparse
+import datetime
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import chains
+import contraction
+import routing
+from components import ensure_components
+from csr_graph import CSRGraph
+from graph_snapshot import open_snapshot
+from instrumentation import Instrumentation
+from landmarks import build_landmarks
+from profiles import load_profile
+from routing import INF, SearchResult
+
+Query = Callable[[int, int], SearchResult]
+
+
+# nazwa -> (metryka, przygotowanie(graf, profil) -> funkcja zapytania); nazwy jak w route_finder
+def _plain(search, timed: bool):
+    return lambda graph, speed_kph: ((lambda s, t: search(graph, s, t, speed_kph=speed_kph)) if timed
+                                     else (lambda s, t: search(graph, s, t)))
+
+def _alt(graph: CSRGraph, speed_kph: Dict[str, float]) -> Query:
+    lm = build_landmarks(graph, "time", speed_kph=speed_kph)
+    return lambda s, t: routing.a_star_speed(graph, s, t, speed_kph=speed_kph,
+                                             heuristic=lm.heuristic(t, s))
+
+def _ch(graph: CSRGraph, speed_kph: Dict[str, float]) -> Query:
+    ch = contraction.build_ch(graph, speed_kph)
+    return lambda s, t: contraction.ch_query(ch, graph, s, t)
+
+def _chains(graph: CSRGraph, speed_kph: Dict[str, float]) -> Query:
+    cg = chains.ChainGraph(graph)
+    return lambda s, t: cg.shortest_path(s, t, "time", speed_kph)
+
+ALGORITHMS: Dict[str, Tuple[str, Callable[[CSRGraph, Dict[str, float]], Query]]] = {
+    "Dijkstra": ("length", _plain(routing.dijkstra, False)),
+    "A* (długość)": ("length", _plain(routing.a_star_length, False)),
+    "Dijkstra dwukierunkowy": ("length", _plain(routing.bidirectional_dijkstra, False)),
+    "A* dwukierunkowy (długość)": ("length", _plain(routing.bidirectional_a_star_length, False)),
+    "A* (prędkość)": ("time", _plain(routing.a_star_speed, True)),
+    "A* dwukierunkowy (prędkość)": ("time", _plain(routing.bidirectional_a_star_speed, True)),
+    "ALT (prędkość)": ("time", _alt),
+    "CH (prędkość)": ("time", _ch),
+    "Łańcuchy (prędkość)": ("time", _chains),
+}
+DEFAULT_ALGORITHMS = ("Dijkstra", "A* (długość)", "Dijkstra dwukierunkowy", "A* dwukierunkowy (długość)",
+                      "A* (prędkość)", "A* dwukierunkowy (prędkość)")
+
+
+def query_pairs(graph: CSRGraph, n: int, seed: int = 1) -> List[Tuple[int, int]]:
+    """`n` losowych par (start != koniec) z największej SCC - ten sam zbiór dla tego samego ziarna."""
+    ensure_components(graph)
+    vids = list(graph.vertex_ids())
+    big = Counter(graph.scc[v] for v in vids).most_common(1)[0][0]
+    pool = [v for v in vids if graph.scc[v] == big]
+    rng = random.Random(seed)
+    pairs = []
+    while len(pairs) < n and len(pool) > 1:
+        s, t = rng.choice(pool), rng.choice(pool)
+        if s != t:
+            pairs.append((s, t))
+    return pairs
+
+
+def _dist(values: Sequence[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    if not ordered:
+        return {}
+    pct = lambda p: ordered[min(len(ordered) - 1, max(0, int(round(p / 100.0 * len(ordered))) - 1))]
+    return {"mean": sum(ordered) / len(ordered), "p50": pct(50), "p90": pct(90), "p99": pct(99),
+            "max": ordered[-1]}
+
+
+def run_algorithm(graph: CSRGraph, name: str, pairs: Sequence[Tuple[int, int]],
+                  speed_kph: Dict[str, float]) -> Tuple[Dict[str, Any], List[float]]:
+    """(wyniki algorytmu, koszty per para)."""
+    metric, prepare = ALGORITHMS[name]
+    t0 = time.perf_counter()
+    query = prepare(graph, speed_kph)
+    if pairs:
+        query(*pairs[0])                                  # rozgrzewka: wagi metryki w cache grafu
+    preprocess_s = time.perf_counter() - t0
+
+    latency, settled, checked, costs = [], [], [], []
+    gc.collect()
+    for s, t in pairs:
+        q0 = time.perf_counter()
+        res = query(s, t)
+        latency.append((time.perf_counter() - q0) * 1000.0)
+        settled.append(res.settled); checked.append(res.neighbors_checked); costs.append(res.cost)
+
+    instr = Instrumentation(records=False)
+    pushes, stale, max_heap, reconstruct, peaks = [], [], [], [], []
+    tracemalloc.start()
+    try:
+        for s, t in pairs:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            instr.measure(name, (s, t), query, s, t)
+            peaks.append((tracemalloc.get_traced_memory()[1] - base) / 1024.0)
+            rec = instr.last
+            pushes.append(rec["heap_pushes"]); stale.append(rec["stale_pops"]); max_heap.append(rec["max_heap"])
+            reconstruct.append(rec["time_ms"]["reconstruct"])
+    finally:
+        tracemalloc.stop()
+
+    return {"metric": metric, "preprocess_s": preprocess_s, "queries": len(pairs),
+            "not_found": sum(1 for c in costs if c == INF),
+            "latency_ms": _dist(latency), "settled": _dist(settled), "neighbors_checked": _dist(checked),
+            "heap_pushes": _dist(pushes), "stale_pops": _dist(stale), "max_heap": _dist(max_heap),
+            "reconstruct_ms": _dist(reconstruct), "peak_kib": _dist(peaks)}, costs
+
+
+def run(graph: CSRGraph, algorithms: Sequence[str], queries: int = 200, seed: int = 1,
+        speed_kph: Dict[str, float] = routing.SPEED_KPH,
+        progress: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    pairs = query_pairs(graph, queries, seed)
+    results: Dict[str, Any] = {}
+    reference: Dict[str, List[float]] = {}                # metryka -> koszty pierwszego algorytmu
+    for name in algorithms:
+        res, costs = run_algorithm(graph, name, pairs, speed_kph)
+        ref = reference.setdefault(res["metric"], costs)
+        res["mismatches"] = sum(1 for a, b in zip(costs, ref) if abs(a - b) > 1e-6 * max(1.0, abs(b)))
+        results[name] = res
+        if progress is not None:
+            progress(name, res)
+    return {"meta": {"n_vertices": graph.n_vertices, "n_edges": graph.n_edges, "graph_mb": graph.nbytes() / 1e6,
+                     "queries": len(pairs), "seed": seed, "python": sys.version.split()[0],
+                     "platform": platform.platform(),
+                     "timestamp": datetime.datetime.now().isoformat(timespec="seconds")},
+            "results": results}
+
+
+def load_graph(spec: str, seed: int = 1) -> Tuple[CSRGraph, Dict[str, Any]]:
+    """Snapshot .pag2graph albo 'układ:liczba_odcinków' (np. grid:200000) z synthetic.py."""
+    layout, _, size = spec.partition(":")
+    if size.isdigit():
+        from synthetic import generate_graph        # numpy potrzebny tylko dla sieci syntetycznych
+        return generate_graph(layout, int(size), seed=seed), {"synthetic": layout, "segments": int(size)}
+    graph = open_snapshot(spec)
+    if graph is None:
+        raise ValueError(f"Nie można wczytać snapshotu: {spec}")
+    return graph, {"snapshot": spec}
+
+
+def format_result(name: str, r: Dict[str, Any]) -> str:
+    lat = r["latency_ms"]
+    return (f"[{name}] p50 {lat['p50']:.2f} ms || p90 {lat['p90']:.2f} ms || p99 {lat['p99']:.2f} ms || "
+            f"|S| śr. {r['settled']['mean']:.0f} || sąsiadów śr. {r['neighbors_checked']['mean']:.0f} || "
+            f"kopiec śr. {r['heap_pushes']['mean']:.0f} (maks. {r['max_heap']['max']:.0f}) || pamięć szczyt {r['peak_kib']['max']:.0f} KiB || "
+            f"preprocessing {r['preprocess_s']:.2f} s" + (f" || NIEZGODNYCH KOSZTÓW: {r['mismatches']}"
+                                                          if r["mismatches"] else ""))
+
+
+def compare(new: Dict[str, Any], old: Dict[str, Any]) -> List[str]:
+    lines = []
+    for name, r in new["results"].items():
+        o = old.get("results", {}).get(name)
+        if o is None:
+            continue
+        ratio = lambda key, stat: r[key][stat] / o[key][stat] if o[key].get(stat) else float("nan")
+        lines.append(f"[{name}] p50 x{ratio('latency_ms', 'p50'):.2f} || p99 x{ratio('latency_ms', 'p99'):.2f} "
+                     f"|| |S| x{ratio('settled', 'mean'):.2f} || kopiec x{ratio('heap_pushes', 'mean'):.2f}")
+    return lines
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Benchmark algorytmów wyszukiwania tras")
+    ap.add_argument("graph", help="plik .pag2graph albo sieć syntetyczna 'grid:200000' / 'planar:50000'")
+    ap.add_argument("--algorithms", default=",".join(DEFAULT_ALGORITHMS),
+                    help=f"lista po przecinku albo 'all'; dostępne: {', '.join(ALGORITHMS)}")
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=1, help="ziarno zbioru par (i sieci syntetycznej)")
+    ap.add_argument("--profile", default="car", help="profil prędkości: car, truck albo plik JSON")
+    ap.add_argument("--out", help="wyniki JSON")
+    ap.add_argument("--compare", help="poprzedni plik wyników JSON")
+    args = ap.parse_args(argv)
+
+    names = list(ALGORITHMS) if args.algorithms == "all" else [a.strip() for a in args.algorithms.split(",")]
+    unknown = [a for a in names if a not in ALGORITHMS]
+    if unknown:
+        ap.error(f"Nieznane algorytmy: {', '.join(unknown)}")
+
+    t0 = time.perf_counter()
+    graph, source = load_graph(args.graph, args.seed)
+    print(f"[Graf] |V|: {graph.n_vertices} || |E|: {graph.n_edges} || {time.perf_counter() - t0:.2f} s")
+    report = run(graph, names, args.queries, args.seed, load_profile(args.profile),
+                 progress=lambda name, r: print(format_result(name, r), flush=True))
+    report["meta"].update(source, profile=args.profile)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            for line in compare(report, json.load(f)):
+                print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Wsadowa budowa CSRGraph z kolumn numpy (zamiast pętli po wierszach w build_graph_rows).
+
+Końce odcinków pobierane są hurtem (FeatureClassToNumPyArray z explode_to_points),
+sklejane przez zaokrąglenie + np.unique, klasy mapowane raz na unikalny tekst,
+a tablice CSR składane sortowaniem stabilnym. Numeracja wierzchołków i krawędzi
+oraz zawartość wszystkich tablic są identyczne jak w build_graph_rows.
+"""
+from array import array
+from typing import Callable, Iterable, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from csr_graph import CSRGraph, KLASA_DOMYSLNA, KLASA_IDX, RoadRow
+
+
+class RoadColumns(NamedTuple):
+    oid: np.ndarray         # int32, jezdnia_oid
+    x1: np.ndarray          # float64, początek odcinka
+    y1: np.ndarray
+    x2: np.ndarray          # float64, koniec odcinka
+    y2: np.ndarray
+    length: np.ndarray      # float64 [m]
+    klasa: np.ndarray       # uint8, indeks w KLASY
+    kier: np.ndarray        # int8
+
+
+def klasa_codes(klasa_txt: np.ndarray, klasa_map: Callable[[Optional[str]], str]) -> np.ndarray:
+    """Tekst klasy -> indeks w KLASY; klasa_map wołana raz na unikalną wartość."""
+    uniq, inv = np.unique(klasa_txt, return_inverse=True)
+    lut = np.array([KLASA_IDX.get(klasa_map(str(t)), KLASA_DOMYSLNA) for t in uniq], dtype=np.uint8)
+    return lut[inv.reshape(-1)] if len(uniq) else np.zeros(0, np.uint8)
+
+
+def columns_from_points(oid: np.ndarray, x: np.ndarray, y: np.ndarray, length: np.ndarray,
+                        klasa_txt: np.ndarray, kier: np.ndarray,
+                        klasa_map: Callable[[Optional[str]], str]) -> RoadColumns:
+    """
+    Kolumny odcinków z punktów rozbitych geometrii (jeden wiersz na wierzchołek linii,
+    kolejno po obiekcie): pierwszy i ostatni punkt każdego oid. Obiekty bez geometrii
+    (NaN) są pomijane jak w read_road_rows.
+    """
+    ok = ~(np.isnan(x) | np.isnan(y))
+    oid, x, y, length, klasa_txt, kier = oid[ok], x[ok], y[ok], length[ok], klasa_txt[ok], kier[ok]
+    change = oid[1:] != oid[:-1]
+    first = np.flatnonzero(np.concatenate(([True], change))) if len(oid) else np.zeros(0, np.int64)
+    last = np.flatnonzero(np.concatenate((change, [True]))) if len(oid) else np.zeros(0, np.int64)
+    return RoadColumns(oid[first].astype(np.int32), x[first], y[first], x[last], y[last],
+                       length[first].astype(np.float64), klasa_codes(klasa_txt[first], klasa_map),
+                       kier[first].astype(np.int8))
+
+
+def columns_from_rows(rows: Iterable[RoadRow]) -> RoadColumns:
+    """Kolumny z wierszy RoadRow (np. z read_road_rows albo danych testowych)."""
+    rows = list(rows)
+    col = lambda i, dt: np.array([r[i] for r in rows], dtype=dt)
+    return RoadColumns(col(0, np.int32), col(1, np.float64), col(2, np.float64), col(3, np.float64),
+                       col(4, np.float64), col(5, np.float64),
+                       np.array([KLASA_IDX.get(r[6], KLASA_DOMYSLNA) for r in rows], dtype=np.uint8),
+                       col(7, np.int8))
+
+
+def _arr(code: str, a: np.ndarray) -> array:
+    out = array(code)
+    out.frombytes(np.ascontiguousarray(a, dtype=np.dtype(code)).tobytes())
+    return out
+
+
+def _offsets(keys: np.ndarray, n: int) -> np.ndarray:
+    off = np.zeros(n + 1, np.int64)
+    np.cumsum(np.bincount(keys, minlength=n), out=off[1:])
+    return off
+
+
+def endpoints(cols: RoadColumns) -> Tuple[np.ndarray, np.ndarray]:
+    """Końce odcinków w kolejności (x1, x2) per wiersz - jak przy przydzielaniu next_vid."""
+    n = len(cols.oid)
+    px = np.empty(2 * n); px[0::2] = cols.x1; px[1::2] = cols.x2
+    py = np.empty(2 * n); py[0::2] = cols.y1; py[1::2] = cols.y2
+    return px, py
+
+
+def snap_keys(px: np.ndarray, py: np.ndarray, snap_tol: float) -> Tuple[np.ndarray, np.ndarray]:
+    """= _snap_key (round half to even) dla tablic współrzędnych."""
+    return np.rint(px / snap_tol).astype(np.int64), np.rint(py / snap_tol).astype(np.int64)
+
+
+def build_graph_columns(cols: RoadColumns, snap_tol: float = 0.25) -> CSRGraph:
+    """Odpowiednik build_graph_rows na kolumnach - ten sam graf, bez pętli per wiersz."""
+    n = len(cols.oid)
+    px, py = endpoints(cols)
+    kx, ky = snap_keys(px, py, snap_tol)
+    # unikalne klucze: lexsort jest stabilny, więc pierwszy w grupie = pierwsze wystąpienie
+    by_key = np.lexsort((ky, kx))
+    sx, sy = kx[by_key], ky[by_key]
+    new = np.concatenate(([True], (sx[1:] != sx[:-1]) | (sy[1:] != sy[:-1]))) if n else np.zeros(0, bool)
+    inv = np.empty(2 * n, np.int64); inv[by_key] = np.cumsum(new) - 1
+    first = by_key[new]
+    order = np.argsort(first, kind="stable")           # kolejność pierwszego wystąpienia
+    rank = np.empty(len(first), np.int64); rank[order] = np.arange(len(first))
+    vid = rank[inv] + 1
+    max_vid = len(first)
+
+    xs = np.full(max_vid + 1, np.nan); ys = np.full(max_vid + 1, np.nan)
+    xs[1:] = px[first[order]]; ys[1:] = py[first[order]]
+    return assemble_graph(cols, vid, xs, ys)
+
+
+def assemble_graph(cols: RoadColumns, vid: np.ndarray, xs: np.ndarray, ys: np.ndarray) -> CSRGraph:
+    """
+    Tablice CSR z kolumn odcinków i numerów wierzchołków końców (`vid` per koniec, kolejność
+    jak endpoints; xs / ys per vid, indeks 0 nieużywany).
+    """
+    row, _, src, dst = expand_edges(cols.kier, vid[0::2], vid[1::2])
+    eids = np.arange(1, len(row) + 1)
+
+    # sloty posortowane stabilnie po źródle (kolejność edge_out)
+    slot = stable_order(src)
+    return graph_from_slots(cols, row[slot], src[slot], dst[slot], eids[slot], xs, ys)
+
+
+def edge_counts(kier: np.ndarray) -> np.ndarray:
+    """Liczba krawędzi odcinka: kier 3 -> 0, 1 / 2 -> 1, pozostałe -> 2."""
+    kier = np.asarray(kier, np.int64)
+    return np.where(kier == 3, 0, np.where((kier == 1) | (kier == 2), 1, 2))
+
+
+def expand_edges(kier: np.ndarray, u: np.ndarray, v: np.ndarray
+                 ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Krawędzie odcinków w kolejności edge_id: (wiersz, numer krawędzi w wierszu, źródło, cel).
+    kier 3 -> brak, 1 -> (u, v), 2 -> (v, u), pozostałe -> (u, v), (v, u).
+    """
+    kier = np.asarray(kier, np.int64)
+    cnt = edge_counts(kier)
+    row = np.repeat(np.arange(len(kier)), cnt)
+    within = np.arange(len(row)) - np.repeat(np.cumsum(cnt) - cnt, cnt)
+    u, v = u[row], v[row]
+    flip = (kier[row] == 2) | (within == 1)
+    return row, within, np.where(flip, v, u), np.where(flip, u, v)
+
+
+def stable_order(keys: np.ndarray) -> np.ndarray:
+    """
+    = np.argsort(keys, kind="stable") dla nieujemnych kluczy < 2**32 (numery wierzchołków):
+    dwa przebiegi radix po 16 bitów (numpy sortuje stabilnie uint16 w czasie liniowym).
+    """
+    keys = np.asarray(keys, np.int64)
+    order = np.argsort((keys & 0xFFFF).astype(np.uint16), kind="stable")
+    if len(keys) and int(keys.max()) > 0xFFFF:
+        order = order[np.argsort((keys[order] >> 16).astype(np.uint16), kind="stable")]
+    return order
+
+
+def graph_from_slots(cols: RoadColumns, row: np.ndarray, sources: np.ndarray, targets: np.ndarray,
+                     eids: np.ndarray, xs: np.ndarray, ys: np.ndarray) -> CSRGraph:
+    """CSRGraph z krawędzi już w kolejności slotów (`row` - wiersz odcinka każdego slotu)."""
+    max_vid = len(xs) - 1
+    m = len(sources)
+    e_kier = cols.kier[row]
+    passable = (e_kier != 3) & ((e_kier != 2) | (sources == targets))
+    edge_slot = np.full(m + 1, -1, np.int64)
+    edge_slot[eids] = np.arange(m)
+    in_slots = stable_order(targets)
+
+    return CSRGraph(_arr("d", xs), _arr("d", ys), _arr("q", _offsets(sources, max_vid + 1)),
+                    _arr("i", sources), _arr("i", targets), _arr("d", cols.length[row]),
+                    _arr("B", cols.klasa[row]), _arr("b", e_kier),
+                    bytearray(passable.astype(np.uint8).tobytes()), _arr("i", eids),
+                    _arr("i", cols.oid[row]), _arr("i", edge_slot),
+                    _arr("q", _offsets(targets, max_vid + 1)), _arr("i", in_slots), max_vid)
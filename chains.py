@@ -0,0 +1,275 @@
+"""
+Ściąganie łańcuchów wierzchołków stopnia 2 w super-krawędzie (mniejszy graf do wyszukiwań).
+
+BDOT10k dzieli jezdnie przy każdej zmianie atrybutu, więc większość wierzchołków ma
+jedno wejście i jedno wyjście (w każdym kierunku). Wierzchołek jest ściągany, gdy:
+    - jednokierunkowo: dokładnie a -> v i v -> b (a != b),
+    - dwukierunkowo:   dokładnie a -> v, v -> b, b -> v, v -> a (a != b),
+a wszystkie te krawędzie mają tę samą klasę, kier i przejezdność. Dzięki jednej klasie
+czas super-krawędzi (suma długości / prędkość klasy) jest sumą czasów składowych
+w każdym profilu prędkości.
+
+Super-krawędź pamięta kolejne sloty oryginalnego grafu (-> edge_id, jezdnia_oid,
+geometria przez wierzchołki pośrednie). Wierzchołki zachowują numerację; trasy między
+dowolnymi wierzchołkami (także ściągniętymi) liczy ChainGraph.shortest_path i rozwija
+je do oryginalnych edge_id.
+
+Uruchomienie (bez arcpy) - raport zmniejszenia grafu i przyspieszenia zapytań:
+    python chains.py graf.pag2graph --queries 200
+"""
+from array import array
+from heapq import heappush, heappop
+from typing import Dict, List, Optional, Sequence, Tuple
+import argparse
+import random
+import time
+
+from csr_graph import KLASY, CSRGraph, CSRGraphBuilder
+from graph_snapshot import open_snapshot
+import routing
+from routing import INF, METRICS, SPEED_KPH, SearchResult, metric_weights
+
+
+def _pass_through(graph: CSRGraph, v: int) -> bool:
+    """Czy wierzchołek v leży wewnątrz łańcucha (patrz opis modułu)."""
+    outs = graph.out_slots(v)
+    ins = graph.in_edge_slots(v)
+    if len(outs) != len(ins) or len(outs) not in (1, 2):
+        return False
+    sources, targets, klasa, kier, passable = graph.sources, graph.targets, graph.klasa, graph.kier, graph.passable
+    slots = list(outs) + list(ins)
+    s0 = slots[0]
+    if any(klasa[s] != klasa[s0] or kier[s] != kier[s0] or passable[s] != passable[s0] for s in slots):
+        return False
+    nxt = sorted(targets[s] for s in outs)
+    prv = sorted(sources[s] for s in ins)
+    if v in nxt or v in prv:
+        return False
+    if len(outs) == 1:
+        return nxt != prv
+    return nxt == prv and nxt[0] != nxt[1]
+
+
+class ChainGraph:
+    """
+    Graf zredukowany + odwzorowanie super-krawędzi na oryginalne sloty.
+    Super-krawędź o edge_id e: sloty oryginału members[member_offsets[e]:member_offsets[e + 1]].
+    """
+
+    __slots__ = ("original", "graph", "member_offsets", "members", "on_edge", "on_pos", "build_s")
+
+    def __init__(self, original: CSRGraph):
+        t0 = time.perf_counter()
+        self.original = g = original
+        n = g.max_vid + 1
+        interior = bytearray(n)
+        for v in g.vertex_ids():
+            interior[v] = _pass_through(g, v)
+        targets = g.targets
+
+        covered = bytearray(g.n_edges)
+        chains: List[Tuple[int, int, List[int]]] = []        # (u, w, sloty oryginału)
+
+        def follow(s: int) -> None:
+            u, path = g.sources[s], [s]
+            covered[s] = 1
+            prev, v = u, targets[s]
+            while interior[v] and v != u:
+                nxt = [t for t in g.out_slots(v) if targets[t] != prev] or list(g.out_slots(v))
+                s = nxt[0]
+                covered[s] = 1; path.append(s)
+                prev, v = v, targets[s]
+            chains.append((u, v, path))
+
+        for u in g.vertex_ids():
+            if not interior[u]:
+                for s in g.out_slots(u):
+                    follow(s)
+        # cykle złożone tylko z wierzchołków przelotowych - jeden wierzchołek zostaje kotwicą
+        for s in range(g.n_edges):
+            if not covered[s]:
+                u = g.sources[s]
+                interior[u] = 0
+                for t in g.out_slots(u):
+                    if not covered[t]:
+                        follow(t)
+
+        b = CSRGraphBuilder()
+        for v in g.vertex_ids():
+            if not interior[v]:
+                b.add_vertex(v, g.xs[v], g.ys[v])
+        member_offsets = array("q", [0, 0])                   # edge_id od 1
+        members = array("i")
+        on_edge = array("i", [-1]) * (2 * n)                  # 2 super-krawędzie na wierzchołek (oba kierunki)
+        on_pos = array("i", [-1]) * (2 * n)
+        for eid, (u, w, path) in enumerate(chains, 1):
+            s0 = path[0]
+            b.add_edge(eid, u, w, sum(g.lengths[s] for s in path), KLASY[g.klasa[s0]], g.kier[s0],
+                       g.jezdnia_oid[s0])
+            for pos, s in enumerate(path[:-1]):
+                v = targets[s]
+                k = 2 * v + (on_edge[2 * v] >= 0)
+                on_edge[k] = eid; on_pos[k] = pos
+            members.extend(path)
+            member_offsets.append(len(members))
+        self.graph = b.build()                               # passable z kier - jak u składowych
+        self.member_offsets = member_offsets
+        self.members = members
+        self.on_edge = on_edge
+        self.on_pos = on_pos
+        self.build_s = time.perf_counter() - t0
+
+    # --- rozwijanie super-krawędzi ---
+    def edge_slots(self, eid: int) -> array:
+        return self.members[self.member_offsets[eid]:self.member_offsets[eid + 1]]
+
+    def edge_members(self, eid: int) -> List[int]:
+        """Oryginalne edge_id super-krawędzi, po kolei."""
+        ids = self.original.edge_ids
+        return [ids[s] for s in self.edge_slots(eid)]
+
+    def edge_oids(self, eid: int) -> List[int]:
+        """jezdnia_oid kolejnych składowych super-krawędzi."""
+        oids = self.original.jezdnia_oid
+        return [oids[s] for s in self.edge_slots(eid)]
+
+    def edge_geometry(self, eid: int) -> List[Tuple[float, float]]:
+        """Punkty linii super-krawędzi: początek i wszystkie wierzchołki pośrednie."""
+        g = self.original
+        slots = self.edge_slots(eid)
+        pts = [g.vertex_xy(g.sources[slots[0]])]
+        pts.extend(g.vertex_xy(g.targets[s]) for s in slots)
+        return pts
+
+    def expand(self, super_edge_ids: Sequence[int]) -> List[int]:
+        """Trasa w grafie zredukowanym -> oryginalne edge_id."""
+        out: List[int] = []
+        for eid in super_edge_ids:
+            out.extend(self.edge_members(eid))
+        return out
+
+    def stats(self) -> str:
+        g, r = self.original, self.graph
+        return (f"|V| {g.n_vertices} -> {r.n_vertices} ({r.n_vertices / max(g.n_vertices, 1):.1%}), "
+                f"|E| {g.n_edges} -> {r.n_edges} ({r.n_edges / max(g.n_edges, 1):.1%}), "
+                f"ściąganie: {self.build_s:.2f} s")
+
+    # --- zapytania ---
+    def _on(self, v: int) -> List[Tuple[int, int]]:
+        """[(edge_id super-krawędzi, pozycja)] dla ściągniętego wierzchołka v."""
+        return [(self.on_edge[k], self.on_pos[k]) for k in (2 * v, 2 * v + 1) if self.on_edge[k] >= 0]
+
+    def shortest_path(self, start_vertex_id: int, end_vertex_id: int, metric: str = "time",
+                      speed_kph: Dict[str, float] = SPEED_KPH) -> SearchResult:
+        """
+        Dijkstra na grafie zredukowanym; start/koniec mogą być ściągnięte (wejście / wyjście
+        w środku super-krawędzi). Wynik w oryginalnych wierzchołkach i edge_id.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Nieznana metryka: {metric}")
+        g, r = self.original, self.graph
+        w_orig = metric_weights(g, metric, speed_kph)
+        w = metric_weights(r, metric, speed_kph)
+        if start_vertex_id == end_vertex_id:
+            return SearchResult([start_vertex_id], [], 0.0, 1, 0)
+
+        # źródła: (wierzchołek grafu zredukowanego) -> (koszt, sloty oryginału przed nim)
+        roots: Dict[int, Tuple[float, List[int]]] = {}
+        # cele: wierzchołek zredukowany -> [(koszt dojścia do końca, sloty oryginału)]
+        goals: Dict[int, List[Tuple[float, List[int]]]] = {}
+        best, best_slots, best_at = INF, [], -1
+        if r.has_vertex(start_vertex_id):
+            roots[start_vertex_id] = (0.0, [])
+        else:
+            for eid, pos in self._on(start_vertex_id):
+                rest = list(self.edge_slots(eid)[pos + 1:])
+                c = sum(w_orig[s] for s in rest)
+                v = r.edge_to(eid)
+                if c < roots.get(v, (INF,))[0]:
+                    roots[v] = (c, rest)
+        if r.has_vertex(end_vertex_id):
+            goals[end_vertex_id] = [(0.0, [])]
+        else:
+            for eid, pos in self._on(end_vertex_id):
+                head = list(self.edge_slots(eid)[:pos + 1])
+                goals.setdefault(r.edge_from(eid), []).append((sum(w_orig[s] for s in head), head))
+                # start i koniec na tej samej super-krawędzi (start przed końcem)
+                for eid_s, pos_s in self._on(start_vertex_id):
+                    if eid_s == eid and pos_s < pos:
+                        mid = list(self.edge_slots(eid)[pos_s + 1:pos + 1])
+                        c = sum(w_orig[s] for s in mid)
+                        if c < best:
+                            best, best_slots, best_at = c, mid, -2
+
+        offsets, targets = r.offsets, r.targets
+        dist: Dict[int, float] = {}
+        pred: Dict[int, int] = {}                            # wierzchołek -> slot grafu zredukowanego
+        pq = []
+        for v, (c, _) in roots.items():
+            if c < INF:
+                dist[v] = c; heappush(pq, (c, v))
+        done = set()
+        neighbors_checked = 0
+        while pq:
+            d, u = heappop(pq)
+            if d >= best: break
+            if u in done: continue
+            done.add(u)
+            for c, tail in goals.get(u, ()):
+                if d + c < best:
+                    best, best_slots, best_at = d + c, tail, u
+            for s in range(offsets[u], offsets[u + 1]):
+                neighbors_checked += 1
+                nd = d + w[s]
+                v = targets[s]
+                if nd < dist.get(v, INF):
+                    dist[v] = nd; pred[v] = s; heappush(pq, (nd, v))
+
+        if best == INF:
+            return SearchResult([], [], INF, len(done), neighbors_checked)
+        if best_at == -2:                                     # w obrębie jednej super-krawędzi
+            slots = best_slots
+        else:
+            chain, cur = [], best_at
+            while cur in pred:                                # korzenie nie mają poprzednika
+                s = pred[cur]; chain.append(s); cur = r.sources[s]
+            chain.reverse()
+            slots = list(roots[cur][1])
+            for s in chain:
+                slots.extend(self.edge_slots(r.edge_ids[s]))
+            slots.extend(best_slots)
+        nodes = [start_vertex_id] + [g.targets[s] for s in slots]
+        return SearchResult(nodes, [g.edge_ids[s] for s in slots], best, len(done), neighbors_checked)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Ściąganie łańcuchów stopnia 2 - raport i porównanie zapytań")
+    ap.add_argument("snapshot", help="plik .pag2graph zapisany przez graph.py")
+    ap.add_argument("--queries", type=int, default=100)
+    ap.add_argument("--metric", choices=METRICS, default="time")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    graph = open_snapshot(args.snapshot)
+    cg = ChainGraph(graph)
+    print(f"[Łańcuchy] {cg.stats()}")
+
+    rnd = random.Random(args.seed)
+    vids = list(graph.vertex_ids())
+    pairs = [(rnd.choice(vids), rnd.choice(vids)) for _ in range(args.queries)]
+    search = routing.a_star_speed if args.metric == "time" else routing.a_star_length
+    t0 = time.perf_counter()
+    full = [search(graph, s, t) for s, t in pairs]
+    t_full = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    reduced = [cg.shortest_path(s, t, args.metric) for s, t in pairs]
+    t_red = time.perf_counter() - t0
+    diff = sum(1 for a, b in zip(full, reduced) if abs(a.cost - b.cost) > 1e-6 * max(1.0, a.cost)
+               and not (a.cost == INF and b.cost == INF))
+    print(f"[Łańcuchy] {len(pairs)} zapytań: A* pełny graf {t_full:.2f} s, "
+          f"Dijkstra graf zredukowany {t_red:.2f} s (x{t_full / t_red if t_red else 0.0:.1f}), "
+          f"różnych kosztów: {diff}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Silnie (SCC, Tarjan iteracyjnie) i słabo spójne składowe grafu po krawędziach przejezdnych.
+
+Etykiety trzymane są w grafie (CSRGraph.scc / .wcc) i w snapshocie; liczone przy
+zapisie snapshotu albo przy pierwszym zapytaniu. Tarjan numeruje SCC w odwrotnej
+kolejności topologicznej: jeśli z SCC A da się dojść do innej SCC B, to id(A) > id(B).
+Stąd test O(1) w routing: różne WCC albo scc[start] < scc[end] => brak ścieżki.
+
+Uruchomienie (bez arcpy) - statystyki składowych, opcjonalnie etykiety do CSV:
+    python components.py graf.pag2graph --csv skladowe.csv
+"""
+from array import array
+from collections import Counter
+from typing import List, NamedTuple, Optional, Sequence
+import argparse
+import csv
+
+from csr_graph import CSRGraph
+
+
+def strong_components(graph: CSRGraph) -> array:
+    """scc[v] (-1 = brak wierzchołka); numeracja w odwrotnej kolejności topologicznej."""
+    n = graph.max_vid + 1
+    offsets, targets, passable = graph.offsets, graph.targets, graph.passable
+    index = array("i", [-1]) * n
+    low = array("i", [0]) * n
+    on_stack = bytearray(n)
+    comp = array("i", [-1]) * n
+    stack: List[int] = []
+    counter = n_comp = 0
+    for root in graph.vertex_ids():
+        if index[root] >= 0: continue
+        index[root] = low[root] = counter; counter += 1
+        stack.append(root); on_stack[root] = 1
+        work = [(root, offsets[root])]
+        while work:
+            v, i = work[-1]
+            end = offsets[v + 1]
+            descended = False
+            while i < end:
+                s = i; i += 1
+                if not passable[s]: continue
+                w = targets[s]
+                if index[w] < 0:
+                    work[-1] = (v, i)
+                    index[w] = low[w] = counter; counter += 1
+                    stack.append(w); on_stack[w] = 1
+                    work.append((w, offsets[w]))
+                    descended = True
+                    break
+                if on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+            if descended: continue
+            work.pop()
+            if low[v] == index[v]:
+                while True:
+                    w = stack.pop(); on_stack[w] = 0; comp[w] = n_comp
+                    if w == v: break
+                n_comp += 1
+            if work:
+                u = work[-1][0]
+                if low[v] < low[u]: low[u] = low[v]
+    return comp
+
+
+def weak_components(graph: CSRGraph) -> array:
+    """wcc[v] (-1 = brak wierzchołka) - składowe po krawędziach przejezdnych bez kierunku."""
+    n = graph.max_vid + 1
+    offsets, targets, sources, passable = graph.offsets, graph.targets, graph.sources, graph.passable
+    in_offsets, in_slots = graph.in_offsets, graph.in_slots
+    comp = array("i", [-1]) * n
+    n_comp = 0
+    for root in graph.vertex_ids():
+        if comp[root] >= 0: continue
+        comp[root] = n_comp
+        todo = [root]
+        while todo:
+            u = todo.pop()
+            for s in range(offsets[u], offsets[u + 1]):
+                if passable[s] and comp[targets[s]] < 0:
+                    comp[targets[s]] = n_comp; todo.append(targets[s])
+            for i in range(in_offsets[u], in_offsets[u + 1]):
+                s = in_slots[i]
+                if passable[s] and comp[sources[s]] < 0:
+                    comp[sources[s]] = n_comp; todo.append(sources[s])
+        n_comp += 1
+    return comp
+
+
+def ensure_components(graph: CSRGraph) -> None:
+    """Liczy etykiety, jeśli graf (np. ze starego snapshotu) ich nie ma."""
+    if graph.scc is None:
+        graph.scc = strong_components(graph)
+    if graph.wcc is None:
+        graph.wcc = weak_components(graph)
+
+
+def maybe_reachable(graph: CSRGraph, start_vertex_id: int, end_vertex_id: int) -> bool:
+    """False = na pewno brak ścieżki (O(1)); True = trzeba szukać."""
+    if graph.scc is None:
+        ensure_components(graph)
+    scc, wcc = graph.scc, graph.wcc
+    return wcc[start_vertex_id] == wcc[end_vertex_id] and scc[start_vertex_id] >= scc[end_vertex_id]
+
+
+class ComponentStats(NamedTuple):
+    n_vertices: int
+    n_scc: int
+    largest_scc: int        # wierzchołków w największej SCC
+    n_wcc: int
+    largest_wcc: int
+    scc_singletons: int     # SCC z jednym wierzchołkiem (ślepe końce, pułapki jednokierunkowe)
+    isolated: int           # wierzchołki bez żadnej krawędzi przejezdnej
+
+
+def component_stats(graph: CSRGraph) -> ComponentStats:
+    ensure_components(graph)
+    vids = list(graph.vertex_ids())
+    scc_sizes = Counter(graph.scc[v] for v in vids)
+    wcc_sizes = Counter(graph.wcc[v] for v in vids)
+    return ComponentStats(len(vids), len(scc_sizes), max(scc_sizes.values(), default=0),
+                          len(wcc_sizes), max(wcc_sizes.values(), default=0),
+                          sum(1 for c in scc_sizes.values() if c == 1),
+                          sum(1 for c in wcc_sizes.values() if c == 1))
+
+
+def format_stats(st: ComponentStats) -> str:
+    outside = st.n_vertices - st.largest_scc
+    return (f"SCC: {st.n_scc} (największa: {st.largest_scc} wierzchołków, poza nią: {outside} = "
+            f"{outside / max(st.n_vertices, 1):.1%}, jednoelementowych: {st.scc_singletons}) || "
+            f"WCC: {st.n_wcc} (największa: {st.largest_wcc}, izolowanych wierzchołków: {st.isolated})")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    from graph_snapshot import open_snapshot
+    ap = argparse.ArgumentParser(description="Składowe spójności grafu (SCC / WCC)")
+    ap.add_argument("snapshot", help="plik .pag2graph zapisany przez graph.py")
+    ap.add_argument("--csv", help="etykiety wierzchołków: node_id, scc, wcc, rozmiary składowych")
+    args = ap.parse_args(argv)
+
+    graph = open_snapshot(args.snapshot)
+    print(f"[Składowe] {format_stats(component_stats(graph))}")
+    if args.csv:
+        vids = list(graph.vertex_ids())
+        scc_sizes = Counter(graph.scc[v] for v in vids)
+        wcc_sizes = Counter(graph.wcc[v] for v in vids)
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["node_id", "scc", "wcc", "scc_size", "wcc_size"])
+            for v in vids:
+                w.writerow([v, graph.scc[v], graph.wcc[v], scc_sizes[graph.scc[v]], wcc_sizes[graph.wcc[v]]])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Contraction Hierarchies (CH) dla metryki czasu przejazdu (length / speed(klasa_drogi)).
+
+Preprocessing: kolejność wierzchołków wg różnicy krawędzi (leniwa aktualizacja),
+skróty tworzone gdy lokalne wyszukiwanie świadka nie znajdzie krótszej drogi.
+Zapytanie: dwukierunkowy Dijkstra tylko "w górę" hierarchii (+ stall-on-demand).
+Skróty rozwijane są z powrotem do oryginalnych edge_id, więc wynik jest
+taki sam jak z routing.a_star_speed (SearchResult).
+"""
+from array import array
+from heapq import heappush, heappop
+from typing import Dict, List, Optional, Tuple
+import time
+
+from components import maybe_reachable
+from csr_graph import CSRGraph
+from graph_snapshot import open_array_file, write_array_file
+from priority_queues import exact_queue
+from routing import INF, SPEED_KPH, SearchResult, metric_weights
+from search_workspace import workspace_for
+
+WITNESS_SETTLE_LIMIT = 500      # limit wyszukiwania świadka przy kontrakcji
+SIMULATE_SETTLE_LIMIT = 60      # limit przy szacowaniu priorytetu
+
+_CH_ARRAYS = (
+    ("rank", "i"),
+    ("fwd_offsets", "q"), ("fwd_targets", "i"), ("fwd_weights", "d"), ("fwd_arcs", "i"),
+    ("bwd_offsets", "q"), ("bwd_targets", "i"), ("bwd_weights", "d"), ("bwd_arcs", "i"),
+    ("arc_eid", "i"), ("arc_first", "i"), ("arc_second", "i"),
+)
+
+
+class ContractionHierarchy:
+    """
+    Hierarchia gotowa do zapytań.
+    fwd_*: łuki u -> v z rank[v] > rank[u] (wyszukiwanie od startu),
+    bwd_*: łuki v -> u zapisane przy u, z rank[v] > rank[u] (wyszukiwanie od celu).
+    Łuk `a`: arc_eid[a] >= 0 -> oryginalna krawędź, inaczej skrót arc_first[a] + arc_second[a].
+    """
+
+    __slots__ = ("rank", "fwd_offsets", "fwd_targets", "fwd_weights", "fwd_arcs",
+                 "bwd_offsets", "bwd_targets", "bwd_weights", "bwd_arcs",
+                 "arc_eid", "arc_first", "arc_second", "n_shortcuts", "preprocess_s")
+
+    def __init__(self, rank, fwd_offsets, fwd_targets, fwd_weights, fwd_arcs,
+                 bwd_offsets, bwd_targets, bwd_weights, bwd_arcs,
+                 arc_eid, arc_first, arc_second, n_shortcuts: int, preprocess_s: float = 0.0):
+        self.rank = rank
+        self.fwd_offsets = fwd_offsets; self.fwd_targets = fwd_targets
+        self.fwd_weights = fwd_weights; self.fwd_arcs = fwd_arcs
+        self.bwd_offsets = bwd_offsets; self.bwd_targets = bwd_targets
+        self.bwd_weights = bwd_weights; self.bwd_arcs = bwd_arcs
+        self.arc_eid = arc_eid; self.arc_first = arc_first; self.arc_second = arc_second
+        self.n_shortcuts = n_shortcuts
+        self.preprocess_s = preprocess_s
+
+    def unpack_arc(self, arc: int) -> List[int]:
+        """Rozwija łuk (także skrót) do listy oryginalnych edge_id w kolejności trasy."""
+        out: List[int] = []
+        stack = [arc]
+        arc_eid, first, second = self.arc_eid, self.arc_first, self.arc_second
+        while stack:
+            a = stack.pop()
+            if arc_eid[a] >= 0:
+                out.append(arc_eid[a])
+            else:
+                stack.append(second[a]); stack.append(first[a])
+        return out
+
+
+def _witness_search(out_adj: List[Dict[int, Tuple[float, int]]], source: int, skip: int,
+                    max_cost: float, limit: int) -> Dict[int, float]:
+    """Lokalny Dijkstra od `source` z pominięciem `skip` (ograniczony kosztem i liczbą |S|)."""
+    dist = {source: 0.0}
+    pq = [(0.0, source)]
+    settled = 0
+    while pq and settled < limit:
+        d, u = heappop(pq)
+        if d > dist[u]: continue
+        if d > max_cost: break
+        settled += 1
+        for v, (w, _) in out_adj[u].items():
+            if v == skip: continue
+            nd = d + w
+            if nd < dist.get(v, INF):
+                dist[v] = nd; heappush(pq, (nd, v))
+    return dist
+
+
+def _shortcuts_for(out_adj, in_adj, v: int, limit: int) -> List[Tuple[int, int, float, int, int]]:
+    """Skróty (u, w, koszt, łuk u->v, łuk v->w) potrzebne po usunięciu v."""
+    outs = out_adj[v]
+    if not outs: return []
+    max_out = max(w for w, _ in outs.values())
+    result = []
+    for u, (w_uv, arc_uv) in in_adj[v].items():
+        max_cost = w_uv + max_out
+        dist = _witness_search(out_adj, u, v, max_cost, limit)
+        for w, (w_vw, arc_vw) in outs.items():
+            if w == u: continue
+            via = w_uv + w_vw
+            if dist.get(w, INF) > via:
+                result.append((u, w, via, arc_uv, arc_vw))
+    return result
+
+
+def build_ch(graph: CSRGraph, speed_kph: Dict[str, float] = SPEED_KPH) -> ContractionHierarchy:
+    """Preprocessing CH nad czasem przejazdu krawędzi przejezdnych grafu."""
+    t0 = time.perf_counter()
+    n = graph.max_vid + 1
+    weights = metric_weights(graph, "time", speed_kph)
+    out_adj: List[Dict[int, Tuple[float, int]]] = [dict() for _ in range(n)]
+    in_adj: List[Dict[int, Tuple[float, int]]] = [dict() for _ in range(n)]
+    arc_eid = array("i"); arc_first = array("i"); arc_second = array("i")
+
+    # łuki początkowe: krawędzie równoległe -> najtańsza (pierwsza przy remisie)
+    sources, targets, edge_ids = graph.sources, graph.targets, graph.edge_ids
+    for s in range(graph.n_edges):
+        w = weights[s]
+        if w == INF: continue
+        u, v = sources[s], targets[s]
+        if u == v: continue
+        old = out_adj[u].get(v)
+        if old is not None and old[0] <= w: continue
+        a = len(arc_eid)
+        arc_eid.append(edge_ids[s]); arc_first.append(-1); arc_second.append(-1)
+        out_adj[u][v] = (w, a); in_adj[v][u] = (w, a)
+
+    n_original_arcs = len(arc_eid)
+    deleted_neighbors = array("i", [0]) * n
+
+    def priority(v: int) -> int:
+        sc = _shortcuts_for(out_adj, in_adj, v, SIMULATE_SETTLE_LIMIT)
+        return len(sc) - len(out_adj[v]) - len(in_adj[v]) + deleted_neighbors[v]
+
+    pq: List[Tuple[int, int]] = [(priority(v), v) for v in graph.vertex_ids()]
+    pq.sort()
+    rank = array("i", [-1]) * n
+    up_out: List[List[Tuple[int, float, int]]] = [[] for _ in range(n)]
+    up_in: List[List[Tuple[int, float, int]]] = [[] for _ in range(n)]
+    next_rank = 0
+
+    while pq:
+        _, v = heappop(pq)
+        if rank[v] >= 0: continue
+        # leniwa aktualizacja priorytetu
+        p = priority(v)
+        if pq and p > pq[0][0]:
+            heappush(pq, (p, v)); continue
+
+        shortcuts = _shortcuts_for(out_adj, in_adj, v, WITNESS_SETTLE_LIMIT)
+        rank[v] = next_rank; next_rank += 1
+
+        # łuki do sąsiadów pozostają w hierarchii (sąsiedzi mają wyższą rangę)
+        for w, (c, a) in out_adj[v].items():
+            up_out[v].append((w, c, a))
+            del in_adj[w][v]
+            deleted_neighbors[w] += 1
+        for u, (c, a) in in_adj[v].items():
+            up_in[v].append((u, c, a))
+            del out_adj[u][v]
+            deleted_neighbors[u] += 1
+        out_adj[v] = {}; in_adj[v] = {}
+
+        for u, w, c, a1, a2 in shortcuts:
+            old = out_adj[u].get(w)
+            if old is not None and old[0] <= c: continue
+            a = len(arc_eid)
+            arc_eid.append(-1); arc_first.append(a1); arc_second.append(a2)
+            out_adj[u][w] = (c, a); in_adj[w][u] = (c, a)
+
+    def to_csr(lists):
+        offsets = array("q", [0]) * (n + 1)
+        tg = array("i"); wg = array("d"); ar = array("i")
+        for v in range(n):
+            for x, c, a in lists[v]:
+                tg.append(x); wg.append(c); ar.append(a)
+            offsets[v + 1] = len(tg)
+        return offsets, tg, wg, ar
+
+    fo, ft, fw, fa = to_csr(up_out)
+    bo, bt, bw, ba = to_csr(up_in)
+    return ContractionHierarchy(rank, fo, ft, fw, fa, bo, bt, bw, ba,
+                                arc_eid, arc_first, arc_second,
+                                len(arc_eid) - n_original_arcs, time.perf_counter() - t0)
+
+
+def ch_query(ch: ContractionHierarchy, graph: CSRGraph,
+             start_vertex_id: int, end_vertex_id: int, queue: str = "heapq") -> SearchResult:
+    """
+    Dwukierunkowe wyszukiwanie w górę hierarchii; koszt = czas [s].
+    `queue` - kolejka z dokładnym minimum (heapq / binary / 4ary z priority_queues.QUEUES).
+    """
+    ws = workspace_for(graph)
+    pqs = (exact_queue(ws, queue), exact_queue(ws, queue, backward=True))
+    if start_vertex_id == end_vertex_id:
+        return SearchResult([start_vertex_id], [], 0.0, 1, 0)
+    if not maybe_reachable(graph, start_vertex_id, end_vertex_id):
+        return SearchResult([], [], INF, 0, 0)
+    sides = (
+        (ch.fwd_offsets, ch.fwd_targets, ch.fwd_weights, ch.fwd_arcs,
+         ch.bwd_offsets, ch.bwd_targets, ch.bwd_weights),
+        (ch.bwd_offsets, ch.bwd_targets, ch.bwd_weights, ch.bwd_arcs,
+         ch.fwd_offsets, ch.fwd_targets, ch.fwd_weights),
+    )
+    label = ws.begin()
+    # w obu kierunkach: pred = wierzchołek niższej rangi, pred_edge = łuk CH (unpack_arc)
+    dist = (ws.fwd.dist, ws.bwd.dist)
+    stamp = (ws.fwd.stamp, ws.bwd.stamp)
+    pred = (ws.fwd.pred, ws.bwd.pred)
+    arc_of = (ws.fwd.pred_edge, ws.bwd.pred_edge)
+    dist[0][start_vertex_id] = 0.0; stamp[0][start_vertex_id] = label
+    dist[1][end_vertex_id] = 0.0; stamp[1][end_vertex_id] = label
+    pqs[0].push(0.0, start_vertex_id); pqs[1].push(0.0, end_vertex_id)
+    best = INF
+    meet = -1
+    settled = 0
+    neighbors_checked = 0
+
+    while True:
+        f_ok = len(pqs[0]) > 0 and pqs[0].min_key() < best
+        b_ok = len(pqs[1]) > 0 and pqs[1].min_key() < best
+        if not f_ok and not b_ok: break
+        side = 0 if f_ok and (not b_ok or pqs[0].min_key() <= pqs[1].min_key()) else 1
+        offsets, targets, weights, arcs, s_off, s_tg, s_w = sides[side]
+        d_here, d_other = dist[side], dist[1 - side]
+        st_here, st_other = stamp[side], stamp[1 - side]
+        pred_here, arc_here = pred[side], arc_of[side]
+
+        d, u = pqs[side].pop()
+        if d > d_here[u]: continue
+        settled += 1
+        if st_other[u] == label and d + d_other[u] < best:
+            best = d + d_other[u]; meet = u
+
+        # stall-on-demand: u osiągalny taniej przez wierzchołek wyższej rangi
+        stalled = False
+        for i in range(s_off[u], s_off[u + 1]):
+            x = s_tg[i]
+            if st_here[x] == label and d_here[x] + s_w[i] < d:
+                stalled = True; break
+        if stalled: continue
+
+        for i in range(offsets[u], offsets[u + 1]):
+            neighbors_checked += 1
+            v = targets[i]
+            nd = d + weights[i]
+            if nd < (d_here[v] if st_here[v] == label else INF):
+                d_here[v] = nd; pred_here[v] = u; arc_here[v] = arcs[i]; st_here[v] = label
+                pqs[side].push(nd, v)
+
+    if meet < 0:
+        return SearchResult([], [], INF, settled, neighbors_checked)
+
+    # łuki: start -> meet (forward) oraz meet -> cel (backward, łuki już skierowane do celu)
+    fwd_arcs: List[int] = []
+    cur = meet
+    while cur != start_vertex_id:
+        fwd_arcs.append(arc_of[0][cur]); cur = pred[0][cur]
+    fwd_arcs.reverse()
+    bwd_arcs: List[int] = []
+    cur = meet
+    while cur != end_vertex_id:
+        bwd_arcs.append(arc_of[1][cur]); cur = pred[1][cur]
+
+    eids: List[int] = []
+    for a in fwd_arcs + bwd_arcs:
+        eids.extend(ch.unpack_arc(a))
+    nodes = [start_vertex_id] + [graph.edge_to(eid) for eid in eids]
+    return SearchResult(nodes, eids, best, settled, neighbors_checked)
+
+
+def write_ch(ch: ContractionHierarchy, path: str, signature: bytes = b"") -> int:
+    return write_array_file(path, ((name, tc, getattr(ch, name)) for name, tc in _CH_ARRAYS),
+                            ch.n_shortcuts, signature)
+
+
+def open_ch(path: str, expected_signature: Optional[bytes] = None) -> Optional[ContractionHierarchy]:
+    """CH z pliku (mmap, zero-copy); None gdy brak albo nieaktualna."""
+    loaded = open_array_file(path, expected_signature)
+    if loaded is None:
+        return None
+    n_shortcuts, arrays = loaded
+    if any(name not in arrays for name, _ in _CH_ARRAYS):
+        return None
+    return ContractionHierarchy(n_shortcuts=n_shortcuts, **{name: arrays[name] for name, _ in _CH_ARRAYS})
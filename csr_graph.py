@@ -0,0 +1,273 @@
+from array import array
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+import math
+
+# Kody klas dróg (kolejność = indeks w tablicy `klasa`)
+KLASY: Tuple[str, ...] = ("A", "S", "GP", "G", "Z", "L", "D", "I")
+KLASA_IDX: Dict[str, int] = {k: i for i, k in enumerate(KLASY)}
+KLASA_DOMYSLNA = KLASA_IDX["G"]
+
+# Wiersz wejściowy budowy grafu (bez arcpy):
+# (jezdnia_oid, x1, y1, x2, y2, length_m, klasa_code, kier)
+RoadRow = Tuple[int, float, float, float, float, float, str, int]
+
+
+def _snap_key(x: float, y: float, tol: float) -> Tuple[int, int]:
+    return (round(x / tol), round(y / tol))
+
+#Kierunek (bezpiecznik) - ta sama semantyka co w route_finder.py
+def czy_dobry_kierunek(direction: int, id_from: int, id_to: int, current_vertex_id: int) -> bool:
+    if direction == 3: return False
+    if direction == 1: return current_vertex_id == id_from
+    if direction == 2: return current_vertex_id == id_to
+    return True
+
+
+class GraphChange(NamedTuple):
+    """Jedna aktualizacja grafu (graph_update.py) - dla cache i indeksów liczonych z grafu."""
+    version: int                    # wersja grafu po zmianie
+    added_edges: array              # 'i' edge_id
+    removed_edges: array            # 'i' edge_id
+    updated_edges: array            # 'i' edge_id - ten sam slot, inne atrybuty (długość, klasa, kier)
+    added_vertices: array           # 'i' vid
+    removed_vertices: array         # 'i' vid
+    slot_map: Optional[array]       # 'i' stary slot -> nowy (-1 = usunięty); None = sloty bez zmian
+
+
+class CSRGraph:
+    """
+    Graf w układzie CSR (compressed sparse row) na tablicach typowanych.
+
+    Krawędzie wychodzące z wierzchołka `vid` zajmują sloty
+    offsets[vid] .. offsets[vid + 1] - 1, w kolejności dodawania (rosnące edge_id),
+    więc przeszukiwanie odwiedza sąsiadów dokładnie tak jak lista `edge_out`.
+    Identyfikatory wierzchołków są indeksami tablic (slot 0 nieużywany).
+    """
+
+    __slots__ = ("xs", "ys", "offsets", "sources", "targets", "lengths", "klasa", "kier",
+                 "passable", "edge_ids", "jezdnia_oid", "edge_slot", "in_offsets", "in_slots",
+                 "n_vertices", "n_edges", "weights_cache", "scc", "wcc", "version", "changes",
+                 "workspace")
+
+    def __init__(self, xs: array, ys: array, offsets: array, sources: array, targets: array,
+                 lengths: array, klasa: array, kier: array, passable: bytearray,
+                 edge_ids: array, jezdnia_oid: array, edge_slot: array,
+                 in_offsets: array, in_slots: array, n_vertices: int,
+                 scc: Optional[array] = None, wcc: Optional[array] = None):
+        self.xs = xs                    # 'd' współrzędne wierzchołków (NaN = brak)
+        self.ys = ys
+        self.offsets = offsets          # 'q' len = max_vid + 2
+        self.sources = sources          # 'i' per slot
+        self.targets = targets          # 'i' per slot
+        self.lengths = lengths          # 'd' per slot [m]
+        self.klasa = klasa              # 'B' per slot, indeks w KLASY
+        self.kier = kier                # 'b' per slot
+        self.passable = passable        # per slot: wynik czy_dobry_kierunek
+        self.edge_ids = edge_ids        # 'i' per slot, oryginalny edge_id
+        self.jezdnia_oid = jezdnia_oid  # 'i' per slot
+        self.edge_slot = edge_slot      # 'i' edge_id -> slot (-1 = brak)
+        self.in_offsets = in_offsets    # 'q' krawędzie wchodzące do v: in_slots[in_offsets[v]:in_offsets[v+1]]
+        self.in_slots = in_slots        # 'i' sloty krawędzi u -> v (rosnąco)
+        self.n_vertices = n_vertices
+        self.n_edges = len(targets)
+        self.weights_cache: Dict[tuple, array] = {}   # (metryka, profil) -> wagi per slot (routing.metric_weights)
+        self.scc = scc                  # 'i' per wierzchołek: silnie spójna składowa (components.py), None = nie liczono
+        self.wcc = wcc                  # 'i' per wierzchołek: słabo spójna składowa
+        self.version = 0                # podbijana przy każdej aktualizacji (graph_update.py)
+        self.changes: List[GraphChange] = []
+        self.workspace = None           # search_workspace.SearchWorkspace - tablice stanu wyszukiwań
+
+    def changes_since(self, version: int) -> List[GraphChange]:
+        """Zmiany po wersji `version` (np. zapamiętanej przy budowie indeksu), od najstarszej."""
+        return [c for c in self.changes if c.version > version]
+
+    # --- wierzchołki ---
+    @property
+    def max_vid(self) -> int:
+        return len(self.xs) - 1
+
+    def has_vertex(self, vid: int) -> bool:
+        return 0 < vid < len(self.xs) and not math.isnan(self.xs[vid])
+
+    def vertex_ids(self) -> Iterator[int]:
+        xs = self.xs
+        return (vid for vid in range(1, len(xs)) if not math.isnan(xs[vid]))
+
+    def vertex_xy(self, vid: int) -> Tuple[float, float]:
+        return self.xs[vid], self.ys[vid]
+
+    def out_slots(self, vid: int) -> range:
+        return range(self.offsets[vid], self.offsets[vid + 1])
+
+    def in_edge_slots(self, vid: int):
+        return self.in_slots[self.in_offsets[vid]:self.in_offsets[vid + 1]]
+
+    # --- krawędzie (po oryginalnym edge_id) ---
+    def edge_ids_sorted(self) -> Iterator[int]:
+        es = self.edge_slot
+        return (eid for eid in range(1, len(es)) if es[eid] >= 0)
+
+    def slot_of(self, eid: int) -> int:
+        return self.edge_slot[eid]
+
+    def edge_from(self, eid: int) -> int:
+        return self.sources[self.edge_slot[eid]]
+
+    def edge_to(self, eid: int) -> int:
+        return self.targets[self.edge_slot[eid]]
+
+    def edge_length(self, eid: int) -> float:
+        return self.lengths[self.edge_slot[eid]]
+
+    def edge_klasa(self, eid: int) -> str:
+        return KLASY[self.klasa[self.edge_slot[eid]]]
+
+    def edge_record(self, eid: int) -> Tuple[int, int, float, str, int, int]:
+        """(id_from, id_to, length_m, klasa, kier, jezdnia_oid) - jak pola edges_out."""
+        s = self.edge_slot[eid]
+        return (self.sources[s], self.targets[s], self.lengths[s],
+                KLASY[self.klasa[s]], self.kier[s], self.jezdnia_oid[s])
+
+    def nbytes(self) -> int:
+        """Rozmiar tablic grafu w bajtach."""
+        total = len(self.passable)
+        for a in (self.xs, self.ys, self.offsets, self.sources, self.targets, self.lengths,
+                  self.klasa, self.kier, self.edge_ids, self.jezdnia_oid, self.edge_slot,
+                  self.in_offsets, self.in_slots):
+            total += a.itemsize * len(a)
+        return total
+
+
+class CSRGraphBuilder:
+    """Zbiera wierzchołki i krawędzie (np. z wierszy SearchCursor) i składa CSRGraph."""
+
+    def __init__(self):
+        self._vids = array("i")
+        self._vx = array("d")
+        self._vy = array("d")
+        self._eids = array("i")
+        self._src = array("i")
+        self._dst = array("i")
+        self._len = array("d")
+        self._klasa = array("B")
+        self._kier = array("b")
+        self._oid = array("i")
+
+    def add_vertex(self, vid: int, x: float, y: float) -> None:
+        self._vids.append(vid); self._vx.append(x); self._vy.append(y)
+
+    def add_edge(self, eid: int, id_from: int, id_to: int, length: float,
+                 klasa: Optional[str], kier: Optional[int], jezdnia_oid: Optional[int]) -> None:
+        self._eids.append(eid)
+        self._src.append(id_from)
+        self._dst.append(id_to)
+        self._len.append(float(length))
+        self._klasa.append(KLASA_IDX.get(klasa, KLASA_DOMYSLNA))
+        self._kier.append(int(kier) if kier is not None else 0)
+        self._oid.append(int(jezdnia_oid) if jezdnia_oid is not None else -1)
+
+    def build(self) -> CSRGraph:
+        max_vid = max(self._vids) if self._vids else 0
+        nan = float("nan")
+        xs = array("d", [nan]) * (max_vid + 1)
+        ys = array("d", [nan]) * (max_vid + 1)
+        for vid, x, y in zip(self._vids, self._vx, self._vy):
+            xs[vid] = x; ys[vid] = y
+
+        # sortowanie kubełkowe po wierzchołku źródłowym (stabilne -> kolejność edge_out)
+        m = len(self._eids)
+        offsets = array("q", [0]) * (max_vid + 2)
+        for u in self._src:
+            offsets[u + 1] += 1
+        for i in range(1, max_vid + 2):
+            offsets[i] += offsets[i - 1]
+        fill = array("q", offsets)
+
+        sources = array("i", [0]) * m
+        targets = array("i", [0]) * m
+        lengths = array("d", [0.0]) * m
+        klasa = array("B", [0]) * m
+        kier = array("b", [0]) * m
+        passable = bytearray(m)
+        edge_ids = array("i", [0]) * m
+        oids = array("i", [0]) * m
+        max_eid = max(self._eids) if m else 0
+        edge_slot = array("i", [-1]) * (max_eid + 1)
+
+        for i in range(m):
+            u = self._src[i]
+            s = fill[u]; fill[u] = s + 1
+            v = self._dst[i]
+            sources[s] = u; targets[s] = v
+            lengths[s] = self._len[i]
+            klasa[s] = self._klasa[i]
+            kier[s] = self._kier[i]
+            passable[s] = czy_dobry_kierunek(self._kier[i], u, v, u)
+            edge_ids[s] = self._eids[i]
+            oids[s] = self._oid[i]
+            edge_slot[self._eids[i]] = s
+
+        in_offsets, in_slots = reverse_index(targets, max_vid + 1)
+        return CSRGraph(xs, ys, offsets, sources, targets, lengths, klasa, kier,
+                        passable, edge_ids, oids, edge_slot, in_offsets, in_slots, len(self._vids))
+
+
+def build_graph_rows(rows: Iterable[RoadRow], snap_tol: float = 0.25) -> CSRGraph:
+    """
+    Buduje graf z wierszy jezdni (jak build_graph_from_fc): końce odcinków
+    sklejane po _snap_key, kierunkowość 0/1/2/3 -> krawędzie skierowane.
+    Numeracja wierzchołków i krawędzi identyczna jak w wersji słownikowej.
+    """
+    b = CSRGraphBuilder()
+    vertex_ids_by_snap: Dict[Tuple[int, int], int] = {}
+    next_vid = 1
+    next_eid = 1
+
+    for jezdnia_oid, x1, y1, x2, y2, length_m, klasa_code, kier in rows:
+        k1 = _snap_key(x1, y1, snap_tol)
+        k2 = _snap_key(x2, y2, snap_tol)
+
+        if k1 not in vertex_ids_by_snap:
+            vertex_ids_by_snap[k1] = next_vid
+            b.add_vertex(next_vid, x1, y1)
+            next_vid += 1
+        if k2 not in vertex_ids_by_snap:
+            vertex_ids_by_snap[k2] = next_vid
+            b.add_vertex(next_vid, x2, y2)
+            next_vid += 1
+
+        u = vertex_ids_by_snap[k1]
+        v = vertex_ids_by_snap[k2]
+
+        if kier == 3:
+            continue
+        elif kier == 1:
+            pairs = ((u, v),)
+        elif kier == 2:
+            pairs = ((v, u),)
+        else:
+            pairs = ((u, v), (v, u))
+        for a, c in pairs:
+            b.add_edge(next_eid, a, c, length_m, klasa_code, kier, jezdnia_oid)
+            next_eid += 1
+
+    return b.build()
+
+
+def reverse_index(targets: array, n: int) -> Tuple[array, array]:
+    """
+    Odwrotne sąsiedztwo (krawędzie wchodzące): dla wierzchołka v sloty
+    in_slots[in_offsets[v] .. in_offsets[v + 1] - 1] to krawędzie u -> v (rosnąco po slocie).
+    Przejezdność sprawdzana jest jak w przód - flagą `passable` slotu.
+    """
+    in_offsets = array("q", [0]) * (n + 1)
+    for v in targets:
+        in_offsets[v + 1] += 1
+    for i in range(1, n + 1):
+        in_offsets[i] += in_offsets[i - 1]
+    fill = array("q", in_offsets)
+    in_slots = array("i", [0]) * len(targets)
+    for s in range(len(targets)):
+        v = targets[s]
+        in_slots[fill[v]] = s; fill[v] += 1
+    return in_offsets, in_slots
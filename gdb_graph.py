@@ -0,0 +1,37 @@
+import arcpy
+from typing import Tuple
+
+from csr_graph import CSRGraph, CSRGraphBuilder
+from graph_snapshot import fc_signature, open_snapshot, snapshot_path_for, write_snapshot
+
+#Wczytujemy graf z GDB do tablic CSR (wolna ścieżka - dwa pełne SearchCursory)
+def load_graph_from_gdb(nodes_fc: str, edges_fc: str) -> CSRGraph:
+    builder = CSRGraphBuilder()
+    with arcpy.da.SearchCursor(nodes_fc, ["node_id", "SHAPE@XY"]) as cur:
+        for vid, (x, y) in cur:
+            builder.add_vertex(vid, x, y)
+
+    fields = ["edge_id", "id_from", "id_to", "length_m", "klasa", "kier", "jezdnia_oid"]
+    with arcpy.da.SearchCursor(edges_fc, fields) as cur:
+        for (eid, u, v, length, cls, kier, oid) in cur:
+            builder.add_edge(eid, u, v, length, cls, kier, oid)
+    return builder.build()
+
+#Snapshot z graph.py (mmap); brak lub nieaktualny -> kursory + przebudowa snapshotu
+def load_graph(nodes_fc: str, edges_fc: str) -> Tuple[CSRGraph, str, bytes]:
+    """Zwraca (graf, ścieżka snapshotu, podpis źródła) - dwa ostatnie kluczują dane pochodne (CH, ALT)."""
+    snap_path = snapshot_path_for(arcpy.Describe(edges_fc).catalogPath)
+    signature = fc_signature([nodes_fc, edges_fc])
+    g = open_snapshot(snap_path, signature)
+    if g is not None:
+        arcpy.AddMessage(f"[Snapshot] Wczytano graf z {snap_path}")
+        return g, snap_path, signature
+
+    arcpy.AddMessage("[Snapshot] Brak lub nieaktualny snapshot - wczytuję graf z GDB")
+    g = load_graph_from_gdb(nodes_fc, edges_fc)
+    try:
+        write_snapshot(g, snap_path, signature)
+        arcpy.AddMessage(f"[Snapshot] Zapisano nowy snapshot: {snap_path}")
+    except OSError as e:
+        arcpy.AddWarning(f"Nie udało się zapisać snapshotu grafu: {e}")
+    return g, snap_path, signature
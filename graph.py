@@ -1,13 +1,31 @@
-import arcpy
-from collections import defaultdict
-from typing import Dict, Tuple, Optional
-import math
-
-# --- Konfiguracja parametrów (pobierane z toolboxa) ---
-FC_ROADS = arcpy.GetParameterAsText(0)
-gdb_path = arcpy.GetParameterAsText(1)
+import multiprocessing
+import os
+import sys
+import time
+from typing import Iterable, Iterator, Optional, Tuple
+
+if __name__ != "__mp_main__":
+    # procesy puli (spawn) wykonują ten plik jako __mp_main__, a liczą wyłącznie tiled_build
+    # (numpy) - bez ładowania arcpy w każdym procesie; narzędzie i import modułu - z arcpy
+    import arcpy
+
+import numpy as np
+
+from bulk_build import RoadColumns, build_graph_columns, columns_from_points
+from components import component_stats, format_stats
+from csr_graph import CSRGraph, GraphChange, RoadRow, build_graph_rows
+from graph_export import write_gpkg
+from graph_snapshot import EDIT_DATE_FIELD, fc_signature, snapshot_path_for, write_snapshot
+from graph_update import update_gdb
+from segment_geometry import GEOMETRY_EXT, SegmentGeometry, write_geometry
+from tiled_build import build_graph_tiled
+
+# --- Konfiguracja parametrów (pobierane z toolboxa w bloku main) ---
+FC_ROADS = ""
+gdb_path = ""
 nodes_name = "nodes_out"
 edges_name = "edges_out"
+gpkg_out = ""                              # opcjonalny GeoPackage (eksport bez InsertCursor)
 
 # Pola (dostosuj jeśli w Twojej warstwie są inne nazwy)
 FIELD_OID    = "OBJECTID"
@@ -15,9 +33,16 @@ FIELD_SHAPE  = "SHAPE@"
 FIELD_CLASS  = "KLASA_DROG"
 FIELD_DIR_OPT = "kierunkowosc"
 
-# Słowniki wynikowe
-vertices: Dict[int, Dict] = {}
-edges: Dict[int, Dict] = {}
+# Budowa z kafli: procesy puli (parametr build_processes; domyślnie liczba rdzeni, 1 = sekwencyjnie)
+# i siatka kafli - graf identyczny. Mniejsze sieci zawsze sekwencyjnie (start puli droższy niż zysk).
+BUILD_PROCESSES = os.cpu_count() or 1
+BUILD_TILES = (4, 4)
+BUILD_TILED_MIN_ROWS = 200_000
+
+# Graf wynikowy (tablice CSR)
+graph: Optional[CSRGraph] = None
+# Pełna geometria odcinków (tylko przy budowie wsadowej)
+geometry: Optional[SegmentGeometry] = None
 
 def _map_klasa_bdot(klasa_txt: Optional[str]) -> str:
     if not klasa_txt: return "G"
@@ -32,19 +57,13 @@ def _map_klasa_bdot(klasa_txt: Optional[str]) -> str:
     if "inna" in s or "wewn" in s: return "I"
     return "G"
 
-def _snap_key(x: float, y: float, tol: float) -> Tuple[int, int]:
-    return (round(x / tol), round(y / tol))
-
-def build_graph_from_fc(fc: str, snap_tol: float = 0.25):
-    vertex_ids_by_snap = {}
-    next_vid = 1
-    next_eid = 1
-
+def read_road_rows(fc: str, where_clause: Optional[str] = None) -> Iterator[RoadRow]:
+    """Wiersze jezdni z SearchCursor -> (oid, x1, y1, x2, y2, length, klasa, kier)."""
     fld_names_lower = {f.name.lower() for f in arcpy.ListFields(fc)}
     has_dir = FIELD_DIR_OPT.lower() in fld_names_lower
     fields = [FIELD_OID, FIELD_SHAPE, FIELD_CLASS] + ([FIELD_DIR_OPT] if has_dir else [])
 
-    with arcpy.da.SearchCursor(fc, fields) as cur:
+    with arcpy.da.SearchCursor(fc, fields, where_clause) as cur:
         for row in cur:
             jezdnia_oid = int(row[0])
             geom = row[1]
@@ -56,53 +75,76 @@ def build_graph_from_fc(fc: str, snap_tol: float = 0.25):
             last_pt = geom.lastPoint
             if first_pt is None or last_pt is None: continue
 
-            x1, y1 = first_pt.X, first_pt.Y
-            x2, y2 = last_pt.X, last_pt.Y
-            length_m = float(geom.length)
-            klasa_code = _map_klasa_bdot(klasa_txt)
             kier = int(kier) if kier is not None else 0
-
-            k1 = _snap_key(x1, y1, snap_tol)
-            k2 = _snap_key(x2, y2, snap_tol)
-
-            if k1 not in vertex_ids_by_snap:
-                vertex_ids_by_snap[k1] = next_vid
-                vertices[next_vid] = {"x": x1, "y": y1, "edge_out": []}
-                next_vid += 1
-            if k2 not in vertex_ids_by_snap:
-                vertex_ids_by_snap[k2] = next_vid
-                vertices[next_vid] = {"x": x2, "y": y2, "edge_out": []}
-                next_vid += 1
-
-            u = vertex_ids_by_snap[k1]
-            v = vertex_ids_by_snap[k2]
-
-            def add_edge(u_id, v_id):
-                nonlocal next_eid
-                edges[next_eid] = {
-                    "id": next_eid,
-                    "id_from": u_id,
-                    "id_to": v_id,
-                    "edge_length_field": length_m,
-                    "kier_auto": kier,
-                    "klasa_drogi": klasa_code,
-                    "jezdnia_oid": jezdnia_oid
-                }
-                vertices[u_id]["edge_out"].append(next_eid)
-                next_eid += 1
-
-            if kier == 3:
-                continue
-            elif kier == 0:
-                add_edge(u, v); add_edge(v, u)
-            elif kier == 1:
-                add_edge(u, v)
-            elif kier == 2:
-                add_edge(v, u)
-            else:
-                add_edge(u, v); add_edge(v, u)
-
-    return len(vertices), len(edges)
+            yield (jezdnia_oid, first_pt.X, first_pt.Y, last_pt.X, last_pt.Y,
+                   float(geom.length), _map_klasa_bdot(klasa_txt), kier)
+
+def read_road_columns(fc: str) -> Tuple[RoadColumns, SegmentGeometry]:
+    """
+    Te same odcinki co read_road_rows, ale hurtem: punkty linii z FeatureClassToNumPyArray.
+    Z tych samych punktów pełna geometria odcinków (do eksportu GeoPackage / Parquet).
+    """
+    fld_names_lower = {f.name.lower() for f in arcpy.ListFields(fc)}
+    has_dir = FIELD_DIR_OPT.lower() in fld_names_lower
+    fields = [FIELD_OID, "SHAPE@X", "SHAPE@Y", "SHAPE@LENGTH", FIELD_CLASS] + ([FIELD_DIR_OPT] if has_dir else [])
+    nulls = {FIELD_CLASS: "", **({FIELD_DIR_OPT: 0} if has_dir else {})}
+
+    pts = arcpy.da.FeatureClassToNumPyArray(fc, fields, explode_to_points=True, null_value=nulls)
+    kier = pts[FIELD_DIR_OPT] if has_dir else np.zeros(len(pts), np.int8)
+    cols = columns_from_points(pts[FIELD_OID], pts["SHAPE@X"], pts["SHAPE@Y"], pts["SHAPE@LENGTH"],
+                               pts[FIELD_CLASS], kier, _map_klasa_bdot)
+    return cols, SegmentGeometry.from_points(pts[FIELD_OID], pts["SHAPE@X"], pts["SHAPE@Y"])
+
+def build_graph_from_fc(fc: str, snap_tol: float = 0.25, batched: bool = True,
+                        processes: Optional[int] = None):
+    """
+    batched=False - stara pętla po wierszach (ten sam graf, do porównania czasu budowy).
+    processes (domyślnie BUILD_PROCESSES) > 1 - fragmenty CSR kafli BUILD_TILES w puli procesów
+    (tiled_build; procesy nie ładują arcpy), dla sieci od BUILD_TILED_MIN_ROWS odcinków.
+    """
+    global graph, geometry
+    if processes is None:
+        processes = BUILD_PROCESSES
+    if batched:
+        cols, geometry = read_road_columns(fc)
+        if processes > 1 and len(cols.oid) >= BUILD_TILED_MIN_ROWS:
+            # w ArcGIS Pro sys.executable to ArcGISPro.exe - procesy puli muszą startować z python.exe
+            multiprocessing.set_executable(os.path.join(sys.exec_prefix, "python.exe"))
+            arcpy.AddMessage(f"[BUILD] Kafle {BUILD_TILES[0]}x{BUILD_TILES[1]}, procesów: {processes}")
+            graph = build_graph_tiled(cols, snap_tol, BUILD_TILES, processes)
+        else:
+            graph = build_graph_columns(cols, snap_tol)
+    else:
+        graph = build_graph_rows(read_road_rows(fc), snap_tol)
+        geometry = None
+    return graph.n_vertices, graph.n_edges
+
+def update_graph_from_fc(fc: str, nodes_fc: str, edges_fc: str, changed_oids: Iterable[int],
+                         deleted_oids: Iterable[int] = (), snap_tol: float = 0.25) -> GraphChange:
+    """
+    Aktualizacja grafu wyeksportowanego do `nodes_fc` / `edges_fc` po edycji kilku odcinków jezdni:
+    czyta z `fc` tylko wiersze `changed_oids` (wstawione albo zmienione; oid, którego już nie ma
+    w warstwie, jest usuwany) i usuwa odcinki `deleted_oids` - bez czytania całej warstwy.
+    Zmiany trafiają do klas GDB i do snapshotu (graph_update.update_gdb). Geometria odcinków
+    (<snapshot>.geom, eksport GeoPackage) nie jest aktualizowana.
+    """
+    oids = sorted({int(o) for o in changed_oids})
+    rows = []
+    for i in range(0, len(oids), 1000):          # IN (...) w paczkach - limit długości zapytania
+        where = f"{FIELD_OID} IN ({','.join(map(str, oids[i:i + 1000]))})"
+        rows.extend(read_road_rows(fc, where))
+    deleted = {int(o) for o in deleted_oids} | (set(oids) - {r[0] for r in rows})
+    change = update_gdb(nodes_fc, edges_fc, updated=rows, deleted=deleted, snap_tol=snap_tol)
+    arcpy.AddMessage(f"[UPDATE] wersja {change.version}: +{len(change.added_edges)} / -{len(change.removed_edges)} / "
+                     f"~{len(change.updated_edges)} krawędzi, +{len(change.added_vertices)} / "
+                     f"-{len(change.removed_vertices)} wierzchołków")
+    return change
+
+def enable_edit_tracking(fc: str) -> None:
+    """Editor tracking z samą datą ostatniej edycji (EDIT_DATE_FIELD) i indeks na niej."""
+    if EDIT_DATE_FIELD.lower() not in {f.name.lower() for f in arcpy.ListFields(fc)}:
+        arcpy.management.EnableEditorTracking(fc, last_edit_date_field=EDIT_DATE_FIELD, add_fields="ADD_FIELDS")
+        arcpy.management.AddIndex(fc, EDIT_DATE_FIELD, f"{os.path.basename(fc)}_edited_idx")
 
 def export_graph_to_gdb(gdb_path: str, nodes_name: str = "nodes_out", edges_name: str = "edges_out"):
     sr = arcpy.Describe(FC_ROADS).spatialReference
@@ -115,10 +157,16 @@ def export_graph_to_gdb(gdb_path: str, nodes_name: str = "nodes_out", edges_name
 
     arcpy.management.CreateFeatureclass(gdb_path, nodes_name, "POINT", spatial_reference=sr)
     arcpy.management.AddField(nodes_fc, "node_id", "LONG")
-    with arcpy.da.InsertCursor(nodes_fc, ["SHAPE@XY", "node_id"]) as icur:
-        for vid, v in vertices.items():
-            icur.insertRow(((v["x"], v["y"]), vid))
-    arcpy.AddMessage(f"[EXPORT] Zapisano {len(vertices)} węzłów do {nodes_fc}")
+    arcpy.management.AddField(nodes_fc, "scc", "LONG")
+    arcpy.management.AddField(nodes_fc, "wcc", "LONG")
+    stats = component_stats(graph)
+    t0 = time.perf_counter()
+    with arcpy.da.InsertCursor(nodes_fc, ["SHAPE@XY", "node_id", "scc", "wcc"]) as icur:
+        for vid in graph.vertex_ids():
+            icur.insertRow((graph.vertex_xy(vid), vid, graph.scc[vid], graph.wcc[vid]))
+    t_nodes = time.perf_counter() - t0
+    arcpy.AddMessage(f"[EXPORT] Zapisano {graph.n_vertices} węzłów do {nodes_fc} ({t_nodes:.2f} s)")
+    arcpy.AddMessage(f"[EXPORT] {format_stats(stats)}")
 
     arcpy.management.CreateFeatureclass(gdb_path, edges_name, "POLYLINE", spatial_reference=sr)
     arcpy.management.AddField(edges_fc, "edge_id", "LONG")
@@ -129,15 +177,50 @@ def export_graph_to_gdb(gdb_path: str, nodes_name: str = "nodes_out", edges_name
     arcpy.management.AddField(edges_fc, "kier", "SHORT")
     arcpy.management.AddField(edges_fc, "jezdnia_oid", "LONG")
 
+    t0 = time.perf_counter()
     with arcpy.da.InsertCursor(edges_fc,
         ["SHAPE@", "edge_id", "id_from", "id_to", "length_m", "klasa", "kier", "jezdnia_oid"]) as icur:
-        for eid, e in edges.items():
-            u = vertices[e["id_from"]]; v = vertices[e["id_to"]]
-            arr = arcpy.Array([arcpy.Point(u["x"], u["y"]), arcpy.Point(v["x"], v["y"])])
+        for eid in graph.edge_ids_sorted():
+            id_from, id_to, length_m, klasa, kier, jezdnia_oid = graph.edge_record(eid)
+            (x1, y1), (x2, y2) = graph.vertex_xy(id_from), graph.vertex_xy(id_to)
+            arr = arcpy.Array([arcpy.Point(x1, y1), arcpy.Point(x2, y2)])
             poly = arcpy.Polyline(arr, sr)
-            icur.insertRow((poly, eid, e["id_from"], e["id_to"],
-                            e["edge_length_field"], e["klasa_drogi"], e["kier_auto"], e.get("jezdnia_oid", None)))
-    arcpy.AddMessage(f"[EXPORT] Zapisano {len(edges)} krawędzi do {edges_fc}")
+            icur.insertRow((poly, eid, id_from, id_to, length_m, klasa, kier, jezdnia_oid))
+    t_edges = time.perf_counter() - t0
+    cursor_rate = (graph.n_vertices + graph.n_edges) / max(t_nodes + t_edges, 1e-9)
+    arcpy.AddMessage(f"[EXPORT] Zapisano {graph.n_edges} krawędzi do {edges_fc} ({t_edges:.2f} s) || "
+                     f"InsertCursor: {cursor_rate:,.0f} wierszy/s")
+
+    # data ostatniej edycji w obu klasach - route_finder sprawdza aktualność snapshotu jednym
+    # wierszem zamiast czytać całe klasy (graph_snapshot.fc_signature)
+    for fc in (nodes_fc, edges_fc):
+        try:
+            enable_edit_tracking(fc)
+        except arcpy.ExecuteError as e:
+            arcpy.AddWarning(f"Bez editor tracking w {fc} (sprawdzanie snapshotu czyta całą klasę): {e}")
+
+    # snapshot binarny dla route_finder.py (podpis liczony po zapisie klas)
+    snap_path = snapshot_path_for(edges_fc)
+    try:
+        sig = fc_signature([nodes_fc, edges_fc])
+        size = write_snapshot(graph, snap_path, sig)
+        arcpy.AddMessage(f"[EXPORT] Snapshot grafu ({size / 1e6:.1f} MB): {snap_path}")
+        if geometry is not None:
+            size = write_geometry(geometry, snap_path + GEOMETRY_EXT, sig)
+            arcpy.AddMessage(f"[EXPORT] Geometria odcinków ({size / 1e6:.1f} MB): {snap_path + GEOMETRY_EXT}")
+    except OSError as e:
+        arcpy.AddWarning(f"Nie udało się zapisać snapshotu grafu: {e}")
+
+    # GeoPackage z pełną geometrią odcinków - sqlite3, bez obiektów geometrii arcpy
+    if gpkg_out:
+        t0 = time.perf_counter()
+        n_nodes, n_edges = write_gpkg(graph, gpkg_out, geometry, sr.factoryCode or 0,
+                                      sr.exportToString().split(";")[0], nodes_name, edges_name)
+        dt = time.perf_counter() - t0
+        arcpy.AddMessage(f"[EXPORT] GeoPackage: {n_nodes} węzłów + {n_edges} krawędzi w {dt:.2f} s = "
+                         f"{(n_nodes + n_edges) / max(dt, 1e-9):,.0f} wierszy/s "
+                         f"(InsertCursor: {cursor_rate:,.0f}) -> {gpkg_out}")
+        arcpy.SetParameterAsText(4, gpkg_out)
 
     # ustaw outputy toola (indeksy: 2 i 3, zgodnie z parametrami narzędzia)
     arcpy.SetParameterAsText(2, nodes_fc)
@@ -160,6 +243,11 @@ def export_graph_to_gdb(gdb_path: str, nodes_name: str = "nodes_out", edges_name
 
 # --- main ---
 if __name__ == "__main__":
+    FC_ROADS = arcpy.GetParameterAsText(0)
+    gdb_path = arcpy.GetParameterAsText(1)
+    gpkg_out = arcpy.GetParameterAsText(4)
+    BUILD_PROCESSES = int(arcpy.GetParameterAsText(5) or BUILD_PROCESSES)
+    t0 = time.perf_counter()
     nV, nE = build_graph_from_fc(FC_ROADS)
-    arcpy.AddMessage(f"Graph built: |V|={nV}, |E|={nE}")
+    arcpy.AddMessage(f"Graph built: |V|={nV}, |E|={nE} ({time.perf_counter() - t0:.2f} s)")
     export_graph_to_gdb(gdb_path, nodes_name, edges_name)
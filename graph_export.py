@@ -0,0 +1,276 @@
+"""
+Eksport grafu bez arcpy: GeoPackage (sqlite3) albo Parquet (pyarrow, GeoParquet z WKB).
+
+Wiersze generowane strumieniowo i zapisywane paczkami (executemany w jednej transakcji /
+ParquetWriter.write_table per paczka) - bez obiektu geometrii per wiersz jak przy InsertCursor.
+Krawędzie dostają pełną geometrię odcinka z SegmentGeometry (odwróconą dla krawędzi przeciwnych
+do kierunku digitalizacji); bez niej - linia prosta między węzłami jak w export_graph_to_gdb.
+
+Uruchomienie (bez arcpy):
+    python graph_export.py graf.pag2graph graf.gpkg --epsg 2180
+    python graph_export.py graf.pag2graph graf --format parquet     (graf_nodes.parquet, graf_edges.parquet)
+Geometria brana z <snapshot>.geom, jeśli istnieje (zapisuje go graph.py).
+"""
+from typing import Iterator, List, Optional, Sequence, Tuple
+import argparse
+import json
+import os
+import sqlite3
+import struct
+import time
+
+import numpy as np
+
+from csr_graph import KLASY, CSRGraph
+from components import ensure_components
+from graph_snapshot import open_snapshot
+from segment_geometry import GEOMETRY_EXT, SegmentGeometry, open_geometry, wkb_point
+
+FORMATS = ("gpkg", "parquet")
+BATCH = 50_000
+
+_LINE_HEAD = struct.Struct("<BII")
+_GPKG_HEAD = struct.Struct("<2sBBi")              # "GP", wersja, flagi (LE, bez obwiedni), srs_id
+
+NodeRow = Tuple[int, bytes, int, int]             # node_id, WKB, scc, wcc
+EdgeRow = Tuple[int, bytes, int, int, float, str, int, int]
+
+
+def node_rows(graph: CSRGraph) -> Iterator[NodeRow]:
+    ensure_components(graph)
+    xs, ys, scc, wcc = graph.xs, graph.ys, graph.scc, graph.wcc
+    for vid in graph.vertex_ids():
+        yield vid, wkb_point(xs[vid], ys[vid]), scc[vid], wcc[vid]
+
+
+def _edge_wkb(graph: CSRGraph, slots: np.ndarray, geometry: Optional[SegmentGeometry],
+              gi: Optional[np.ndarray]) -> List[bytes]:
+    """WKB linii dla paczki slotów: współrzędne całej paczki zbierane jednym indeksowaniem numpy."""
+    xs, ys = np.frombuffer(graph.xs, np.float64), np.frombuffer(graph.ys, np.float64)
+    u = np.frombuffer(graph.sources, np.int32)[slots]
+    v = np.frombuffer(graph.targets, np.int32)[slots]
+    m = len(slots)
+    if gi is None:
+        start = npts = np.zeros(m, np.int64)
+    else:
+        g = gi[slots]
+        offsets = np.frombuffer(geometry.offsets, np.int64)
+        start = np.where(g >= 0, offsets[g.clip(0)], 0)
+        npts = np.where(g >= 0, offsets[g.clip(0) + 1] - start, 0)
+    full = npts >= 2
+    npts = np.where(full, npts, 2)
+
+    # punkt j krawędzi: z geometrii (od końca, gdy pierwszy punkt bliżej węzła końcowego) albo z węzłów
+    edge = np.repeat(np.arange(m), npts)
+    first = np.cumsum(npts) - npts
+    j = np.arange(len(edge)) - first[edge]
+    xy = np.empty((len(edge), 2))
+    if full.any():
+        q2 = np.frombuffer(geometry.qxy, np.int32).reshape(-1, 2)
+        origin = np.array([geometry.origin_x, geometry.origin_y])
+        head, tail = q2[start] * geometry.resolution + origin, q2[start + npts - 1] * geometry.resolution + origin
+        d_head = (head[:, 0] - xs[u]) ** 2 + (head[:, 1] - ys[u]) ** 2
+        d_tail = (tail[:, 0] - xs[u]) ** 2 + (tail[:, 1] - ys[u]) ** 2
+        rev = d_head > d_tail
+        sel = full[edge]
+        e = edge[sel]
+        pos = start[e] + np.where(rev[e], npts[e] - 1 - j[sel], j[sel])
+        xy[sel] = q2[pos] * geometry.resolution + origin
+    sel = ~full[edge]
+    e = edge[sel]
+    end = j[sel] == 1
+    xy[sel, 0] = np.where(end, xs[v[e]], xs[u[e]])
+    xy[sel, 1] = np.where(end, ys[v[e]], ys[u[e]])
+
+    buf = xy.astype("<f8").tobytes()
+    bounds = (np.append(first, len(edge)) * 16).tolist()
+    pack = _LINE_HEAD.pack
+    return [pack(1, 2, n) + buf[bounds[i]:bounds[i + 1]] for i, n in enumerate(npts.tolist())]
+
+
+def edge_rows(graph: CSRGraph, geometry: Optional[SegmentGeometry] = None,
+              batch: int = BATCH) -> Iterator[EdgeRow]:
+    """Krawędzie rosnąco po edge_id, pola jak edges_out; WKB linii w kierunku krawędzi."""
+    lengths, klasa, kier, oids = graph.lengths, graph.klasa, graph.kier, graph.jezdnia_oid
+    gi = None
+    if geometry is not None and len(geometry):
+        goids = np.frombuffer(geometry.oids, np.int32)
+        slot_oids = np.frombuffer(oids, np.int32)
+        gi = np.searchsorted(goids, slot_oids).clip(0, len(goids) - 1)
+        gi = np.where(goids[gi] == slot_oids, gi, -1)
+    edge_slot = np.frombuffer(graph.edge_slot, np.int32)
+    eids = np.flatnonzero(edge_slot[1:] >= 0) + 1
+    sources, targets = graph.sources, graph.targets
+    for i in range(0, len(eids), batch):
+        chunk = eids[i:i + batch]
+        slots = edge_slot[chunk]
+        wkbs = _edge_wkb(graph, slots, geometry, gi)
+        for eid, s, wkb in zip(chunk.tolist(), slots.tolist(), wkbs):
+            yield eid, wkb, sources[s], targets[s], lengths[s], KLASY[klasa[s]], kier[s], oids[s]
+
+
+def _batches(rows: Iterator, size: int = BATCH) -> Iterator[List]:
+    batch = []
+    for r in rows:
+        batch.append(r)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _extent(graph: CSRGraph) -> Tuple[float, float, float, float]:
+    xs = np.frombuffer(graph.xs, np.float64)[1:]
+    ys = np.frombuffer(graph.ys, np.float64)[1:]
+    if not len(xs) or np.isnan(xs).all():
+        return 0.0, 0.0, 0.0, 0.0
+    return float(np.nanmin(xs)), float(np.nanmin(ys)), float(np.nanmax(xs)), float(np.nanmax(ys))
+
+
+# --- GeoPackage ---
+_WGS84_WKT = ('GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.257223563]],'
+              'PRIMEM["Greenwich",0],UNIT["degree",0.0174532925199433],AUTHORITY["EPSG","4326"]]')
+
+_GPKG_SCHEMA = """
+CREATE TABLE gpkg_spatial_ref_sys (srs_name TEXT NOT NULL, srs_id INTEGER PRIMARY KEY,
+    organization TEXT NOT NULL, organization_coordsys_id INTEGER NOT NULL, definition TEXT NOT NULL,
+    description TEXT);
+CREATE TABLE gpkg_contents (table_name TEXT NOT NULL PRIMARY KEY, data_type TEXT NOT NULL,
+    identifier TEXT UNIQUE, description TEXT DEFAULT '',
+    last_change DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')),
+    min_x DOUBLE, min_y DOUBLE, max_x DOUBLE, max_y DOUBLE, srs_id INTEGER,
+    FOREIGN KEY (srs_id) REFERENCES gpkg_spatial_ref_sys(srs_id));
+CREATE TABLE gpkg_geometry_columns (table_name TEXT NOT NULL, column_name TEXT NOT NULL,
+    geometry_type_name TEXT NOT NULL, srs_id INTEGER NOT NULL, z TINYINT NOT NULL, m TINYINT NOT NULL,
+    PRIMARY KEY (table_name, column_name),
+    FOREIGN KEY (table_name) REFERENCES gpkg_contents(table_name),
+    FOREIGN KEY (srs_id) REFERENCES gpkg_spatial_ref_sys(srs_id));
+CREATE TABLE {nodes} (fid INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL, geom POINT,
+    node_id INTEGER, scc INTEGER, wcc INTEGER);
+CREATE TABLE {edges} (fid INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL, geom LINESTRING,
+    edge_id INTEGER, id_from INTEGER, id_to INTEGER, length_m DOUBLE, klasa TEXT, kier INTEGER,
+    jezdnia_oid INTEGER);
+"""
+
+
+def write_gpkg(graph: CSRGraph, path: str, geometry: Optional[SegmentGeometry] = None,
+               epsg: int = 0, srs_wkt: str = "", nodes_name: str = "nodes_out",
+               edges_name: str = "edges_out") -> Tuple[int, int]:
+    """
+    GeoPackage 1.3 z warstwami węzłów i krawędzi (nadpisuje plik). `srs_wkt` - definicja układu
+    (np. arcpy SpatialReference.exportToString()); bez niej zapisywany jest sam kod EPSG.
+    Bez indeksu przestrzennego - ArcGIS / QGIS budują go przy pierwszym użyciu. Zwraca (|V|, |E|).
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    gp_head = _GPKG_HEAD.pack(b"GP", 0, 0x01, epsg)
+    con = sqlite3.connect(path, isolation_level=None)
+    try:
+        con.execute("PRAGMA application_id = 1196444487")    # 'GPKG'
+        con.execute("PRAGMA user_version = 10300")
+        con.execute("PRAGMA journal_mode = OFF")
+        con.execute("PRAGMA synchronous = OFF")
+        con.executescript("BEGIN;" + _GPKG_SCHEMA.format(nodes=nodes_name, edges=edges_name))
+        con.executemany("INSERT INTO gpkg_spatial_ref_sys VALUES (?, ?, ?, ?, ?, ?)", [
+            ("Undefined cartesian SRS", -1, "NONE", -1, "undefined", None),
+            ("Undefined geographic SRS", 0, "NONE", 0, "undefined", None),
+            ("WGS 84 geodetic", 4326, "EPSG", 4326, _WGS84_WKT, None)])
+        if epsg not in (-1, 0, 4326):
+            con.execute("INSERT INTO gpkg_spatial_ref_sys VALUES (?, ?, 'EPSG', ?, ?, NULL)",
+                        (f"EPSG:{epsg}", epsg, epsg, srs_wkt or "undefined"))
+        ext = _extent(graph)
+        for name, kind in ((nodes_name, "POINT"), (edges_name, "LINESTRING")):
+            con.execute("INSERT INTO gpkg_contents (table_name, data_type, identifier, min_x, min_y, max_x, max_y, "
+                        "srs_id) VALUES (?, 'features', ?, ?, ?, ?, ?, ?)", (name, name, *ext, epsg))
+            con.execute("INSERT INTO gpkg_geometry_columns VALUES (?, 'geom', ?, ?, 0, 0)", (name, kind, epsg))
+
+        n_nodes = n_edges = 0
+        sql = f"INSERT INTO {nodes_name} (fid, geom, node_id, scc, wcc) VALUES (?, ?, ?, ?, ?)"
+        for batch in _batches(node_rows(graph)):
+            con.executemany(sql, [(vid, gp_head + wkb, vid, c, w) for vid, wkb, c, w in batch])
+            n_nodes += len(batch)
+        sql = (f"INSERT INTO {edges_name} (fid, geom, edge_id, id_from, id_to, length_m, klasa, kier, "
+               f"jezdnia_oid) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+        for batch in _batches(edge_rows(graph, geometry)):
+            con.executemany(sql, [(r[0], gp_head + r[1], r[0], *r[2:]) for r in batch])
+            n_edges += len(batch)
+        con.execute("COMMIT")
+    finally:
+        con.close()
+    return n_nodes, n_edges
+
+
+# --- Parquet (pyarrow opcjonalny) ---
+def write_parquet(graph: CSRGraph, prefix: str, geometry: Optional[SegmentGeometry] = None,
+                  epsg: int = 0) -> Tuple[int, int]:
+    """<prefix>_nodes.parquet i <prefix>_edges.parquet (GeoParquet 1.0, kolumna `geometry` w WKB)."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Eksport do Parquet wymaga pakietu pyarrow (pip install pyarrow)") from None
+
+    def geo_meta(kind: str) -> bytes:
+        crs = {"id": {"authority": "EPSG", "code": epsg}} if epsg > 0 else None
+        return json.dumps({"version": "1.0.0", "primary_column": "geometry",
+                           "columns": {"geometry": {"encoding": "WKB", "geometry_types": [kind],
+                                                    "crs": crs}}}).encode("utf-8")
+
+    def write(path: str, schema, names: Sequence[str], rows: Iterator) -> int:
+        n = 0
+        with pq.ParquetWriter(path, schema) as w:
+            for batch in _batches(rows, 4 * BATCH):
+                cols = list(zip(*batch))
+                w.write_table(pa.Table.from_arrays([pa.array(c, type=schema.field(k).type)
+                                                    for k, c in zip(names, cols)], schema=schema))
+                n += len(batch)
+        return n
+
+    node_names = ("node_id", "geometry", "scc", "wcc")
+    node_schema = pa.schema([("node_id", pa.int32()), ("geometry", pa.binary()), ("scc", pa.int32()),
+                             ("wcc", pa.int32())], metadata={b"geo": geo_meta("Point")})
+    edge_names = ("edge_id", "geometry", "id_from", "id_to", "length_m", "klasa", "kier", "jezdnia_oid")
+    edge_schema = pa.schema([("edge_id", pa.int32()), ("geometry", pa.binary()), ("id_from", pa.int32()),
+                             ("id_to", pa.int32()), ("length_m", pa.float64()), ("klasa", pa.string()),
+                             ("kier", pa.int8()), ("jezdnia_oid", pa.int32())],
+                            metadata={b"geo": geo_meta("LineString")})
+    n_nodes = write(f"{prefix}_nodes.parquet", node_schema, node_names, node_rows(graph))
+    n_edges = write(f"{prefix}_edges.parquet", edge_schema, edge_names, edge_rows(graph, geometry))
+    return n_nodes, n_edges
+
+
+def export(graph: CSRGraph, out: str, fmt: str = "gpkg", geometry: Optional[SegmentGeometry] = None,
+           epsg: int = 0, srs_wkt: str = "") -> Tuple[int, int, float]:
+    """(|V|, |E|, czas [s]) zapisu w formacie `fmt`."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Nieznany format eksportu: {fmt}")
+    t0 = time.perf_counter()
+    if fmt == "gpkg":
+        n_nodes, n_edges = write_gpkg(graph, out, geometry, epsg, srs_wkt)
+    else:
+        n_nodes, n_edges = write_parquet(graph, out, geometry, epsg)
+    return n_nodes, n_edges, time.perf_counter() - t0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Eksport grafu do GeoPackage / Parquet (bez arcpy)")
+    ap.add_argument("snapshot", help="plik .pag2graph zapisany przez graph.py")
+    ap.add_argument("out", help="plik .gpkg albo prefiks plików .parquet")
+    ap.add_argument("--format", choices=FORMATS, default="gpkg")
+    ap.add_argument("--epsg", type=int, default=2180, help="układ współrzędnych (domyślnie PL-1992)")
+    ap.add_argument("--geometry", help=f"plik geometrii odcinków (domyślnie <snapshot>{GEOMETRY_EXT})")
+    args = ap.parse_args(argv)
+
+    graph = open_snapshot(args.snapshot)
+    if graph is None:
+        ap.error(f"Nie można wczytać snapshotu: {args.snapshot}")
+    geometry = open_geometry(args.geometry or args.snapshot + GEOMETRY_EXT)
+    n_nodes, n_edges, dt = export(graph, args.out, args.format, geometry, args.epsg)
+    print(f"[Eksport] {args.format}: {n_nodes} węzłów + {n_edges} krawędzi w {dt:.2f} s = "
+          f"{(n_nodes + n_edges) / dt if dt else 0.0:,.0f} wierszy/s || geometria: "
+          f"{'pełna' if geometry is not None else 'odcinki proste'} -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+Binarny snapshot grafu CSR (.pag2graph) - zapis obok eksportu z graph.py,
+odczyt przez mmap bez kopiowania (tablice = memoryview na pliku).
+Ten sam format (write_array_file / open_array_file) służy danym pochodnym, np. CH.
+Moduł nie wymaga arcpy; tylko fc_signature() / last_edit() / content_digest() korzystają z arcpy (import leniwy).
+
+Układ pliku (little/big endian jak na maszynie zapisującej, zapisany w nagłówku):
+    nagłówek  : MAGIC, wersja, kolejność bajtów, n_vertices, liczba tablic, podpis źródła (32 B)
+    katalog   : dla każdej tablicy nazwa (16 B), typecode, offset, liczba elementów
+    dane      : tablice wyrównane do 8 bajtów
+"""
+from array import array
+from typing import Dict, Iterable, Optional, Tuple
+import hashlib
+import mmap
+import os
+import struct
+import sys
+
+from components import ensure_components
+from csr_graph import CSRGraph
+
+MAGIC = b"PAG2GRF\0"
+VERSION = 2
+SNAPSHOT_EXT = ".pag2graph"
+# pole daty ostatniej edycji (editor tracking) dodawane przez graph.py do klas nodes / edges
+EDIT_DATE_FIELD = "last_edited_date"
+
+_HEADER = struct.Struct("<8sHcxQI32s")      # magic, wersja, byteorder, n_vertices, n_arrays, podpis
+_ENTRY = struct.Struct("<16scxxxQQ")        # nazwa, typecode, offset, długość
+_ALIGN = 8
+
+# tablice CSRGraph w kolejności zapisu
+_ARRAYS = (
+    ("xs", "d"), ("ys", "d"), ("offsets", "q"), ("sources", "i"), ("targets", "i"),
+    ("lengths", "d"), ("klasa", "B"), ("kier", "b"), ("passable", "B"),
+    ("edge_ids", "i"), ("jezdnia_oid", "i"), ("edge_slot", "i"),
+    ("in_offsets", "q"), ("in_slots", "i"),
+)
+# etykiety składowych (components.py) - opcjonalne, starsze snapshoty ich nie mają
+_OPTIONAL_ARRAYS = (("scc", "i"), ("wcc", "i"))
+
+
+def snapshot_path_for(edges_fc: str) -> str:
+    """Plik snapshotu obok geobazy: <folder>/<nazwa.gdb>_<edges>.pag2graph."""
+    gdb = os.path.dirname(edges_fc)
+    return os.path.join(os.path.dirname(gdb),
+                        f"{os.path.basename(gdb)}_{os.path.basename(edges_fc)}{SNAPSHOT_EXT}")
+
+
+def source_signature(parts: Iterable[str]) -> bytes:
+    h = hashlib.sha256()
+    for p in parts:
+        h.update(p.encode("utf-8")); h.update(b"\0")
+    return h.digest()
+
+
+def fc_signature(fcs: Iterable[str]) -> bytes:
+    """
+    Podpis klas obiektów źródłowych: ścieżka, pola, liczba rekordów i zasięg oraz sygnał zmian treści.
+    Dla plików (np. shapefile) - czas modyfikacji .shp/.dbf; dla klas w geobazie z editor tracking
+    (graph.py włącza je przy eksporcie) - data ostatniej edycji (EDIT_DATE_FIELD, indeks atrybutowy):
+    jeden wiersz, stemplowana także przy zmianie geometrii. Bez editor tracking - content_digest
+    (pełny odczyt atrybutów i geometrii; tylko dla klas eksportowanych starszą wersją graph.py).
+    """
+    import arcpy
+    parts = []
+    for fc in fcs:
+        desc = arcpy.Describe(fc)
+        path = desc.catalogPath
+        ext = desc.extent
+        parts += [path, ",".join(f.name for f in desc.fields),
+                  str(arcpy.management.GetCount(fc)[0]),
+                  f"{ext.XMin!r},{ext.YMin!r},{ext.XMax!r},{ext.YMax!r}"]
+        files = [p for p in (path, os.path.splitext(path)[0] + ".dbf") if os.path.isfile(p)]
+        if files:
+            parts += [str(os.stat(p).st_mtime_ns) for p in files]
+        elif getattr(desc, "editorTrackingEnabled", False) and getattr(desc, "editedAtFieldName", ""):
+            parts.append("edited:" + last_edit(fc, desc.editedAtFieldName))
+        else:
+            parts.append(content_digest(fc, desc))
+    return source_signature(parts)
+
+
+def last_edit(fc: str, field: str) -> str:
+    """Najpóźniejsza data edycji (pole editor tracking) jako tekst ISO; pusty, gdy nic nie edytowano."""
+    import arcpy
+    with arcpy.da.SearchCursor(fc, [field], f"{field} IS NOT NULL",
+                               sql_clause=(None, f"ORDER BY {field} DESC")) as cur:
+        row = next(iter(cur), None)
+    return row[0].isoformat() if row is not None and row[0] is not None else ""
+
+
+def content_digest(fc: str, desc) -> str:
+    """
+    SHA-256 kolumn atrybutów i geometrii klasy (w kolejności ObjectID; punkty - SHAPE@XY,
+    linie - także SHAPE@LENGTH); NULL -> -1 / pusty tekst.
+    """
+    import arcpy
+    oid_field = getattr(desc, "OIDFieldName", "")
+    cols = [f for f in desc.fields if f.type not in ("Geometry", "Blob", "Raster")]
+    nulls = {f.name: ("" if f.type in ("String", "GUID", "GlobalID") else -1)
+             for f in cols if f.nullable and f.type != "Date"}
+    geom = ["SHAPE@XY"] + (["SHAPE@LENGTH"] if getattr(desc, "shapeType", "") != "Point" else [])
+    arr = arcpy.da.FeatureClassToNumPyArray(fc, [f.name for f in cols] + geom, null_value=nulls,
+                                            sql_clause=(None, f"ORDER BY {oid_field}" if oid_field else None))
+    h = hashlib.sha256(str(arr.dtype).encode("utf-8"))
+    h.update(arr.tobytes())
+    return h.hexdigest()
+
+
+def _pad(n: int) -> int:
+    return (-n) % _ALIGN
+
+
+def write_array_file(path: str, arrays: Iterable[Tuple[str, str, object]], count: int,
+                     signature: bytes = b"") -> int:
+    """
+    Zapisuje nazwane tablice (nazwa, typecode, array/memoryview/bytes) w formacie snapshotu,
+    atomowo (plik tymczasowy + replace). `count` trafia do nagłówka. Zwraca rozmiar w bajtach.
+    """
+    blobs = []
+    for name, tc, a in arrays:
+        data = a.tobytes() if hasattr(a, "tobytes") else bytes(a)
+        blobs.append((name, tc, data, len(data) // array(tc).itemsize))
+
+    pos = _HEADER.size + _ENTRY.size * len(blobs)
+    pos += _pad(pos)
+    entries = []
+    for name, tc, data, n in blobs:
+        entries.append(_ENTRY.pack(name.encode("ascii"), tc.encode("ascii"), pos, n))
+        pos += len(data) + _pad(len(data))
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        head = _HEADER.pack(MAGIC, VERSION, sys.byteorder[0].encode("ascii"),
+                            count, len(blobs), signature.ljust(32, b"\0")[:32])
+        f.write(head)
+        f.write(b"".join(entries))
+        f.write(b"\0" * _pad(f.tell()))
+        for _, _, data, _ in blobs:
+            f.write(data)
+            f.write(b"\0" * _pad(len(data)))
+        size = f.tell()
+    os.replace(tmp, path)
+    return size
+
+
+def write_snapshot(graph: CSRGraph, path: str, signature: bytes = b"") -> int:
+    """Zapisuje graf CSR razem z etykietami składowych (liczone tu, jeśli ich brak). Zwraca rozmiar pliku w bajtach."""
+    ensure_components(graph)
+    return write_array_file(path, ((name, tc, getattr(graph, name)) for name, tc in _ARRAYS + _OPTIONAL_ARRAYS),
+                            graph.n_vertices, signature)
+
+
+def read_signature(path: str) -> Optional[bytes]:
+    """Podpis źródła zapisany w snapshocie (None gdy plik nie istnieje lub jest innej wersji)."""
+    try:
+        with open(path, "rb") as f:
+            head = f.read(_HEADER.size)
+    except OSError:
+        return None
+    if len(head) < _HEADER.size:
+        return None
+    magic, version, order, _, _, sig = _HEADER.unpack(head)
+    if magic != MAGIC or version != VERSION or order != sys.byteorder[0].encode("ascii"):
+        return None
+    return sig
+
+
+def open_array_file(path: str, expected_signature: Optional[bytes] = None
+                    ) -> Optional[Tuple[int, Dict[str, memoryview]]]:
+    """
+    Mapuje plik do pamięci i zwraca (count, {nazwa: memoryview}) bez kopiowania.
+    None gdy pliku brak, wersja/kolejność bajtów się nie zgadza albo podpis
+    źródła jest inny niż `expected_signature` (plik nieaktualny).
+    """
+    sig = read_signature(path)
+    if sig is None:
+        return None
+    if expected_signature is not None and sig != expected_signature.ljust(32, b"\0")[:32]:
+        return None
+
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    buf = memoryview(mm)
+    _, _, _, count, n_arrays, _ = _HEADER.unpack_from(buf, 0)
+    arrays = {}
+    for i in range(n_arrays):
+        name, tc, off, n = _ENTRY.unpack_from(buf, _HEADER.size + i * _ENTRY.size)
+        tc = tc.decode("ascii")
+        size = n * array(tc).itemsize
+        arrays[name.rstrip(b"\0").decode("ascii")] = buf[off:off + size].cast(tc)
+    return count, arrays
+
+
+def open_snapshot(path: str, expected_signature: Optional[bytes] = None) -> Optional[CSRGraph]:
+    """Graf CSR na memoryview ze snapshotu (None gdy brak / nieaktualny)."""
+    loaded = open_array_file(path, expected_signature)
+    if loaded is None:
+        return None
+    n_vertices, arrays = loaded
+    if any(name not in arrays for name, _ in _ARRAYS):
+        return None
+    return CSRGraph(n_vertices=n_vertices,
+                    **{name: arrays.get(name) for name, _ in _ARRAYS + _OPTIONAL_ARRAYS})
@@ -0,0 +1,437 @@
+"""
+Przyrostowa aktualizacja grafu CSR po edycji odcinków jezdni (po jezdnia_oid) - bez ponownej
+budowy z całej warstwy.
+
+GraphUpdater trzyma indeks końców odcinków (_snap_key -> vid, jak w build_graph_rows), więc nowe
+końce przyklejają się do istniejących wierzchołków. apply(inserted, updated, deleted):
+    - zmiana samych atrybutów (długość, klasa, kier przy tych samych kierunkach krawędzi) -
+      zapis w istniejących slotach, sloty i edge_id bez zmian
+    - pozostałe - krawędzie odcinka usuwane i dodawane od nowa; tablice CSR składane jednym
+      przebiegiem numpy (np.insert w miejsca z searchsorted - bez sortowania całego grafu)
+Nowe krawędzie dostają kolejne edge_id, nowe wierzchołki kolejne vid; wierzchołek, któremu po
+usunięciu odcinka nie zostaje żadna krawędź, znika (xs = NaN). Numeracja różni się od pełnej
+przebudowy, ale sąsiedztwo i kolejność krawędzi wychodzących (rosnące edge_id) są te same.
+
+Każda zmiana podbija graph.version i dopisuje GraphChange do graph.changes. Cache wag metryk
+jest przenoszony na nowe sloty (przeliczane tylko zmienione krawędzie); etykiety składowych
+są kasowane przy zmianie przejezdności i liczone ponownie przy pierwszym zapytaniu.
+
+Eksport z graph.py (klasy nodes / edges + snapshot obok geobazy): update_gdb stosuje te same
+zmiany w klasach (usunięcia / wstawienia / zmiany wierszy - gdb_edits) i zapisuje snapshot z
+podpisem klas po edycji, więc route_finder wczytuje zaktualizowany graf bez przebudowy.
+Narzędzie "Update graph" (graph.atbx, update_graph_tool.py) czyta zmienione odcinki z warstwy jezdni.
+
+Uruchomienie - zmiany z CSV:
+    python graph_update.py graf.pag2graph zmiany.csv --out graf_v2.pag2graph     (bez arcpy, sam snapshot)
+    python graph_update.py X_edges_out.pag2graph zmiany.csv --nodes X.gdb/nodes_out --edges X.gdb/edges_out
+    CSV: op,jezdnia_oid,x1,y1,x2,y2,length_m,klasa,kier   (op: insert / update / delete)
+"""
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import argparse
+import csv
+import os
+import time
+
+import numpy as np
+
+from bulk_build import _arr, _offsets
+from components import ensure_components
+from csr_graph import (KLASA_DOMYSLNA, KLASA_IDX, CSRGraph, GraphChange, RoadRow, _snap_key,
+                       czy_dobry_kierunek)
+from graph_snapshot import (_ARRAYS, _OPTIONAL_ARRAYS, fc_signature, open_snapshot, read_signature,
+                            source_signature, write_snapshot)
+from routing import INF, speed_table
+
+OPS = ("insert", "update", "delete")
+
+# tablice per slot: (atrybut CSRGraph, dtype)
+_SLOT_ARRAYS = (("sources", np.int32), ("targets", np.int32), ("lengths", np.float64),
+                ("klasa", np.uint8), ("kier", np.int8), ("edge_ids", np.int32), ("jezdnia_oid", np.int32))
+
+
+def _pairs(u: int, v: int, kier: int) -> Tuple[Tuple[int, int], ...]:
+    """Krawędzie skierowane odcinka u-v - jak w build_graph_rows."""
+    if kier == 3:
+        return ()
+    if kier == 1:
+        return ((u, v),)
+    if kier == 2:
+        return ((v, u),)
+    return ((u, v), (v, u))
+
+
+class GraphUpdater:
+    """Aktualizacje grafu w miejscu; `snap_tol` musi być taki jak przy budowie grafu."""
+
+    def __init__(self, graph: CSRGraph, snap_tol: float = 0.25):
+        self.graph = graph
+        self.snap_tol = snap_tol
+        xs, ys = graph.xs, graph.ys
+        self.vertex_ids_by_snap: Dict[Tuple[int, int], int] = {
+            _snap_key(xs[v], ys[v], snap_tol): v for v in graph.vertex_ids()}
+
+    def apply(self, inserted: Iterable[RoadRow] = (), updated: Iterable[RoadRow] = (),
+              deleted: Iterable[int] = ()) -> GraphChange:
+        """
+        Wstawione / zmienione wiersze (jak RoadRow z read_road_rows) i usunięte jezdnia_oid.
+        Zmieniony odcinek, którego nie ma w grafie (np. był kier 3), jest wstawiany.
+        """
+        g = self.graph
+        inserted, updated = list(inserted), list(updated)
+        deleted = {int(o) for o in deleted}
+        touched = deleted | {int(r[0]) for r in updated} | {int(r[0]) for r in inserted}
+        slots_by_oid = self._slots_by_oid(touched)
+        dup = sorted({int(r[0]) for r in inserted} & slots_by_oid.keys())
+        if dup:
+            raise ValueError(f"Odcinki już są w grafie (użyj update): {dup[:10]}")
+
+        remove: List[int] = []                      # sloty do usunięcia
+        rebuilt: List[RoadRow] = []                 # odcinki dodawane od nowa (kolejność jak w wejściu)
+        patched: List[Tuple[int, RoadRow]] = []     # (slot, wiersz) - zmiana atrybutów w miejscu
+        for oid in deleted:
+            remove.extend(slots_by_oid.get(oid, ()))
+        for row in updated:
+            slots = slots_by_oid.get(int(row[0]), [])
+            u = self.vertex_ids_by_snap.get(_snap_key(row[1], row[2], self.snap_tol))
+            v = self.vertex_ids_by_snap.get(_snap_key(row[3], row[4], self.snap_tol))
+            same = (u is not None and v is not None and
+                    [(g.sources[s], g.targets[s]) for s in slots] == list(_pairs(u, v, int(row[7]))))
+            if same and slots:
+                patched.extend((s, row) for s in slots)
+            else:
+                remove.extend(slots)
+                rebuilt.append(row)
+        rebuilt.extend(inserted)
+
+        touch_passable = self._patch(patched)
+        updated_eids = array("i", sorted(g.edge_ids[s] for s, _ in patched))
+        if remove or rebuilt:
+            change = self._relayout(np.array(sorted(remove), np.int64), rebuilt)._replace(
+                updated_edges=updated_eids)
+        else:
+            change = GraphChange(g.version + 1, array("i"), array("i"), updated_eids,
+                                 array("i"), array("i"), None)
+        if touch_passable or change.slot_map is not None:
+            g.scc = g.wcc = None                    # components.ensure_components przy pierwszym zapytaniu
+        g.version = change.version
+        g.changes.append(change)
+        return change
+
+    def detach(self) -> None:
+        """
+        Kopiuje do pamięci wszystkie tablice grafu otwartego ze snapshotu (mmap) - przed nadpisaniem
+        tego samego pliku (Windows nie pozwala zastąpić pliku zmapowanego w pamięci).
+        """
+        for name, _ in _ARRAYS + _OPTIONAL_ARRAYS:
+            self._writable(name)
+
+    # --- wewnętrzne ---
+    def _slots_by_oid(self, oids: Iterable[int]) -> Dict[int, List[int]]:
+        """Sloty krawędzi odcinków (rosnąco po edge_id) - jedno przejście numpy po jezdnia_oid."""
+        g = self.graph
+        oid_col = np.frombuffer(g.jezdnia_oid, np.int32)
+        slots = np.flatnonzero(np.isin(oid_col, np.fromiter(oids, np.int64)))
+        eids = np.frombuffer(g.edge_ids, np.int32)[slots]
+        out: Dict[int, List[int]] = {}
+        for s in slots[np.argsort(eids, kind="stable")].tolist():
+            out.setdefault(g.jezdnia_oid[s], []).append(s)
+        return out
+
+    def _writable(self, name: str) -> None:
+        """Tablice ze snapshotu (memoryview na mmap) kopiowane przed zapisem."""
+        a = getattr(self.graph, name)
+        if isinstance(a, memoryview):
+            if name == "passable":
+                copy = bytearray(a)
+            else:
+                copy = array(a.format)
+                copy.frombytes(a.cast("B"))
+            setattr(self.graph, name, copy)
+
+    def _patch(self, patched: List[Tuple[int, RoadRow]]) -> bool:
+        """Atrybuty w istniejących slotach + wagi w cache; True gdy zmieniła się przejezdność."""
+        if not patched:
+            return False
+        g = self.graph
+        for name in ("lengths", "klasa", "kier", "passable"):
+            self._writable(name)
+        changed = False
+        for s, row in patched:
+            kier = int(row[7])
+            p = czy_dobry_kierunek(kier, g.sources[s], g.targets[s], g.sources[s])
+            changed |= bool(g.passable[s]) != p
+            g.lengths[s] = float(row[5])
+            g.klasa[s] = KLASA_IDX.get(row[6], KLASA_DOMYSLNA)
+            g.kier[s] = kier
+            g.passable[s] = p
+        slots = [s for s, _ in patched]
+        for key, w in g.weights_cache.items():
+            _fill_weights(g, key, w, slots)
+        return changed
+
+    def _vertex(self, x: float, y: float, new_xy: List[Tuple[float, float]]) -> int:
+        key = _snap_key(x, y, self.snap_tol)
+        vid = self.vertex_ids_by_snap.get(key)
+        if vid is None:
+            vid = self.vertex_ids_by_snap[key] = len(self.graph.xs) + len(new_xy)
+            new_xy.append((x, y))
+        return vid
+
+    def _relayout(self, remove: np.ndarray, rows: List[RoadRow]) -> GraphChange:
+        g = self.graph
+        m = g.n_edges
+        next_eid = len(g.edge_slot)
+        new_xy: List[Tuple[float, float]] = []
+        cols: Dict[str, List] = {name: [] for name, _ in _SLOT_ARRAYS}
+        for oid, x1, y1, x2, y2, length_m, klasa_code, kier in rows:
+            u = self._vertex(x1, y1, new_xy)
+            v = self._vertex(x2, y2, new_xy)
+            for a, c in _pairs(u, v, int(kier)):
+                for name, val in zip(cols, (a, c, float(length_m), KLASA_IDX.get(klasa_code, KLASA_DOMYSLNA),
+                                            int(kier), next_eid, int(oid))):
+                    cols[name].append(val)
+                next_eid += 1
+
+        # stare sloty bez usuniętych + nowe wstawione za krawędziami tego samego źródła (większe edge_id)
+        keep = np.ones(m, bool)
+        keep[remove] = False
+        kept = {name: np.frombuffer(getattr(g, name), dt)[keep] for name, dt in _SLOT_ARRAYS}
+        new = {name: np.array(cols[name], dt) for name, dt in _SLOT_ARRAYS}
+        order = np.argsort(new["sources"], kind="stable")
+        new = {name: a[order] for name, a in new.items()}
+        pos = np.searchsorted(kept["sources"], new["sources"], side="right")
+        merged = {name: np.insert(kept[name], pos, new[name]) for name in kept}
+        n_kept = len(kept["sources"])
+        slot_map = np.full(m, -1, np.int64)
+        slot_map[keep] = np.arange(n_kept) + np.searchsorted(pos, np.arange(n_kept), side="right")
+        added_slots = pos + np.arange(len(pos))
+
+        xs = np.concatenate((np.frombuffer(g.xs, np.float64), [p[0] for p in new_xy]))
+        ys = np.concatenate((np.frombuffer(g.ys, np.float64), [p[1] for p in new_xy]))
+        n = len(xs)
+        sources, targets, kier = merged["sources"], merged["targets"], merged["kier"]
+        offsets, in_offsets = _offsets(sources, n), _offsets(targets, n)
+
+        # końce usuniętych krawędzi bez żadnej krawędzi -> wierzchołek usuwany
+        old_src = np.frombuffer(g.sources, np.int32)[remove]
+        old_dst = np.frombuffer(g.targets, np.int32)[remove]
+        cand = np.unique(np.concatenate((old_src, old_dst))).astype(np.int64)
+        gone = cand[(offsets[cand + 1] == offsets[cand]) & (in_offsets[cand + 1] == in_offsets[cand])]
+        for v in gone.tolist():
+            del self.vertex_ids_by_snap[_snap_key(xs[v], ys[v], self.snap_tol)]
+        xs[gone] = np.nan; ys[gone] = np.nan
+
+        eids = merged["edge_ids"]
+        edge_slot = np.full(next_eid, -1, np.int64)
+        edge_slot[eids] = np.arange(len(eids))
+        passable = (kier != 3) & ((kier != 2) | (sources == targets))    # = czy_dobry_kierunek
+        old_eids = np.frombuffer(g.edge_ids, np.int32)
+        # krawędzie wchodzące: stare przemapowane (kolejność (cel, slot) zachowana) + nowe w miejscach z searchsorted
+        in_kept = slot_map[np.frombuffer(g.in_slots, np.int32)]
+        in_kept = in_kept[in_kept >= 0]
+        m_new = len(eids)
+        add_key = targets[added_slots].astype(np.int64) * m_new + added_slots
+        add_order = np.argsort(add_key, kind="stable")
+        in_pos = np.searchsorted(targets[in_kept].astype(np.int64) * m_new + in_kept, add_key[add_order])
+        in_slots = np.insert(in_kept, in_pos, added_slots[add_order])
+        old_weights = {key: np.frombuffer(w, np.float64) for key, w in g.weights_cache.items()}
+
+        g.xs, g.ys = _arr("d", xs), _arr("d", ys)
+        g.offsets, g.in_offsets = _arr("q", offsets), _arr("q", in_offsets)
+        for name, dt in _SLOT_ARRAYS:
+            setattr(g, name, _arr(np.dtype(dt).char, merged[name]))
+        g.passable = bytearray(passable.astype(np.uint8).tobytes())
+        g.edge_slot = _arr("i", edge_slot)
+        g.in_slots = _arr("i", in_slots)
+        g.n_vertices += len(new_xy) - len(gone)
+        g.n_edges = len(eids)
+
+        # wagi: stare sloty przenoszone, nowe liczone
+        for key, w_old in old_weights.items():
+            w = np.empty(g.n_edges)
+            w[slot_map[keep]] = w_old[keep]
+            w = _arr("d", w)
+            _fill_weights(g, key, w, added_slots.tolist())
+            g.weights_cache[key] = w
+
+        return GraphChange(g.version + 1, array("i", new["edge_ids"].tolist()),
+                           array("i", old_eids[remove].tolist()), array("i"),
+                           array("i", range(n - len(new_xy), n)), array("i", gone.tolist()),
+                           _arr("i", slot_map))
+
+
+def _fill_weights(graph: CSRGraph, key: tuple, w: array, slots: Iterable[int]) -> None:
+    """Wagi wybranych slotów jak routing._compile_weights; klucz cache = (metryka, profile_key)."""
+    metric, profile = key
+    v_mps = speed_table(dict(profile)) if metric == "time" else None
+    lengths, klasa, passable = graph.lengths, graph.klasa, graph.passable
+    for s in slots:
+        if not passable[s]:
+            w[s] = INF
+        elif metric == "length":
+            w[s] = lengths[s]
+        else:
+            w[s] = lengths[s] / v_mps[klasa[s]] if v_mps[klasa[s]] > 0 else INF
+
+
+class GdbEdits(NamedTuple):
+    """Zmiany wierszy klas nodes / edges (jak z graph.export_graph_to_gdb) po jednej GraphChange."""
+    delete_nodes: List[int]                                         # node_id
+    insert_nodes: List[Tuple[int, float, float, int, int]]          # node_id, x, y, scc, wcc
+    update_nodes: List[Tuple[int, int, int]]                        # node_id, scc, wcc
+    delete_edges: List[int]                                         # edge_id
+    insert_edges: List[Tuple[int, int, int, float, str, int, int]]  # edge_id + CSRGraph.edge_record
+    update_edges: List[Tuple[int, int, int, float, str, int, int]]
+
+
+def component_labels(graph: CSRGraph) -> Tuple[np.ndarray, np.ndarray]:
+    """Kopie etykiet scc / wcc - przed apply, do porównania w gdb_edits."""
+    ensure_components(graph)
+    return np.array(graph.scc, np.int32), np.array(graph.wcc, np.int32)
+
+
+def gdb_edits(graph: CSRGraph, change: GraphChange, old_labels: Tuple[np.ndarray, np.ndarray]) -> GdbEdits:
+    """
+    Wiersze do usunięcia / wstawienia / zmiany w klasach nodes / edges, po których klasy opisują
+    graf po `change` (load_graph_from_gdb daje ten sam graf). Etykiety składowych są liczone
+    od nowa, więc zmieniane są też węzły spoza zmiany, którym zmieniła się scc / wcc.
+    """
+    ensure_components(graph)
+    scc, wcc = np.frombuffer(graph.scc, np.int32), np.frombuffer(graph.wcc, np.int32)
+    old_scc, old_wcc = old_labels
+    n_old = len(old_scc)
+    live = ~np.isnan(np.frombuffer(graph.xs, np.float64)[:n_old])
+    relabeled = np.flatnonzero(live & ((scc[:n_old] != old_scc) | (wcc[:n_old] != old_wcc))).tolist()
+    return GdbEdits(
+        list(change.removed_vertices),
+        [(v, graph.xs[v], graph.ys[v], int(scc[v]), int(wcc[v])) for v in change.added_vertices],
+        [(v, int(scc[v]), int(wcc[v])) for v in relabeled],
+        list(change.removed_edges),
+        [(e,) + graph.edge_record(e) for e in sorted(change.added_edges)],   # OBJECTID rosnąco z edge_id
+        [(e,) + graph.edge_record(e) for e in change.updated_edges])
+
+
+def _where_in(field: str, ids: Sequence[int], batch: int = 1000) -> Iterable[str]:
+    """Warunki `field IN (...)` w paczkach - limit długości zapytania."""
+    ids = sorted(ids)
+    for i in range(0, len(ids), batch):
+        yield f"{field} IN ({','.join(map(str, ids[i:i + batch]))})"
+
+
+def write_gdb_edits(nodes_fc: str, edges_fc: str, graph: CSRGraph, edits: GdbEdits) -> None:
+    """Zapis GdbEdits do klas nodes / edges w jednej sesji edycji (arcpy, import leniwy); linie z węzłów `graph`."""
+    import arcpy
+    desc = arcpy.Describe(edges_fc)
+    sr = desc.spatialReference
+    workspace = desc.path
+    if arcpy.Describe(workspace).dataType == "FeatureDataset":
+        workspace = os.path.dirname(workspace)
+    edge_fields = ["edge_id", "id_from", "id_to", "length_m", "klasa", "kier", "jezdnia_oid"]
+    with arcpy.da.Editor(workspace):
+        for fc, field, ids in ((edges_fc, "edge_id", edits.delete_edges), (nodes_fc, "node_id", edits.delete_nodes)):
+            for where in _where_in(field, ids):
+                with arcpy.da.UpdateCursor(fc, [field], where) as cur:
+                    for _ in cur:
+                        cur.deleteRow()
+        for fc, fields, rows in ((edges_fc, edge_fields, edits.update_edges),
+                                 (nodes_fc, ["node_id", "scc", "wcc"], edits.update_nodes)):
+            by_id = {r[0]: r for r in rows}
+            for where in _where_in(fields[0], list(by_id)):
+                with arcpy.da.UpdateCursor(fc, fields, where) as cur:
+                    for row in cur:
+                        cur.updateRow(list(by_id[row[0]]))
+        with arcpy.da.InsertCursor(nodes_fc, ["SHAPE@XY", "node_id", "scc", "wcc"]) as cur:
+            for vid, x, y, scc, wcc in edits.insert_nodes:
+                cur.insertRow(((x, y), vid, scc, wcc))
+        with arcpy.da.InsertCursor(edges_fc, ["SHAPE@"] + edge_fields) as cur:
+            for row in edits.insert_edges:
+                ends = arcpy.Array([arcpy.Point(*graph.vertex_xy(row[1])), arcpy.Point(*graph.vertex_xy(row[2]))])
+                cur.insertRow([arcpy.Polyline(ends, sr)] + list(row))
+
+
+def update_gdb(nodes_fc: str, edges_fc: str, inserted: Iterable[RoadRow] = (), updated: Iterable[RoadRow] = (),
+               deleted: Iterable[int] = (), snap_tol: float = 0.25) -> GraphChange:
+    """
+    Aktualizacja grafu wyeksportowanego przez graph.py: graf ze snapshotu (gdb_graph.load_graph),
+    GraphUpdater.apply, te same zmiany w klasach nodes / edges i snapshot zapisany z podpisem
+    fc_signature klas po edycji - route_finder wczytuje go bez przebudowy z GDB. Dane pochodne
+    (CH, landmarki, geometria odcinków .geom) mają stary podpis i są liczone od nowa.
+    """
+    from gdb_graph import load_graph                # arcpy - tylko przy aktualizacji klas GDB
+    graph, snap_path, _ = load_graph(nodes_fc, edges_fc)
+    updater = GraphUpdater(graph, snap_tol)
+    updater.detach()
+    old_labels = component_labels(graph)
+    change = updater.apply(inserted, updated, deleted)
+    write_gdb_edits(nodes_fc, edges_fc, graph, gdb_edits(graph, change, old_labels))
+    write_snapshot(graph, snap_path, fc_signature([nodes_fc, edges_fc]))
+    return change
+
+
+def read_changes(path: str) -> Tuple[List[RoadRow], List[RoadRow], List[int]]:
+    """CSV: op,jezdnia_oid,x1,y1,x2,y2,length_m,klasa,kier (dla delete wystarczy jezdnia_oid)."""
+    inserted, updated, deleted = [], [], []
+    with open(path, newline="", encoding="utf-8") as f:
+        for rec in csv.DictReader(f):
+            op = rec["op"].strip().lower()
+            if op not in OPS:
+                raise ValueError(f"Nieznana operacja: {rec['op']}")
+            oid = int(rec["jezdnia_oid"])
+            if op == "delete":
+                deleted.append(oid)
+                continue
+            row = (oid, float(rec["x1"]), float(rec["y1"]), float(rec["x2"]), float(rec["y2"]),
+                   float(rec["length_m"]), rec["klasa"].strip(), int(rec.get("kier") or 0))
+            (inserted if op == "insert" else updated).append(row)
+    return inserted, updated, deleted
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Przyrostowa aktualizacja snapshotu grafu")
+    ap.add_argument("snapshot", help="plik .pag2graph")
+    ap.add_argument("changes", help="CSV zmian: op,jezdnia_oid,x1,y1,x2,y2,length_m,klasa,kier")
+    ap.add_argument("--out", help="wynikowy snapshot (domyślnie nadpisuje wejściowy)")
+    ap.add_argument("--nodes", help="klasa węzłów z graph.py - zmiany zapisywane też w GDB (arcpy)")
+    ap.add_argument("--edges", help="klasa krawędzi z graph.py (razem z --nodes)")
+    ap.add_argument("--snap-tol", type=float, default=0.25)
+    args = ap.parse_args(argv)
+
+    inserted, updated, deleted = read_changes(args.changes)
+    if args.nodes or args.edges:
+        if not (args.nodes and args.edges) or args.out:
+            ap.error("--nodes i --edges podawane razem, bez --out (snapshot obok geobazy)")
+        import arcpy
+        from graph_snapshot import snapshot_path_for
+        expected = snapshot_path_for(arcpy.Describe(args.edges).catalogPath)
+        if os.path.abspath(expected) != os.path.abspath(args.snapshot):
+            ap.error(f"Snapshot klas {args.edges} to {expected}")
+        t0 = time.perf_counter()
+        change = update_gdb(args.nodes, args.edges, inserted, updated, deleted, args.snap_tol)
+        print(f"[Aktualizacja GDB] +{len(change.added_edges)} / -{len(change.removed_edges)} / "
+              f"~{len(change.updated_edges)} krawędzi || {(time.perf_counter() - t0) * 1000:.1f} ms || "
+              f"snapshot {args.snapshot} zgodny z klasami GDB")
+        return
+
+    graph = open_snapshot(args.snapshot)
+    if graph is None:
+        ap.error(f"Nie można wczytać snapshotu: {args.snapshot}")
+    updater = GraphUpdater(graph, args.snap_tol)
+    updater.detach()
+    t0 = time.perf_counter()
+    change = updater.apply(inserted, updated, deleted)
+    dt = time.perf_counter() - t0
+    # podpis: poprzedni + plik zmian - snapshot nie pasuje już do eksportu w GDB
+    sig = source_signature([read_signature(args.snapshot).hex(), args.changes, str(change.version)])
+    size = write_snapshot(graph, args.out or args.snapshot, sig)
+    print(f"[Aktualizacja] +{len(change.added_edges)} / -{len(change.removed_edges)} / "
+          f"~{len(change.updated_edges)} krawędzi || +{len(change.added_vertices)} / "
+          f"-{len(change.removed_vertices)} wierzchołków || {dt * 1000:.1f} ms || "
+          f"|V|: {graph.n_vertices} || |E|: {graph.n_edges} || snapshot {size / 1e6:.1f} MB")
+    print("[Uwaga] Snapshot nie odpowiada już klasom nodes / edges w GDB - route_finder uzna go za "
+          "nieaktualny i wczyta graf z GDB. Żeby zmiany trafiły do route_finder: --nodes / --edges "
+          "albo narzędzie \"Update graph\" (graph.atbx).")
+
+
+if __name__ == "__main__":
+    main()
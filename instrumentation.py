@@ -0,0 +1,256 @@
+"""
+Metryki zapytań (JSON lines albo liczniki zbiorcze) i punkt zaczepienia do próbkowania pętli wyszukiwania.
+
+Wyszukiwania (routing, contraction, chains, alternatives, ksp, landmarks, od_matrix) wołają
+heappush / heappop / reconstruct_path (workspace_path) jako nazwy globalne modułu. Włączony pomiar na czas
+jednego zapytania podmienia je w załadowanych modułach na wersje zliczające (wstawienia,
+zdjęcia z kopca, maks. rozmiar kopca, czas odtwarzania trasy) i przywraca oryginały po
+zapytaniu. Kolejki priority_queues inne niż heapq (binary / 4ary / radix / dial) nie używają
+heapq - podmieniane jest priority_queues._queue, a liczniki (pushes, pops, max_size) brane
+z każdej kolejki otwartej w zapytaniu (przed ponownym otwarciem, które je zeruje, i po zapytaniu);
+próbkowanie (sample_every) dotyczy tylko zdjęć z heapq. Wyłączony (enabled=False - domyślnie, gdy brak zmiennej PAG2GRAPH_METRICS) nie
+zmienia niczego w pętlach: koszt to jedno sprawdzenie flagi na zapytanie.
+Podmiana dotyczy całego procesu - pomiar nie jest przeznaczony dla wyszukiwań w wielu wątkach naraz.
+
+Rekord zapytania:
+    algorithm, start, end, cost (None = brak trasy), settled, neighbors_checked (sprawdzone krawędzie),
+    relaxations (poprawione etykiety = wywołania push kolejki, z wierzchołkiem startowym),
+    heap_pushes (nowe wpisy w kolejce; mniej niż relaxations przy decrease-key binary / 4ary),
+    heap_pops, stale_pops (zdjęte już rozliczone), max_heap,
+    time_ms: {load, search, reconstruct, write} (load / write - fazy zmierzone przez phase())
+"""
+from collections import Counter
+from contextlib import contextmanager
+from heapq import heappop as _heappop, heappush as _heappush
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import json
+import os
+import sys
+import time
+
+METRICS_ENV = "PAG2GRAPH_METRICS"
+
+# moduły wyszukiwania, w których podmieniane są nazwy globalne (tylko już załadowane)
+_HOOKED_MODULES = ("routing", "contraction", "chains", "alternatives", "ksp", "landmarks", "od_matrix",
+                   "priority_queues")
+# odtwarzanie trasy: słowniki poprzedników albo tablice search_workspace
+_RECONSTRUCT = ("reconstruct_path", "workspace_path")
+# fazy mierzone po zapytaniu - dopisywane do ostatniego rekordu; pozostałe do następnego
+_AFTER_PHASES = ("write",)
+_COUNTERS = ("settled", "neighbors_checked", "relaxations", "heap_pushes", "heap_pops", "stale_pops")
+
+Sampler = Callable[[int, int, Any], None]   # (numer zdjęcia z kopca, rozmiar kopca, zdjęty element)
+
+
+class _Counters:
+    __slots__ = ("relaxations", "pushes", "pops", "max_heap", "reconstruct_s", "sample_every", "sampler",
+                 "queues")
+
+    def __init__(self, sample_every: int, sampler: Optional[Sampler]):
+        self.relaxations = self.pushes = self.pops = self.max_heap = 0
+        self.reconstruct_s = 0.0
+        self.sample_every = sample_every
+        self.sampler = sampler
+        self.queues: List[Any] = []         # kolejki priority_queues otwarte w zapytaniu (bez heapq)
+
+    def add_queue(self, q) -> None:
+        """Liczniki kolejki spoza heapq (heapq zliczają podmienione heappush / heappop)."""
+        self.relaxations += q.pushes
+        self.pushes += q.pushes - getattr(q, "decreases", 0)
+        self.pops += q.pops
+        if q.max_size > self.max_heap:
+            self.max_heap = q.max_size
+
+
+def _install(c: _Counters) -> List[Tuple[Any, str, Any]]:
+    """Podmienia heappush / heappop / reconstruct_path / workspace_path; zwraca listę do przywrócenia."""
+    def push(heap, item):
+        _heappush(heap, item)
+        c.relaxations += 1; c.pushes += 1
+        if len(heap) > c.max_heap:
+            c.max_heap = len(heap)
+
+    def pop(heap):
+        item = _heappop(heap)
+        c.pops += 1
+        if c.sample_every and c.pops % c.sample_every == 0:
+            c.sampler(c.pops, len(heap), item)
+        return item
+
+    saved = []
+    for name in _HOOKED_MODULES:
+        m = sys.modules.get(name)
+        if m is None:
+            continue
+        for attr, hook in (("heappush", push), ("heappop", pop)):
+            if hasattr(m, attr):
+                saved.append((m, attr, getattr(m, attr)))
+                setattr(m, attr, hook)
+        for attr in _RECONSTRUCT:
+            if not hasattr(m, attr):
+                continue
+            original = getattr(m, attr)
+            def reconstruct(*args, _original=original, **kwargs):
+                t0 = time.perf_counter()
+                try:
+                    return _original(*args, **kwargs)
+                finally:
+                    c.reconstruct_s += time.perf_counter() - t0
+            saved.append((m, attr, original))
+            setattr(m, attr, reconstruct)
+
+    pq = sys.modules.get("priority_queues")
+    if pq is not None:
+        original_queue = pq._queue
+        def hooked_queue(ws, name, backward=False):
+            prev = ws.queues.get((name, backward))
+            if prev is not None and any(prev is q for q in c.queues):
+                c.add_queue(prev)           # ponowne otwarcie (np. odgałęzienia Yena) zeruje liczniki
+                c.queues = [q for q in c.queues if q is not prev]
+            q = original_queue(ws, name, backward)
+            if not hasattr(q, "heap"):
+                c.queues.append(q)
+            return q
+        saved.append((pq, "_queue", original_queue))
+        pq._queue = hooked_queue
+    return saved
+
+
+def _restore(saved: List[Tuple[Any, str, Any]]) -> None:
+    for m, attr, original in reversed(saved):
+        setattr(m, attr, original)
+
+
+class Instrumentation:
+    """
+    Pomiar zapytań: measure() dla wyszukiwania, phase() dla faz poza nim (wczytanie grafu, zapis wyniku).
+    records=True - rekord per zapytanie (JSON lines w `path` przy flush/close),
+    records=False - tylko liczniki zbiorcze per algorytm (zapisywane przy close).
+    sample_every=N - co N-te zdjęcie z kopca woła `sampler` (domyślnie: dopisuje
+    [numer, rozmiar kopca, klucz] do pola "samples" rekordu).
+    """
+
+    def __init__(self, path: Optional[str] = None, enabled: bool = True, records: bool = True,
+                 sample_every: int = 0, sampler: Optional[Sampler] = None):
+        self.enabled = enabled
+        self.path = path
+        self.keep_records = records
+        self.sample_every = sample_every
+        self.sampler = sampler
+        self.records: List[Dict[str, Any]] = []
+        self.totals: Dict[str, Counter] = {}
+        self._last: Optional[Dict[str, Any]] = None
+        self._pending: Dict[str, float] = {}
+        self._written = 0
+
+    @classmethod
+    def from_env(cls) -> "Instrumentation":
+        """Włączony, gdy PAG2GRAPH_METRICS wskazuje plik .jsonl; inaczej wyłączony (bez kosztu)."""
+        path = os.environ.get(METRICS_ENV, "").strip()
+        return cls(path) if path else cls(enabled=False)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            ms = (time.perf_counter() - t0) * 1000.0
+            target = self._last["time_ms"] if name in _AFTER_PHASES and self._last is not None else self._pending
+            target[name] = target.get(name, 0.0) + ms
+            if target is not self._pending:
+                self.totals[self._last["algorithm"]][f"{name}_ms"] += ms
+
+    def measure(self, algorithm: str, query: Tuple[int, int], search: Callable[..., Any], *args, **kwargs) -> Any:
+        """Wynik search(*args, **kwargs); przy włączonym pomiarze zapisuje rekord zapytania `query` = (start, koniec)."""
+        if not self.enabled:
+            return search(*args, **kwargs)
+        samples: List[List[Any]] = []
+        sampler = self.sampler or (lambda n, size, item: samples.append([n, size, item[0]]))
+        c = _Counters(self.sample_every, sampler)
+        saved = _install(c)
+        t0 = time.perf_counter()
+        try:
+            res = search(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - t0
+            _restore(saved)
+            for q in c.queues:
+                c.add_queue(q)
+
+        first = res[0] if isinstance(res, list) and res else res
+        settled = getattr(first, "settled", 0)
+        cost = getattr(first, "cost", None)
+        time_ms = dict(self._pending)
+        self._pending.clear()
+        time_ms["search"] = (elapsed - c.reconstruct_s) * 1000.0
+        time_ms["reconstruct"] = c.reconstruct_s * 1000.0
+        rec: Dict[str, Any] = {
+            "ts": time.time(), "algorithm": algorithm, "start": query[0], "end": query[1],
+            "cost": cost if cost is not None and cost != float("inf") else None,
+            "settled": settled, "neighbors_checked": getattr(first, "neighbors_checked", 0),
+            "relaxations": c.relaxations, "heap_pushes": c.pushes, "heap_pops": c.pops, "stale_pops": max(0, c.pops - settled),
+            "max_heap": c.max_heap, "time_ms": time_ms,
+        }
+        if samples:
+            rec["samples"] = samples
+        self._last = rec
+        if self.keep_records:
+            self.records.append(rec)
+
+        t = self.totals.setdefault(algorithm, Counter())
+        t["queries"] += 1
+        t["not_found"] += rec["cost"] is None
+        for key in _COUNTERS:
+            t[key] += rec[key]
+        t["max_heap"] = max(t["max_heap"], c.max_heap)
+        for name, ms in time_ms.items():
+            t[f"{name}_ms"] += ms
+        return res
+
+    @property
+    def last(self) -> Optional[Dict[str, Any]]:
+        return self._last
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Liczniki zbiorcze per algorytm + średnie na zapytanie."""
+        out = {}
+        for algorithm, t in self.totals.items():
+            n = t["queries"] or 1
+            row = dict(t)
+            row.update({f"mean_{k}": v / n for k, v in t.items() if k not in ("queries", "not_found", "max_heap")})
+            out[algorithm] = row
+        return out
+
+    def format_summary(self) -> str:
+        return "\n".join(
+            f"[Metryki] {alg}: {s['queries']} zapytań || |S| śr. {s['mean_settled']:.0f} || "
+            f"relaksacji śr. {s['mean_relaxations']:.0f} / sprawdzonych {s['mean_neighbors_checked']:.0f} || "
+            f"wstawień do kolejki śr. {s['mean_heap_pushes']:.0f} || "
+            f"nieaktualnych zdjęć śr. {s['mean_stale_pops']:.0f} || maks. kopiec {s['max_heap']} || "
+            f"wyszukiwanie śr. {s['mean_search_ms']:.2f} ms"
+            for alg, s in self.summary().items())
+
+    def flush(self) -> None:
+        """Dopisuje do `path` rekordy jeszcze niezapisane (JSON lines)."""
+        if not (self.enabled and self.path and self.keep_records):
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            for rec in self.records[self._written:]:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self._written = len(self.records)
+
+    def close(self) -> None:
+        """flush(); przy records=False zapisuje jedną linię liczników zbiorczych per algorytm."""
+        if not (self.enabled and self.path):
+            return
+        if self.keep_records:
+            self.flush()
+            return
+        with open(self.path, "a", encoding="utf-8") as f:
+            for algorithm, row in self.summary().items():
+                f.write(json.dumps({"ts": time.time(), "algorithm": algorithm, "aggregate": row},
+                                   ensure_ascii=False) + "\n")
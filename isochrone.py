@@ -0,0 +1,72 @@
+"""
+Izochrony / obszar obsługi: wszystko osiągalne z wierzchołka startowego w budżecie
+czasu [s] albo długości [m]. Jeden ograniczony Dijkstra do największego budżetu
+obsługuje od razu wiele budżetów (np. 5/10/15 min) - wierzchołki rozliczane są
+rosnąco po koszcie, więc zbiór dla mniejszego budżetu jest prefiksem kolejności.
+Wynik w postaci zwykłych tablic (array), bez arcpy.
+"""
+from array import array
+from bisect import bisect_right
+from heapq import heappush, heappop
+from typing import Dict, List, NamedTuple, Sequence
+
+from csr_graph import CSRGraph
+from routing import INF, METRICS, SPEED_KPH, metric_weights
+
+
+class Isochrone(NamedTuple):
+    budget: float
+    nodes: array        # 'i' osiągalne wierzchołki (rosnąco po koszcie)
+    costs: array        # 'd' koszt dojazdu do nodes[i]
+    edge_ids: array     # 'i' krawędzie przejechane w budżecie (całe albo częściowo)
+    fractions: array    # 'd' przejechana część krawędzi od id_from (1.0 = cała)
+
+
+def isochrones(graph: CSRGraph, start_vertex_id: int, budgets: Sequence[float],
+               metric: str = "time", weights=None,
+               speed_kph: Dict[str, float] = SPEED_KPH) -> List[Isochrone]:
+    """
+    Izochrony dla `budgets` (w jednostkach metryki) z jednego wyszukiwania.
+    Krawędź u -> v należy do izochrony B, gdy koszt(u) < B (albo jest cała w budżecie); fraction = min(1, (B - koszt(u)) / w).
+    `weights` - gotowy wektor kosztów per slot (inaczej liczony z metryki).
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Nieznana metryka: {metric}")
+    budgets = sorted(float(b) for b in budgets)
+    if not budgets:
+        raise ValueError("Podaj co najmniej jeden budżet izochrony")
+    if weights is None:
+        weights = metric_weights(graph, metric, speed_kph)
+    limit = budgets[-1]
+    offsets, targets, edge_ids = graph.offsets, graph.targets, graph.edge_ids
+
+    dist: Dict[int, float] = {start_vertex_id: 0.0}
+    order = array("i")
+    order_cost = array("d")
+    pq = [(0.0, start_vertex_id)]
+    while pq:
+        d, u = heappop(pq)
+        if d > dist[u]: continue
+        if d > limit: break
+        order.append(u); order_cost.append(d)
+        for s in range(offsets[u], offsets[u + 1]):
+            nd = d + weights[s]
+            if nd > limit: continue
+            v = targets[s]
+            if nd < dist.get(v, INF):
+                dist[v] = nd; heappush(pq, (nd, v))
+
+    result = []
+    for b in budgets:
+        n = bisect_right(order_cost, b)
+        eids = array("i"); fr = array("d")
+        for i in range(n):
+            u, du = order[i], order_cost[i]
+            left = b - du
+            for s in range(offsets[u], offsets[u + 1]):
+                w = weights[s]
+                if w == INF or (left == 0.0 and w > 0.0): continue   # węzeł dokładnie na granicy
+                eids.append(edge_ids[s])
+                fr.append(1.0 if w <= left else left / w)
+        result.append(Isochrone(b, order[:n], order_cost[:n], eids, fr))
+    return result
@@ -0,0 +1,64 @@
+import arcpy
+import os
+
+from gdb_graph import load_graph
+from isochrone import isochrones
+
+# Parametry
+nodes_fc  = arcpy.GetParameterAsText(0)
+edges_fc  = arcpy.GetParameterAsText(1)
+start_vid = int(arcpy.GetParameterAsText(2))
+budgets_txt = arcpy.GetParameterAsText(3)   # np. "5;10;15" (minuty albo metry)
+metric    = arcpy.GetParameterAsText(4) or "Czas [min]"  # "Czas [min]", "Długość [m]"
+gdb_path  = arcpy.GetParameterAsText(5)
+out_points = arcpy.GetParameterAsText(6)
+out_lines  = arcpy.GetParameterAsText(7)
+
+by_time = metric != "Długość [m]"
+unit = 60.0 if by_time else 1.0             # budżety w minutach -> sekundy
+budgets = [float(b.replace(",", ".")) for b in budgets_txt.replace(" ", ";").split(";") if b]
+if not budgets:
+    arcpy.AddError("Podaj co najmniej jeden budżet (np. 5;10;15)")
+    raise SystemExit
+
+graph, snap_path, signature = load_graph(nodes_fc, edges_fc)
+if not graph.has_vertex(start_vid):
+    arcpy.AddError(f"Brak węzła startowego: {start_vid}")
+    raise SystemExit
+
+result = isochrones(graph, start_vid, [b * unit for b in budgets], "time" if by_time else "length")
+for iso in result:
+    arcpy.AddMessage(f"[Izochrona {iso.budget / unit:g}] węzłów: {len(iso.nodes)} || "
+                     f"krawędzi: {len(iso.edge_ids)} (częściowych: {sum(1 for f in iso.fractions if f < 1.0)})")
+
+# Tworzymy output: punkty (osiągalne węzły) i linie (przejechane części krawędzi)
+sr = arcpy.Describe(nodes_fc).spatialReference
+for fc in (out_points, out_lines):
+    if fc and arcpy.Exists(fc):
+        arcpy.management.Delete(fc)
+
+if out_points:
+    arcpy.management.CreateFeatureclass(gdb_path, os.path.basename(out_points), "POINT", spatial_reference=sr)
+    arcpy.management.AddField(out_points, "node_id", "LONG")
+    arcpy.management.AddField(out_points, "cost", "DOUBLE")
+    arcpy.management.AddField(out_points, "budget", "DOUBLE")
+    with arcpy.da.InsertCursor(out_points, ["SHAPE@XY", "node_id", "cost", "budget"]) as cur:
+        for iso in result:
+            for vid, cost in zip(iso.nodes, iso.costs):
+                cur.insertRow([graph.vertex_xy(vid), vid, cost / unit, iso.budget / unit])
+    arcpy.AddMessage("Zapisano węzły izochron do: " + out_points)
+
+if out_lines:
+    arcpy.management.CreateFeatureclass(gdb_path, os.path.basename(out_lines), "POLYLINE", spatial_reference=sr)
+    arcpy.management.AddField(out_lines, "edge_id", "LONG")
+    arcpy.management.AddField(out_lines, "budget", "DOUBLE")
+    arcpy.management.AddField(out_lines, "fraction", "DOUBLE")
+    with arcpy.da.InsertCursor(out_lines, ["SHAPE@", "edge_id", "budget", "fraction"]) as cur:
+        for iso in result:
+            for eid, fr in zip(iso.edge_ids, iso.fractions):
+                x1, y1 = graph.vertex_xy(graph.edge_from(eid))
+                x2, y2 = graph.vertex_xy(graph.edge_to(eid))
+                end = arcpy.Point(x1 + (x2 - x1) * fr, y1 + (y2 - y1) * fr)
+                line = arcpy.Polyline(arcpy.Array([arcpy.Point(x1, y1), end]), sr)
+                cur.insertRow([line, eid, iso.budget / unit, fr])
+    arcpy.AddMessage("Zapisano krawędzie izochron do: " + out_lines)
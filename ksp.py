@@ -0,0 +1,138 @@
+"""
+k najkrótszych tras bez pętli (Yen) po długości albo czasie.
+
+Drzewo najkrótszych ścieżek wstecz do celu liczone jest raz; jego odległości to
+dokładna heurystyka dla wyszukiwań odgałęzień (spur): A* z h(v) = d(v, cel) idzie
+prosto wzdłuż drzewa, a po zablokowaniu krawędzi / wierzchołków korzenia h pozostaje
+dolnym ograniczeniem (dopuszczalne i spójne), więc wynik jest dokładny.
+
+Uruchomienie (bez arcpy):
+    python ksp.py graf.pag2graph 1 500 -k 10 --metric time
+"""
+from heapq import heappush, heappop
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+import argparse
+import time
+
+from alternatives import shortest_path_tree
+from csr_graph import CSRGraph
+from graph_snapshot import open_snapshot
+from priority_queues import exact_queue
+from profiles import load_profile
+from routing import INF, METRICS, SPEED_KPH, SearchResult, metric_weights
+from search_workspace import workspace_for, workspace_path
+
+
+def _spur_search(graph: CSRGraph, weights, h, spur: int, end_vertex_id: int,
+                 banned_nodes: Set[int], banned_slots: Set[int], queue: str = "heapq") -> Tuple[SearchResult, List[int]]:
+    """A* spur -> cel z h = odległości drzewa wstecz; (wynik, sloty trasy). `queue`: heapq / binary / 4ary."""
+    offsets, targets, edge_ids = graph.offsets, graph.targets, graph.edge_ids
+    ws = workspace_for(graph)
+    side = ws.fwd
+    g, pred, pred_slot, stamp = side.dist, side.pred, side.pred_edge, side.stamp   # pred_edge: slot
+    label = ws.begin(); done = label + 1
+    pq = exact_queue(ws, queue)
+    settled = neighbors_checked = 0
+
+    g[spur] = 0.0; stamp[spur] = label
+    pq.push(h[spur], spur)
+    while len(pq):
+        _, u = pq.pop()
+        if stamp[u] == done: continue
+        stamp[u] = done; settled += 1
+        if u == end_vertex_id: break
+        gu = g[u]
+        for s in range(offsets[u], offsets[u + 1]):
+            neighbors_checked += 1
+            v = targets[s]
+            hv = h[v]
+            sv = stamp[v]
+            if hv == INF or sv == done or v in banned_nodes or s in banned_slots: continue
+            tentative = gu + weights[s]
+            if tentative < INF and (sv != label or tentative < g[v]):
+                g[v] = tentative; pred[v] = u; pred_slot[v] = s; stamp[v] = label
+                pq.push(tentative + hv, v)
+
+    if stamp[end_vertex_id] < label:
+        return SearchResult([], [], INF, settled, neighbors_checked), []
+    nodes, slots = workspace_path(side, label, spur, end_vertex_id)
+    return (SearchResult(nodes, [edge_ids[s] for s in slots], g[end_vertex_id], settled, neighbors_checked),
+            slots)
+
+
+def k_shortest_paths(graph: CSRGraph, start_vertex_id: int, end_vertex_id: int, k: int,
+                     metric: str = "time", speed_kph: Dict[str, float] = SPEED_KPH,
+                     queue: str = "heapq") -> Iterator[SearchResult]:
+    """
+    Kolejne najkrótsze trasy bez pętli (rosnąco po koszcie), najwyżej `k`.
+    `queue` - kolejka wyszukiwań odgałęzień (heapq / binary / 4ary z priority_queues.QUEUES).
+    Generator - trasę i-tą można odebrać (i zmierzyć czas) przed liczeniem następnej.
+    settled / neighbors_checked: suma wyszukiwań wykonanych od poprzedniej trasy.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Nieznana metryka: {metric}")
+    exact_queue(workspace_for(graph), queue)        # zła kolejka - błąd przed pierwszą trasą, nie przy drugiej
+    weights = metric_weights(graph, metric, speed_kph)
+    tree = shortest_path_tree(graph, weights, end_vertex_id, reverse=True)
+    h = tree.dist
+    if k <= 0 or h[start_vertex_id] == INF:
+        return
+    settled, checked = tree.settled, tree.neighbors_checked
+
+    # pierwsza trasa wprost z drzewa wstecz
+    nodes, slots, cur = [start_vertex_id], [], start_vertex_id
+    while cur != end_vertex_id:
+        s = tree.parent[cur]
+        slots.append(s); cur = graph.targets[s]; nodes.append(cur)
+    found: List[Tuple[List[int], List[int]]] = [(nodes, slots)]
+    yield SearchResult(nodes, [graph.edge_ids[s] for s in slots], h[start_vertex_id], settled, checked)
+
+    candidates: List[Tuple[float, Tuple[int, ...], List[int], List[int]]] = []
+    seen: Set[Tuple[int, ...]] = {tuple(slots)}
+    while len(found) < k:
+        settled = checked = 0
+        prev_nodes, prev_slots = found[-1]
+        root_cost = 0.0
+        for i in range(len(prev_nodes) - 1):
+            spur = prev_nodes[i]
+            root_nodes = prev_nodes[:i + 1]
+            banned_slots = {p_slots[i] for p_nodes, p_slots in found if p_nodes[:i + 1] == root_nodes}
+            res, spur_slots = _spur_search(graph, weights, h, spur, end_vertex_id,
+                                           set(root_nodes[:-1]), banned_slots, queue)
+            settled += res.settled; checked += res.neighbors_checked
+            if res.cost != INF:
+                path_slots = prev_slots[:i] + spur_slots
+                key = tuple(path_slots)
+                if key not in seen:
+                    seen.add(key)
+                    heappush(candidates, (root_cost + res.cost, key, root_nodes[:-1] + res.nodes, path_slots))
+            root_cost += weights[prev_slots[i]]
+        if not candidates:
+            return
+        cost, _, nodes, slots = heappop(candidates)
+        found.append((nodes, slots))
+        yield SearchResult(nodes, [graph.edge_ids[s] for s in slots], cost, settled, checked)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="k najkrótszych tras (Yen) na snapshocie grafu")
+    ap.add_argument("snapshot", help="plik .pag2graph zapisany przez graph.py")
+    ap.add_argument("start", type=int)
+    ap.add_argument("end", type=int)
+    ap.add_argument("-k", type=int, default=5)
+    ap.add_argument("--metric", choices=METRICS, default="time")
+    ap.add_argument("--profile", default="car", help="profil prędkości: car, truck albo plik JSON")
+    ap.add_argument("--queue", choices=("heapq", "binary", "4ary"), default="heapq",
+                    help="kolejka priorytetowa wyszukiwań odgałęzień (priority_queues.py)")
+    args = ap.parse_args(argv)
+
+    graph = open_snapshot(args.snapshot)
+    t0 = time.perf_counter()
+    for i, res in enumerate(k_shortest_paths(graph, args.start, args.end, args.k, args.metric,
+                                             load_profile(args.profile), args.queue), 1):
+        print(f"[k={i}] koszt: {res.cost:.2f} || krawędzi: {len(res.edges)} || |S|: {res.settled} || "
+              f"czas od startu: {time.perf_counter() - t0:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+ALT (A*, Landmarks, Triangle inequality) - dolne ograniczenia odległości z landmarków.
+
+Dla landmarku L i celu t z nierówności trójkąta:
+    d(v, t) >= d(L, t) - d(L, v)     oraz     d(v, t) >= d(v, L) - d(t, L)
+Tablice d(L, ·) (forward) i d(·, L) (backward) liczone są raz na metrykę
+("length" / "time") i trzymane jako float32; heurystyka odejmuje margines błędu
+zaokrąglenia, więc pozostaje dopuszczalna.
+"""
+from array import array
+from heapq import heappush, heappop
+from typing import Callable, Dict, List, Optional, Sequence
+import random
+
+from csr_graph import CSRGraph
+from graph_snapshot import open_array_file, write_array_file
+from routing import INF, SPEED_KPH, METRICS, metric_weights
+
+STRATEGIES = ("farthest", "avoid")
+_EPS = 2.0 ** -23                # względny błąd zaokrąglenia float32 (z zapasem)
+
+
+class Landmarks:
+    """
+    Tablice odległości: fwd[v * k + i] = d(L_i, v), bwd[v * k + i] = d(v, L_i) (float32).
+    """
+
+    __slots__ = ("metric", "ids", "k", "fwd", "bwd")
+
+    def __init__(self, metric: str, ids: Sequence[int], fwd, bwd):
+        self.metric = metric
+        self.ids = array("i", ids)
+        self.k = len(self.ids)
+        self.fwd = fwd
+        self.bwd = bwd
+
+    def nbytes(self) -> int:
+        return (len(self.fwd) + len(self.bwd)) * 4 + len(self.ids) * 4
+
+    def heuristic(self, end_vertex_id: int, start_vertex_id: Optional[int] = None,
+                  active: int = 4) -> Callable[[int], float]:
+        """
+        h(v) - dolne ograniczenie d(v, end). Gdy podano start, używane jest `active`
+        landmarków dających najlepsze ograniczenie dla pary (start, end).
+        """
+        k, fwd, bwd = self.k, self.fwd, self.bwd
+        t = end_vertex_id * k
+        chosen = list(range(k))
+        if start_vertex_id is not None and 0 < active < k:
+            s = start_vertex_id * k
+
+            def bound(i: int) -> float:
+                a = fwd[t + i] - fwd[s + i]; b = bwd[s + i] - bwd[t + i]
+                return max(x for x in (a, b, 0.0) if x == x)   # NaN (inf - inf) pomijamy
+            chosen.sort(key=bound, reverse=True)
+            chosen = chosen[:active]
+        lo, hi = 1.0 - _EPS, 1.0 + _EPS
+        terms = [(i, fwd[t + i] * lo, bwd[t + i] * hi) for i in chosen]
+
+        def h(v: int) -> float:
+            base = v * k
+            best = 0.0
+            for i, d_lt, d_tl in terms:
+                x = d_lt - fwd[base + i] * hi
+                if x > best: best = x
+                x = bwd[base + i] * lo - d_tl
+                if x > best: best = x
+            return best
+        return h
+
+
+def _one_to_all(n: int, offsets, nbr, sources: Sequence[int]) -> array:
+    """Dijkstra z wielu źródeł po tablicach sąsiedztwa (nbr(slot) -> wierzchołek)."""
+    dist = array("d", [INF]) * n
+    pq = []
+    for s in sources:
+        dist[s] = 0.0; pq.append((0.0, s))
+    pq.sort()
+    while pq:
+        d, u = heappop(pq)
+        if d > dist[u]: continue
+        for i in range(offsets[u], offsets[u + 1]):
+            v, w = nbr(i)
+            nd = d + w
+            if nd < dist[v]:
+                dist[v] = nd; heappush(pq, (nd, v))
+    return dist
+
+
+class _Searcher:
+    """Dijkstra jeden-do-wszystkich w przód i wstecz dla jednej metryki."""
+
+    def __init__(self, graph: CSRGraph, weights: array):
+        self.n = graph.max_vid + 1
+        self.graph = graph
+        self.weights = weights
+        self.in_offsets, self.in_slots = graph.in_offsets, graph.in_slots
+
+    def forward(self, sources: Sequence[int]) -> array:
+        targets, weights = self.graph.targets, self.weights
+        return _one_to_all(self.n, self.graph.offsets, lambda i: (targets[i], weights[i]), sources)
+
+    def backward(self, sources: Sequence[int]) -> array:
+        src, slots, weights = self.graph.sources, self.in_slots, self.weights
+
+        def nbr(i):
+            s = slots[i]
+            return src[s], weights[s]
+        return _one_to_all(self.n, self.in_offsets, nbr, sources)
+
+
+def _select_farthest(graph: CSRGraph, search: _Searcher, k: int, rnd: random.Random) -> List[int]:
+    """Kolejny landmark = wierzchołek najdalszy (osiągalny) od już wybranych."""
+    vids = list(graph.vertex_ids())
+    chosen: List[int] = []
+    seed = [rnd.choice(vids)]
+    while len(chosen) < k:
+        dist = search.forward(chosen or seed)
+        far, far_d = -1, -1.0
+        for v in vids:
+            d = dist[v]
+            if d != INF and d > far_d and v not in chosen:
+                far, far_d = v, d
+        if far < 0 or far_d == 0.0:
+            break
+        chosen.append(far)
+    return chosen
+
+
+def _select_avoid(graph: CSRGraph, search: _Searcher, k: int, rnd: random.Random) -> List[int]:
+    """
+    Strategia "avoid" (Goldberg-Harrelson): z drzewa najkrótszych ścieżek losowego korzenia
+    waga(v) = d(r, v) - ALT(r, v); schodzimy do liścia o największej sumie wag w poddrzewie,
+    omijając poddrzewa zawierające landmarki.
+    """
+    vids = list(graph.vertex_ids())
+    n = graph.max_vid + 1
+    targets, weights, offsets = graph.targets, search.weights, graph.offsets
+    chosen: List[int] = _select_farthest(graph, search, 1, rnd)
+    tables = [(search.forward([chosen[0]]), search.backward([chosen[0]]))]
+
+    while len(chosen) < k:
+        root = rnd.choice(vids)
+        dist = search.forward([root])
+        # drzewo najkrótszych ścieżek (rodzic = pierwszy poprzednik realizujący dist)
+        parent = array("i", [-1]) * n
+        order = sorted((v for v in vids if dist[v] != INF), key=dist.__getitem__)
+        for u in order:
+            for i in range(offsets[u], offsets[u + 1]):
+                v = targets[i]
+                if parent[v] < 0 and v != root and dist[u] + weights[i] == dist[v]:
+                    parent[v] = u
+        size = array("d", [0.0]) * n
+        blocked = bytearray(n)
+        for L in chosen:
+            blocked[L] = 1
+        for v in order:
+            lb = 0.0
+            for fwd, bwd in tables:
+                x = fwd[v] - fwd[root]
+                y = bwd[root] - bwd[v]
+                lb = max(lb, x if x == x else 0.0, y if y == y else 0.0)
+            size[v] = dist[v] - lb
+        for v in reversed(order):          # od liści do korzenia
+            p = parent[v]
+            if p >= 0:
+                if blocked[v]: blocked[p] = 1
+                size[p] += size[v]
+        for v in order:
+            if blocked[v]: size[v] = 0.0
+        children: Dict[int, List[int]] = {}
+        for v in order:
+            if parent[v] >= 0:
+                children.setdefault(parent[v], []).append(v)
+        cur = root
+        while children.get(cur):
+            nxt = max(children[cur], key=size.__getitem__)
+            if size[nxt] <= 0.0: break
+            cur = nxt
+        if cur in chosen or (cur == root and size[cur] <= 0.0):
+            # brak sensownego kandydata -> uzupełnij strategią farthest
+            extra = [v for v in _select_farthest(graph, search, len(chosen) + 1, rnd) if v not in chosen]
+            if not extra: break
+            cur = extra[0]
+        chosen.append(cur)
+        tables.append((search.forward([cur]), search.backward([cur])))
+    return chosen
+
+
+def build_landmarks(graph: CSRGraph, metric: str = "time", k: int = 8, strategy: str = "avoid",
+                    seed: int = 1, speed_kph: Dict[str, float] = SPEED_KPH) -> Landmarks:
+    if metric not in METRICS:
+        raise ValueError(f"Nieznana metryka: {metric}")
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Nieznana strategia landmarków: {strategy}")
+    search = _Searcher(graph, metric_weights(graph, metric, speed_kph))
+    rnd = random.Random(seed)
+    select = _select_farthest if strategy == "farthest" else _select_avoid
+    ids = select(graph, search, k, rnd)
+
+    n, kk = graph.max_vid + 1, len(ids)
+    fwd = array("f", [INF]) * (n * kk)
+    bwd = array("f", [INF]) * (n * kk)
+    for i, L in enumerate(ids):
+        df, db = search.forward([L]), search.backward([L])
+        for v in range(n):
+            fwd[v * kk + i] = df[v]
+            bwd[v * kk + i] = db[v]
+    return Landmarks(metric, ids, fwd, bwd)
+
+
+def write_landmarks(lm: Landmarks, path: str, signature: bytes = b"") -> int:
+    return write_array_file(path, (("ids", "i", lm.ids), ("fwd", "f", lm.fwd), ("bwd", "f", lm.bwd)),
+                            METRICS.index(lm.metric), signature)
+
+
+def open_landmarks(path: str, expected_signature: Optional[bytes] = None) -> Optional[Landmarks]:
+    """Landmarki z pliku (mmap, zero-copy); None gdy brak albo nieaktualne."""
+    loaded = open_array_file(path, expected_signature)
+    if loaded is None:
+        return None
+    metric_idx, arrays = loaded
+    if any(name not in arrays for name in ("ids", "fwd", "bwd")) or metric_idx >= len(METRICS):
+        return None
+    return Landmarks(METRICS[metric_idx], arrays["ids"], arrays["fwd"], arrays["bwd"])
@@ -0,0 +1,151 @@
+"""
+Macierz kosztów wiele-do-wielu (źródła x cele) po długości albo czasie przejazdu.
+
+Dla każdego źródła jeden Dijkstra jeden-do-wielu zatrzymywany, gdy wszystkie cele
+są rozliczone. Źródła dzielone są między procesy puli; każdy proces mapuje ten sam
+snapshot grafu (.pag2graph), więc graf nie jest kopiowany ani serializowany.
+
+Uruchomienie (bez arcpy):
+    python od_matrix.py graf.pag2graph zrodla.txt cele.txt --metric time --out macierz.csv
+Pliki z id węzłów: jedno node_id w wierszu (pierwsza kolumna CSV, nagłówek pomijany).
+"""
+from array import array
+from heapq import heappush, heappop
+from multiprocessing import Pool
+from typing import Dict, List, Optional, Sequence, Tuple
+import argparse
+import csv
+import os
+import time
+
+from components import maybe_reachable
+from csr_graph import CSRGraph
+from graph_snapshot import open_array_file, open_snapshot, write_array_file
+from profiles import load_profile
+from routing import INF, METRICS, SPEED_KPH, metric_weights
+
+
+def one_to_many(graph: CSRGraph, weights, source: int, targets: Sequence[int]) -> List[float]:
+    """
+    Koszty source -> każdy z targets (INF = nieosiągalny); stop po rozliczeniu celów.
+    Cele wykluczone przez składowe (maybe_reachable) nie przedłużają przeszukiwania.
+    """
+    offsets, tg = graph.offsets, graph.targets
+    remaining = {t for t in targets if maybe_reachable(graph, source, t)}
+    dist: Dict[int, float] = {source: 0.0}
+    pq: List[Tuple[float, int]] = [(0.0, source)]
+    while pq and remaining:
+        d, u = heappop(pq)
+        if d > dist[u]: continue
+        remaining.discard(u)
+        for s in range(offsets[u], offsets[u + 1]):
+            nd = d + weights[s]
+            v = tg[s]
+            if nd < dist.get(v, INF):
+                dist[v] = nd; heappush(pq, (nd, v))
+    return [dist.get(t, INF) for t in targets]
+
+
+# --- pula procesów: każdy proces mapuje snapshot raz (initializer) ---
+_worker: Dict[str, object] = {}
+
+def _init_worker(snapshot_path: str, metric: str, targets: Sequence[int],
+                 speed_kph: Dict[str, float]) -> None:
+    graph = open_snapshot(snapshot_path)
+    _worker["graph"] = graph
+    _worker["weights"] = metric_weights(graph, metric, speed_kph)
+    _worker["targets"] = list(targets)
+
+def _worker_row(source: int) -> List[float]:
+    return one_to_many(_worker["graph"], _worker["weights"], source, _worker["targets"])
+
+
+def compute_matrix(sources: Sequence[int], targets: Sequence[int], metric: str = "time",
+                   graph: Optional[CSRGraph] = None, snapshot_path: Optional[str] = None,
+                   processes: int = 1, speed_kph: Dict[str, float] = SPEED_KPH) -> array:
+    """
+    Macierz kosztów (wiersz = źródło) jako array('d') o długości len(sources) * len(targets).
+    Dla processes > 1 wymagany jest snapshot_path (procesy mapują go same).
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Nieznana metryka: {metric}")
+    out = array("d")
+    if processes <= 1:
+        if graph is None:
+            graph = open_snapshot(snapshot_path)
+        weights = metric_weights(graph, metric, speed_kph)
+        for s in sources:
+            out.extend(one_to_many(graph, weights, s, targets))
+        return out
+
+    if snapshot_path is None:
+        raise ValueError("Dla puli procesów podaj snapshot_path grafu")
+    chunk = max(1, len(sources) // (processes * 8))
+    with Pool(processes, _init_worker, (snapshot_path, metric, list(targets), speed_kph)) as pool:
+        for row in pool.imap(_worker_row, sources, chunksize=chunk):
+            out.extend(row)
+    return out
+
+
+def write_matrix_csv(path: str, sources: Sequence[int], targets: Sequence[int], costs: array) -> None:
+    """CSV: pierwszy wiersz = id celów, dalej id źródła i koszty (puste pole = brak ścieżki)."""
+    n = len(targets)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["source"] + list(targets))
+        for i, s in enumerate(sources):
+            w.writerow([s] + ["" if c == INF else f"{c:.3f}" for c in costs[i * n:(i + 1) * n]])
+
+
+def write_matrix_bin(path: str, sources: Sequence[int], targets: Sequence[int], costs: array,
+                     metric: str) -> int:
+    """Binarnie w formacie snapshotu (graph_snapshot.open_array_file): sources, targets, costs."""
+    return write_array_file(path, (("sources", "i", array("i", sources)),
+                                   ("targets", "i", array("i", targets)),
+                                   ("costs", "d", costs)), METRICS.index(metric))
+
+
+def read_matrix_bin(path: str):
+    """(metric, sources, targets, costs) - tablice jako memoryview na pliku."""
+    loaded = open_array_file(path)
+    if loaded is None:
+        return None
+    metric_idx, arrays = loaded
+    return METRICS[metric_idx], arrays["sources"], arrays["targets"], arrays["costs"]
+
+
+def _read_ids(path: str) -> List[int]:
+    ids = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if row and row[0].strip().lstrip("-").isdigit():
+                ids.append(int(row[0]))
+    return ids
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Macierz kosztów wiele-do-wielu na snapshocie grafu")
+    ap.add_argument("snapshot", help="plik .pag2graph zapisany przez graph.py")
+    ap.add_argument("sources", help="plik z node_id źródeł")
+    ap.add_argument("targets", help="plik z node_id celów")
+    ap.add_argument("--metric", choices=METRICS, default="time")
+    ap.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--profile", default="car", help="profil prędkości (metric time): car, truck albo plik JSON")
+    ap.add_argument("--out", required=True, help="wynik: .csv albo plik binarny (inne rozszerzenie)")
+    args = ap.parse_args(argv)
+
+    sources, targets = _read_ids(args.sources), _read_ids(args.targets)
+    t0 = time.perf_counter()
+    costs = compute_matrix(sources, targets, args.metric, snapshot_path=args.snapshot,
+                           processes=args.processes, speed_kph=load_profile(args.profile))
+    dt = time.perf_counter() - t0
+    if args.out.lower().endswith(".csv"):
+        write_matrix_csv(args.out, sources, targets, costs)
+    else:
+        write_matrix_bin(args.out, sources, targets, costs, args.metric)
+    print(f"[Macierz] {len(sources)} x {len(targets)} ({args.metric}) w {dt:.2f} s "
+          f"({args.processes} proc.) -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
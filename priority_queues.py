@@ -0,0 +1,404 @@
+"""
+Kolejki priorytetowe do wyszukiwania tras, wybierane per zapytanie argumentem `queue` kerneli
+routing.py (dijkstra, a_star_length, a_star_speed, wersje dwukierunkowe), contraction.ch_query
+i ksp.k_shortest_paths; każdy workspace (search_workspace) trzyma po jednej kolejce danego typu.
+
+  heapq    - kopiec binarny z leniwym usuwaniem (domyślna): każda poprawa etykiety
+             to nowy wpis, stare zdejmowane później jako nieaktualne (stale pops);
+  binary / 4ary - kopiec indeksowany (2- albo 4-arny) z prawdziwym decrease-key: pozycja
+             wierzchołka w tablicy, poprawa etykiety przesuwa istniejący wpis - bez nieaktualnych
+             wpisów, kopiec nie większy niż liczba otwartych wierzchołków;
+  radix / dial - kolejki kubełkowe na kluczach całkowitych: klucz = floor(f / resolution)
+             (f = koszt + heurystyka, monotoniczny dla spójnej heurystyki). Radix: kubełki
+             wg najstarszego bitu różnicy z ostatnim zdjętym kluczem; Dial: kubełek na każdą
+             wartość klucza, kursor tylko rośnie. Szerokość kubełka w nazwie: "radix:0.5".
+
+Wewnątrz kubełka kolejność jest dowolna, więc wierzchołek może zostać rozliczony z etykietą
+gorszą najwyżej o `resolution`; lepsza etykieta otwiera go ponownie (resettled). Wyszukiwanie
+kończy się dopiero po opróżnieniu kubełka celu - koszt jest dokładny, jak z kopca. Kolejki
+kubełkowe obsługują tylko wyszukiwania jednokierunkowe routing.py: warunki stopu wyszukiwań
+dwukierunkowych, CH i odgałęzień Yena wymagają dokładnego minimum (exact_queue).
+
+Liczniki ostatniego zapytania w obiekcie kolejki (ws.queues): pushes, pops, max_size,
+resettled; compare_queues zbiera je po każdym zapytaniu (nieaktualne zdjęcia = zdjęcia - |S|).
+
+Uruchomienie (bez arcpy; porównanie kolejek na tym samym zbiorze par):
+    python priority_queues.py grid:200000 --queries 100 --metric time
+    python priority_queues.py graf.pag2graph --queues heapq,4ary,radix:5 --no-astar
+"""
+from array import array
+from heapq import heappop, heappush
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+import argparse
+import time
+
+from csr_graph import CSRGraph
+from profiles import DEFAULT_PROFILE, PROFILES, load_profile
+from search_workspace import INF, workspace_for
+
+# domyślna szerokość kubełka radix / dial: [s] dla czasu, [m] dla długości
+DEFAULT_RESOLUTION = {"time": 1.0, "length": 10.0}
+
+
+class QueueStats(NamedTuple):
+    pushes: int             # wstawienia i zmniejszenia klucza (udane relaksacje)
+    pops: int
+    stale_pops: int         # zdjęte wpisy wierzchołków już rozliczonych
+    max_size: int           # maks. liczba wpisów w kolejce
+    resettled: int          # ponowne rozliczenia (tylko radix / dial)
+
+
+class LazyHeap:
+    """heapq z leniwym usuwaniem - punkt odniesienia."""
+    __slots__ = ("heap", "pushes", "pops", "max_size", "resettled")
+    exact = True
+
+    def __init__(self, n: int = 0):
+        self.heap: List[Tuple[float, int]] = []
+        self.pushes = self.pops = self.max_size = self.resettled = 0
+
+    def grow(self, n: int) -> None:
+        pass
+
+    def clear(self) -> None:
+        self.heap = []
+        self.pushes = self.pops = self.max_size = self.resettled = 0
+
+    def push(self, key: float, v: int) -> None:
+        heap = self.heap
+        heappush(heap, (key, v))
+        self.pushes += 1
+        if len(heap) > self.max_size:
+            self.max_size = len(heap)
+
+    def pop(self) -> Tuple[float, int]:
+        self.pops += 1
+        return heappop(self.heap)
+
+    def min_key(self) -> float:
+        return self.heap[0][0]
+
+    def __len__(self) -> int:
+        return len(self.heap)
+
+
+class IndexedHeap:
+    """Kopiec d-arny z pozycją wierzchołka (pos[v] = indeks w kopcu, -1 = poza kopcem)."""
+    __slots__ = ("arity", "keys", "items", "pos", "pushes", "pops", "max_size", "resettled", "decreases")
+    exact = True
+
+    def __init__(self, n: int, arity: int = 4):
+        self.arity = arity
+        self.keys: List[float] = []
+        self.items: List[int] = []
+        self.pos = array("i", [-1]) * n
+        self.pushes = self.pops = self.max_size = self.resettled = 0
+        self.decreases = 0                  # push wierzchołka już w kopcu (bez nowego wpisu)
+
+    def grow(self, n: int) -> None:
+        if n > len(self.pos):
+            self.pos.extend(array("i", [-1]) * (n - len(self.pos)))
+
+    def clear(self) -> None:
+        pos = self.pos
+        for v in self.items:                # O(pozostałych wpisów), nie O(V)
+            pos[v] = -1
+        self.keys.clear(); self.items.clear()
+        self.pushes = self.pops = self.max_size = self.resettled = self.decreases = 0
+
+    def push(self, key: float, v: int) -> None:
+        """Wstawienie albo zmniejszenie klucza (większy klucz ignorowany)."""
+        keys, items, pos, d = self.keys, self.items, self.pos, self.arity
+        self.pushes += 1
+        i = pos[v]
+        if i < 0:
+            i = len(items)
+            keys.append(key); items.append(v)
+            if i >= self.max_size:
+                self.max_size = i + 1
+        else:
+            self.decreases += 1
+            if key >= keys[i]:
+                return
+        while i > 0:                        # w górę
+            p = (i - 1) // d
+            pk = keys[p]
+            if pk <= key: break
+            pv = items[p]
+            keys[i] = pk; items[i] = pv; pos[pv] = i
+            i = p
+        keys[i] = key; items[i] = v; pos[v] = i
+
+    def pop(self) -> Tuple[float, int]:
+        keys, items, pos, d = self.keys, self.items, self.pos, self.arity
+        self.pops += 1
+        key, v = keys[0], items[0]
+        pos[v] = -1
+        lk = keys.pop(); lv = items.pop()
+        n = len(keys)
+        if n:
+            i = 0                           # ostatni wpis w dół od korzenia
+            while True:
+                c = i * d + 1
+                if c >= n: break
+                m, mk = c, keys[c]
+                for j in range(c + 1, min(c + d, n)):
+                    if keys[j] < mk:
+                        m, mk = j, keys[j]
+                if mk >= lk: break
+                mv = items[m]
+                keys[i] = mk; items[i] = mv; pos[mv] = i
+                i = m
+            keys[i] = lk; items[i] = lv; pos[lv] = i
+        return key, v
+
+    def min_key(self) -> float:
+        return self.keys[0]
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+
+class RadixHeap:
+    """
+    Kolejka monotoniczna na kluczach całkowitych >= ostatnio zdjętego (65 kubełków wg bitów).
+    push przyjmuje koszt f i zamienia go na klucz floor(f * inv); target_key - klucz celu.
+    """
+    __slots__ = ("buckets", "last", "size", "inv", "target", "target_key",
+                 "pushes", "pops", "max_size", "resettled")
+    exact = False
+
+    def __init__(self, n: int = 0):
+        self.buckets: List[List[Tuple[int, int]]] = [[] for _ in range(65)]
+        self.inv = 1.0
+        self.target = -1
+        self.clear()
+
+    def grow(self, n: int) -> None:
+        pass
+
+    def clear(self) -> None:
+        for b in self.buckets:
+            b.clear()
+        self.last = self.size = 0
+        self.target_key = INF
+        self.pushes = self.pops = self.max_size = self.resettled = 0
+
+    def push(self, f: float, v: int) -> None:
+        k = int(f * self.inv)
+        if v == self.target:
+            self.target_key = k
+        if k < self.last:
+            k = self.last
+        self.buckets[(k ^ self.last).bit_length()].append((k, v))
+        self.pushes += 1
+        self.size += 1
+        if self.size > self.max_size:
+            self.max_size = self.size
+
+    def pop(self) -> Tuple[int, int]:
+        buckets = self.buckets
+        if not buckets[0]:
+            i = 1
+            while not buckets[i]: i += 1
+            bucket = buckets[i]
+            last = self.last = min(bucket)[0]
+            for item in bucket:             # rozdział na niższe kubełki względem nowego minimum
+                buckets[(item[0] ^ last).bit_length()].append(item)
+            bucket.clear()
+        self.pops += 1
+        self.size -= 1
+        return buckets[0].pop()
+
+    def __len__(self) -> int:
+        return self.size
+
+
+class DialQueue:
+    """
+    Kubełek na każdą wartość klucza całkowitego (tworzony przy pierwszym użyciu), kursor rosnący.
+    Klucze jak w RadixHeap: floor(f * inv), nie mniejsze niż kursor.
+    """
+    __slots__ = ("buckets", "cur", "size", "inv", "target", "target_key",
+                 "pushes", "pops", "max_size", "resettled")
+    exact = False
+
+    def __init__(self, n: int = 0):
+        self.buckets: List[Optional[List[int]]] = []
+        self.inv = 1.0
+        self.target = -1
+        self.clear()
+
+    def grow(self, n: int) -> None:
+        pass
+
+    def clear(self) -> None:
+        self.buckets = []
+        self.cur = self.size = 0
+        self.target_key = INF
+        self.pushes = self.pops = self.max_size = self.resettled = 0
+
+    def push(self, f: float, v: int) -> None:
+        k = int(f * self.inv)
+        if v == self.target:
+            self.target_key = k
+        if k < self.cur:
+            k = self.cur
+        buckets = self.buckets
+        if k >= len(buckets):
+            buckets.extend([None] * (k + 1 - len(buckets)))
+        b = buckets[k]
+        if b is None:
+            buckets[k] = [v]
+        else:
+            b.append(v)
+        self.pushes += 1
+        self.size += 1
+        if self.size > self.max_size:
+            self.max_size = self.size
+
+    def pop(self) -> Tuple[int, int]:
+        buckets, i = self.buckets, self.cur
+        while not buckets[i]: i += 1
+        self.cur = i
+        self.pops += 1
+        self.size -= 1
+        return i, buckets[i].pop()
+
+    def __len__(self) -> int:
+        return self.size
+
+
+QUEUES = {
+    "heapq": LazyHeap,
+    "binary": lambda n: IndexedHeap(n, 2),
+    "4ary": lambda n: IndexedHeap(n, 4),
+    "radix": RadixHeap,
+    "dial": DialQueue,
+}
+
+
+def _queue(ws, name: str, backward: bool = False):
+    """Kolejka `name` z ws.queues (jedna na kierunek), wyczyszczona."""
+    q = ws.queues.get((name, backward))
+    if q is None:
+        if name not in QUEUES:
+            raise ValueError(f"Nieznana kolejka: {name} (dostępne: {', '.join(QUEUES)})")
+        q = ws.queues[(name, backward)] = QUEUES[name](ws.n)
+    q.clear()
+    return q
+
+
+def parse_queue(spec: str) -> Tuple[str, Optional[float]]:
+    """'radix:0.5' -> ('radix', 0.5); 'heapq' -> ('heapq', None)."""
+    name, _, res = spec.partition(":")
+    if name not in QUEUES:
+        raise ValueError(f"Nieznana kolejka: {name} (dostępne: {', '.join(QUEUES)})")
+    if not res:
+        return name, None
+    try:
+        resolution = float(res)
+    except ValueError:
+        resolution = 0.0
+    if not resolution > 0.0:
+        raise ValueError(f"Szerokość kubełka musi być liczbą dodatnią: {spec}")
+    return name, resolution
+
+
+def open_queue(ws, spec: str, metric: str, target: int = -1, backward: bool = False):
+    """
+    Kolejka do wyszukiwania jednokierunkowego do `target`. Dla radix / dial ustawia szerokość
+    kubełka (z nazwy albo DEFAULT_RESOLUTION[metric]) i cel, którego klucz kończy wyszukiwanie.
+    """
+    name, resolution = parse_queue(spec)
+    q = _queue(ws, name, backward)
+    if not q.exact:
+        q.inv = 1.0 / (resolution or DEFAULT_RESOLUTION[metric])
+        q.target = target
+    return q
+
+
+def exact_queue(ws, spec: str, backward: bool = False):
+    """Kolejka z dokładnym minimum (heapq / binary / 4ary) - wyszukiwania dwukierunkowe i CH."""
+    name, _ = parse_queue(spec)
+    q = _queue(ws, name, backward)
+    if not q.exact:
+        raise ValueError(f"Kolejka {name} nie daje dokładnego minimum - użyj heapq, binary albo 4ary")
+    return q
+
+
+def compare_queues(graph: CSRGraph, pairs: Sequence[Tuple[int, int]], queues: Sequence[str],
+                   metric: str = "time", speed_kph: Dict[str, float] = PROFILES[DEFAULT_PROFILE],
+                   astar: bool = True) -> Dict[str, Dict[str, Any]]:
+    """
+    Te same pary kernelami routing.py (A* albo Dijkstra) z każdą kolejką: opóźnienia, |S|,
+    liczniki kolejki, niezgodne koszty (względem pierwszej).
+    """
+    import routing
+    from benchmark import _dist
+    if astar and metric == "time":
+        search = lambda s, t, q: routing.a_star_speed(graph, s, t, speed_kph=speed_kph, queue=q)
+    elif astar:
+        search = lambda s, t, q: routing.a_star_length(graph, s, t, queue=q)
+    else:
+        search = lambda s, t, q: routing.dijkstra(graph, s, t, metric, speed_kph, queue=q)
+    routing.metric_weights(graph, metric, speed_kph)
+    ws = workspace_for(graph)
+    results: Dict[str, Dict[str, Any]] = {}
+    reference: Optional[List[float]] = None
+    for spec in queues:
+        name, _ = parse_queue(spec)
+        latency, costs, stats, settled = [], [], [], []
+        for s, t in pairs:
+            q = _queue(ws, name)                # liczniki zerowe także dla par odrzuconych bez wyszukiwania
+            t0 = time.perf_counter()
+            res = search(s, t, spec)
+            latency.append((time.perf_counter() - t0) * 1000.0)
+            costs.append(res.cost); settled.append(res.settled)
+            stats.append(QueueStats(q.pushes, q.pops, max(0, q.pops - res.settled), q.max_size, q.resettled))
+        if reference is None:
+            reference = costs
+        results[spec] = {
+            "latency_ms": _dist(latency), "settled": _dist(settled),
+            "pushes": _dist([x.pushes for x in stats]), "stale_pops": _dist([x.stale_pops for x in stats]),
+            "max_size": _dist([x.max_size for x in stats]), "resettled": _dist([x.resettled for x in stats]),
+            "mismatches": sum(1 for a, b in zip(costs, reference) if abs(a - b) > 1e-6 * max(1.0, abs(b))),
+        }
+    return results
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Porównanie kolejek priorytetowych na tym samym zbiorze par")
+    ap.add_argument("graph", help="plik .pag2graph albo sieć syntetyczna 'grid:200000' / 'planar:50000'")
+    ap.add_argument("--queues", default=",".join(QUEUES),
+                    help=f"lista po przecinku; dostępne: {', '.join(QUEUES)}; szerokość kubełka "
+                         f"radix / dial po dwukropku, np. radix:0.5 (domyślnie 1 s / 10 m)")
+    ap.add_argument("--metric", choices=("length", "time"), default="time")
+    ap.add_argument("--no-astar", action="store_true", help="Dijkstra zamiast A*")
+    ap.add_argument("--profile", default="car", help="profil prędkości: car, truck albo plik JSON")
+    ap.add_argument("--queries", type=int, default=100)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    from benchmark import load_graph, query_pairs
+    names = [q.strip() for q in args.queues.split(",")]
+    for spec in names:
+        try:
+            parse_queue(spec)
+        except ValueError as e:
+            ap.error(str(e))
+    graph, _ = load_graph(args.graph, args.seed)
+    pairs = query_pairs(graph, args.queries, args.seed)
+    results = compare_queues(graph, pairs, names, args.metric, load_profile(args.profile), not args.no_astar)
+    print(f"[{'Dijkstra' if args.no_astar else 'A*'} / {args.metric}] |V|: {graph.n_vertices} || par: {len(pairs)}")
+    for name, r in results.items():
+        lat = r["latency_ms"]
+        print(f"[{name}] p50 {lat['p50']:.2f} ms || p90 {lat['p90']:.2f} ms || śr. {lat['mean']:.2f} ms || "
+              f"|S| śr. {r['settled']['mean']:.0f} || wstawienia śr. {r['pushes']['mean']:.0f} || "
+              f"nieaktualne śr. {r['stale_pops']['mean']:.0f} || kolejka maks. {r['max_size']['max']:.0f} || "
+              f"ponownie rozliczone śr. {r['resettled']['mean']:.1f}"
+              + (f" || NIEZGODNYCH KOSZTÓW: {r['mismatches']}" if r["mismatches"] else ""))
+
+
+if __name__ == "__main__":
+    main()
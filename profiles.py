@@ -0,0 +1,42 @@
+"""
+Profile prędkości (km/h per klasa drogi): wbudowane "car" / "truck" albo plik JSON.
+
+Plik JSON: {"name": "bus", "speed_kph": {"A": 100, "S": 100, "G": 50, ...}}
+albo sam słownik klas. Klasa "G" jest wymagana - brakujące klasy jadą jak "G".
+Tablice czasów per slot kompiluje routing.metric_weights (raz na graf i profil).
+"""
+from typing import Dict, Tuple
+import json
+import os
+
+PROFILES: Dict[str, Dict[str, float]] = {
+    "car":   {"A": 140, "S": 120, "GP": 90, "G": 50, "Z": 50, "L": 50, "D": 30, "I": 10},
+    "truck": {"A": 80, "S": 80, "GP": 70, "G": 50, "Z": 50, "L": 40, "D": 30, "I": 10},
+}
+DEFAULT_PROFILE = "car"
+
+
+def profile_key(speed_kph: Dict[str, float]) -> Tuple[Tuple[str, float], ...]:
+    """Klucz profilu (cache wag, podpisy CH/ALT) - zależy tylko od prędkości."""
+    return tuple(sorted((k, float(v)) for k, v in speed_kph.items()))
+
+
+def load_profile(spec: str = DEFAULT_PROFILE) -> Dict[str, float]:
+    """Nazwa wbudowanego profilu albo ścieżka do pliku JSON -> słownik prędkości."""
+    spec = (spec or DEFAULT_PROFILE).strip()
+    if spec in PROFILES:
+        return PROFILES[spec]
+    if not os.path.isfile(spec):
+        raise ValueError(f"Nieznany profil prędkości: {spec} (dostępne: {', '.join(PROFILES)} albo plik JSON)")
+    with open(spec, encoding="utf-8") as f:
+        data = json.load(f)
+    speeds = data.get("speed_kph", data) if isinstance(data, dict) else None
+    if not isinstance(speeds, dict) or "G" not in speeds:
+        raise ValueError(f"Profil {spec}: oczekiwano słownika klas z prędkością dla 'G'")
+    try:
+        speeds = {str(k): float(v) for k, v in speeds.items()}
+    except (TypeError, ValueError):
+        raise ValueError(f"Profil {spec}: prędkości muszą być liczbami") from None
+    if max(speeds.values()) <= 0:
+        raise ValueError(f"Profil {spec}: brak dodatniej prędkości")
+    return speeds
@@ -0,0 +1,234 @@
+"""
+Cache tras dla powtarzających się zapytań (np. z kilku baz / magazynów).
+
+Dwa poziomy, oba ważne tylko dla jednej wersji grafu (graph.version - po aktualizacji
+z graph_update.py cache jest czyszczony przy następnym zapytaniu):
+  * LRU wyników (start, koniec, metryka, profil) -> SearchResult, ograniczone liczbą tras;
+  * drzewa najkrótszych ścieżek per (start, metryka, profil): stan Dijkstry (odległości,
+    poprzedniki, odwiedzone, kopiec) zostaje po zapytaniu, więc kolejny cel z tego samego
+    startu tylko dokłada nieodwiedzone wierzchołki albo - gdy cel jest już w drzewie -
+    odtwarza trasę bez przeszukiwania. Drzewa ograniczone liczbą i pamięcią (LRU).
+Koszty tras są takie jak z routing.dijkstra / a_star_speed (przy remisach trasa może być inna
+niż z A*). Heurystyka A* zależy od celu, więc drzewa są zwykłym Dijkstrą.
+
+Uruchomienie (bez arcpy; porównanie z wyszukiwaniem od zera na tym samym zbiorze zapytań):
+    python route_cache.py grid:200000 --origins 5 --queries 2000
+    python route_cache.py graf.pag2graph --metric length --repeat 0.3
+"""
+from collections import OrderedDict
+from heapq import heappop, heappush
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import argparse
+import random
+import sys
+import time
+
+import routing
+from components import maybe_reachable
+from csr_graph import CSRGraph
+from profiles import load_profile, profile_key
+from routing import INF, SPEED_KPH, SearchResult
+
+
+class ShortestPathTree:
+    """Wznawialny Dijkstra z jednego startu: zapytania o kolejne cele kontynuują ten sam stan."""
+    __slots__ = ("origin", "dist", "pred", "pred_edge", "settled", "heap")
+
+    def __init__(self, origin: int):
+        self.origin = origin
+        self.dist: Dict[int, float] = {origin: 0.0}
+        self.pred: Dict[int, int] = {}
+        self.pred_edge: Dict[int, int] = {}      # v -> edge_id krawędzi pred[v] -> v
+        self.settled = set()
+        self.heap: List[Tuple[float, int]] = [(0.0, origin)]
+
+    def grow(self, graph: CSRGraph, weights, target: int) -> Tuple[int, int]:
+        """
+        Odwiedza wierzchołki do `target` włącznie (albo do wyczerpania kopca).
+        Zwraca (nowo odwiedzone, sprawdzeni sąsiedzi); (0, 0) gdy cel był już w drzewie.
+        Sąsiedzi wierzchołka są relaksowani przed sprawdzeniem celu - stan po przerwaniu
+        jest poprawnym stanem Dijkstry do wznowienia.
+        """
+        settled, heap, dist, pred, pred_edge = self.settled, self.heap, self.dist, self.pred, self.pred_edge
+        if target in settled:
+            return 0, 0
+        offsets, targets, edge_ids = graph.offsets, graph.targets, graph.edge_ids
+        before, checked = len(settled), 0
+        while heap:
+            du, u = heappop(heap)
+            if u in settled: continue
+            settled.add(u)
+            for s in range(offsets[u], offsets[u + 1]):
+                checked += 1
+                w = weights[s]
+                if w == INF: continue
+                v = targets[s]
+                if v in settled: continue
+                nd = du + w
+                if nd < dist.get(v, INF):
+                    dist[v] = nd; pred[v] = u; pred_edge[v] = edge_ids[s]; heappush(heap, (nd, v))
+            if u == target: break
+        return len(settled) - before, checked
+
+    def path(self, target: int) -> Tuple[List[int], List[int]]:
+        if target not in self.settled:
+            return [], []
+        nodes, eids, cur = [target], [], target
+        while cur != self.origin:
+            eids.append(self.pred_edge[cur]); cur = self.pred[cur]; nodes.append(cur)
+        nodes.reverse(); eids.reverse()
+        return nodes, eids
+
+    def nbytes(self) -> int:
+        """Przybliżenie: kontenery + krotki kopca (liczby całkowite i float w krotkach ~ 80 B)."""
+        return (sys.getsizeof(self.dist) + sys.getsizeof(self.pred) + sys.getsizeof(self.pred_edge)
+                + sys.getsizeof(self.settled) + sys.getsizeof(self.heap) + 80 * len(self.heap))
+
+
+def _result_bytes(res: SearchResult) -> int:
+    return sys.getsizeof(res) + sys.getsizeof(res.nodes) + sys.getsizeof(res.edges)
+
+
+class RouteCache:
+    """
+    LRU tras i drzew najkrótszych ścieżek dla jednego grafu; `route` zamiast routing.dijkstra
+    (metric="length") albo routing.a_star_speed (metric="time").
+    """
+
+    def __init__(self, graph: CSRGraph, max_routes: int = 10000, max_trees: int = 16,
+                 max_tree_bytes: int = 256 * 2 ** 20):
+        self.graph = graph
+        self.max_routes = max_routes
+        self.max_trees = max_trees
+        self.max_tree_bytes = max_tree_bytes
+        self.version = graph.version
+        self.routes: "OrderedDict[Tuple, SearchResult]" = OrderedDict()
+        self.trees: "OrderedDict[Tuple, ShortestPathTree]" = OrderedDict()
+        self._route_bytes = 0
+        self.counts = {"route_hits": 0, "tree_hits": 0, "tree_resumed": 0, "misses": 0, "invalidations": 0}
+
+    def clear(self) -> None:
+        self.routes.clear(); self.trees.clear()
+        self._route_bytes = 0
+
+    def _check_version(self) -> None:
+        if self.graph.version != self.version:
+            self.clear()
+            self.version = self.graph.version
+            self.counts["invalidations"] += 1
+
+    def route(self, start_vertex_id: int, end_vertex_id: int, metric: str = "time",
+              speed_kph: Dict[str, float] = SPEED_KPH) -> SearchResult:
+        """
+        Trasa z cache; `settled` / `neighbors_checked` wyniku to praca wykonana dla tego zapytania
+        (0 przy trafieniu w LRU tras albo w gotowe drzewo).
+        """
+        self._check_version()
+        prof = profile_key(speed_kph) if metric == "time" else ()
+        key = (start_vertex_id, end_vertex_id, metric, prof)
+        res = self.routes.get(key)
+        if res is not None:
+            self.routes.move_to_end(key)
+            self.counts["route_hits"] += 1
+            return res._replace(settled=0, neighbors_checked=0)
+
+        if not maybe_reachable(self.graph, start_vertex_id, end_vertex_id):
+            self.counts["misses"] += 1
+            return self._remember(key, SearchResult([], [], INF, 0, 0))
+        tree_key = (start_vertex_id, metric, prof)
+        tree = self.trees.get(tree_key)
+        if tree is None:
+            tree = self.trees[tree_key] = ShortestPathTree(start_vertex_id)
+            self.counts["misses"] += 1
+        else:
+            self.trees.move_to_end(tree_key)
+            self.counts["tree_hits" if end_vertex_id in tree.settled else "tree_resumed"] += 1
+        settled, checked = tree.grow(self.graph, routing.metric_weights(self.graph, metric, speed_kph), end_vertex_id)
+        nodes, eids = tree.path(end_vertex_id)
+        res = SearchResult(nodes, eids, tree.dist[end_vertex_id] if nodes else INF, settled, checked)
+        self._evict_trees()
+        return self._remember(key, res)
+
+    def _remember(self, key: Tuple, res: SearchResult) -> SearchResult:
+        self.routes[key] = res
+        self._route_bytes += _result_bytes(res)
+        while len(self.routes) > self.max_routes:
+            _, old = self.routes.popitem(last=False)
+            self._route_bytes -= _result_bytes(old)
+        return res
+
+    def _evict_trees(self) -> None:
+        """Najdawniej używane drzewa ponad limit liczby / pamięci (bieżące zostaje zawsze)."""
+        while len(self.trees) > 1 and (len(self.trees) > self.max_trees or self.tree_bytes() > self.max_tree_bytes):
+            self.trees.popitem(last=False)
+
+    def tree_bytes(self) -> int:
+        return sum(t.nbytes() for t in self.trees.values())
+
+    def stats(self) -> Dict[str, Any]:
+        c = self.counts
+        queries = c["route_hits"] + c["tree_hits"] + c["tree_resumed"] + c["misses"]
+        rate = lambda n: n / queries if queries else 0.0
+        return {**c, "queries": queries, "route_hit_rate": rate(c["route_hits"]),
+                "tree_hit_rate": rate(c["tree_hits"] + c["tree_resumed"]),
+                "routes": len(self.routes), "trees": len(self.trees),
+                "tree_vertices": sum(len(t.settled) for t in self.trees.values()),
+                "route_bytes": self._route_bytes, "tree_bytes": self.tree_bytes(),
+                "graph_version": self.version}
+
+    def format_stats(self) -> str:
+        s = self.stats()
+        return (f"zapytań {s['queries']} || trafienia LRU tras {s['route_hit_rate']:.1%} || drzewa {s['tree_hit_rate']:.1%} "
+                f"(gotowy cel {s['tree_hits']}, wznowione {s['tree_resumed']}) || od zera {s['misses']} || "
+                f"tras {s['routes']} ({s['route_bytes'] / 1e6:.1f} MB) || drzew {s['trees']}, "
+                f"{s['tree_vertices']} wierzchołków ({s['tree_bytes'] / 1e6:.1f} MB)")
+
+
+def depot_queries(graph: CSRGraph, origins: int, queries: int, repeat: float = 0.2,
+                  seed: int = 1) -> List[Tuple[int, int]]:
+    """`queries` par z `origins` stałych startów; z prawdopodobieństwem `repeat` - para już zadana."""
+    from benchmark import query_pairs
+    rng = random.Random(seed)
+    pool = query_pairs(graph, origins + queries, seed)
+    starts = [s for s, _ in pool[:origins]]
+    ends = [t for _, t in pool[origins:]]
+    pairs: List[Tuple[int, int]] = []
+    for t in ends:
+        pairs.append(rng.choice(pairs) if pairs and rng.random() < repeat else (rng.choice(starts), t))
+    return pairs
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Cache tras i drzew najkrótszych ścieżek - pomiar na zapytaniach z baz")
+    ap.add_argument("graph", help="plik .pag2graph albo sieć syntetyczna 'grid:200000' / 'planar:50000'")
+    ap.add_argument("--metric", choices=routing.METRICS, default="time")
+    ap.add_argument("--profile", default="car", help="profil prędkości: car, truck albo plik JSON")
+    ap.add_argument("--origins", type=int, default=5, help="liczba stałych startów (baz)")
+    ap.add_argument("--queries", type=int, default=1000)
+    ap.add_argument("--repeat", type=float, default=0.2, help="udział powtórzonych par")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    from benchmark import load_graph
+    graph, _ = load_graph(args.graph, args.seed)
+    speed_kph = load_profile(args.profile)
+    pairs = depot_queries(graph, args.origins, args.queries, args.repeat, args.seed)
+    search = ((lambda s, t: routing.a_star_speed(graph, s, t, speed_kph=speed_kph)) if args.metric == "time"
+              else (lambda s, t: routing.dijkstra(graph, s, t)))
+
+    t0 = time.perf_counter()
+    plain = [search(s, t) for s, t in pairs]
+    plain_s = time.perf_counter() - t0
+    cache = RouteCache(graph)
+    t0 = time.perf_counter()
+    cached = [cache.route(s, t, args.metric, speed_kph) for s, t in pairs]
+    cached_s = time.perf_counter() - t0
+    bad = sum(1 for a, b in zip(plain, cached) if abs(a.cost - b.cost) > 1e-6 * max(1.0, a.cost))
+    print(f"[Bez cache] {plain_s:.2f} s || |S| śr. {sum(r.settled for r in plain) / len(pairs):.0f}")
+    print(f"[Cache] {cached_s:.2f} s || |S| śr. {sum(r.settled for r in cached) / len(pairs):.0f} || "
+          f"x{plain_s / cached_s if cached_s else 0.0:.1f}" + (f" || NIEZGODNYCH KOSZTÓW: {bad}" if bad else ""))
+    print(f"[Cache] {cache.format_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,357 +1,326 @@
 import arcpy
-from heapq import heappush, heappop
-from collections import defaultdict
-import math
-from typing import List, Set, Tuple, Dict
+import os
+import time
+from typing import List, Optional, Tuple
+
+from batch_routing import ALGORITHMS as SERVICE_ALGORITHMS
+from gdb_graph import load_graph
+from graph_snapshot import fc_signature, source_signature
+from instrumentation import Instrumentation
+from routing_client import RoutingClient
+import routing
+from profiles import load_profile, profile_key
+from routing import SearchResult
+from alternatives import alternatives
+from ksp import k_shortest_paths
+from contraction import ContractionHierarchy, build_ch, ch_query, open_ch, write_ch
+from landmarks import Landmarks, build_landmarks, open_landmarks, write_landmarks
+from spatial_index import GridIndex
 
 # Parametry
 nodes_fc = arcpy.GetParameterAsText(0)
 edges_fc = arcpy.GetParameterAsText(1)
-start_vid = int(arcpy.GetParameterAsText(2))
-end_vid   = int(arcpy.GetParameterAsText(3))
-algorithm = arcpy.GetParameterAsText(4)  # "Dijkstra", "A* (długość)", "A* (prędkość)"
+start_txt = arcpy.GetParameterAsText(2)
+end_txt   = arcpy.GetParameterAsText(3)
+algorithm = arcpy.GetParameterAsText(4)  # "Dijkstra", "A* (długość)", "A* (prędkość)", "CH (prędkość)"
 gdb_path  = arcpy.GetParameterAsText(5)
 out_fc    = arcpy.GetParameterAsText(6)
-
-# Prędkości
-SPEED_KPH = {"A":140, "S":120, "GP":90, "G":50, "Z":50, "L":50, "D":30, "I":10}
-def _mps(kph): return kph * 1000.0 / 3600.0
-VMAX_MPS = _mps(max(SPEED_KPH.values()))
-
-#Wczytujemy graf z GDB
-vertices: Dict[int, Dict] = {}
-edges: Dict[int, Dict] = {}
-
-with arcpy.da.SearchCursor(nodes_fc, ["node_id", "SHAPE@XY"]) as cur:
-    for vid, (x, y) in cur:
-        vertices[vid] = {"x": x, "y": y, "edge_out": []}
-
-fields = ["edge_id", "id_from", "id_to", "length_m", "klasa", "kier", "jezdnia_oid"]
-with arcpy.da.SearchCursor(edges_fc, fields) as cur:
-    for (eid, u, v, length, cls, kier, oid) in cur:
-        # Struktura jak w main.py
-        edges[eid] = {
-            "id": eid,
-            "id_from": u,
-            "id_to": v,
-            "edge_length": length,
-            "edge_length_field": length,   # to samo co w main
-            "klasa": cls,                  # oryginalne pole z GDB
-            "klasa_drogi": cls,            # alias jak w main.py
-            "kier": kier,
-            "kier_auto": kier,             # alias kierunku
-            "jezdnia_oid": oid,            # alias jak w main.py
-        }
-        vertices[u]["edge_out"].append(eid)
-
-
-
-def _euclid(a: int, b: int) -> float:
-    dx = vertices[a]["x"] - vertices[b]["x"]
-    dy = vertices[a]["y"] - vertices[b]["y"]
-    return math.hypot(dx, dy)
-
-#Kierunek (bezpiecznik)
-def czy_dobry_kierunek(direction: int, id_from: int, id_to: int, current_vertex_id: int) -> bool:
-    if direction == 3: return False
-    if direction == 1: return current_vertex_id == id_from
-    if direction == 2: return current_vertex_id == id_to
-    return True
-
-#Rekonstrukcja ścieżki
-def reconstruct_path(predecessors, edge_to_vertex, start, goal):
-    path_nodes, path_edges, cur = [], [], goal
-    while cur is not None:
-        path_nodes.append(cur)
-        if cur in edge_to_vertex:
-            path_edges.append(edge_to_vertex[cur])
-        cur = predecessors[cur]
-    path_nodes.reverse(); path_edges.reverse()
-    if not path_nodes or path_nodes[0] != start:
-        return [], []
-    return path_nodes, path_edges
+heuristic_mode = arcpy.GetParameterAsText(7) or "Euklides"  # "Euklides", "ALT (landmarki)"
+start_point = arcpy.GetParameterAsText(8)  # "X Y" - zamiast node_id, przyciągany do najbliższego węzła
+end_point   = arcpy.GetParameterAsText(9)
+profile_spec = arcpy.GetParameterAsText(10) or "car"  # "car", "truck" albo ścieżka do pliku JSON
+alt_count   = int(arcpy.GetParameterAsText(11) or 3)            # alternatywy / k najkrótszych: liczba tras
+alt_overlap = float(arcpy.GetParameterAsText(12) or 60) / 100.0  # maks. pokrycie z inną trasą [%]
+alt_stretch = float(arcpy.GetParameterAsText(13) or 25) / 100.0  # maks. wydłużenie czasu [%]
+queue = arcpy.GetParameterAsText(14) or "heapq"  # kolejka priorytetowa (priority_queues.py); radix / dial - tylko jednokierunkowe
+
+try:
+    speed_kph = load_profile(profile_spec)
+except (OSError, ValueError) as e:
+    arcpy.AddError(str(e))
+    raise SystemExit
+# metryki zapytań (JSON lines) tylko gdy ustawiono PAG2GRAPH_METRICS - inaczej bez narzutu
+instr = Instrumentation.from_env()
+# pliki pochodne (CH, ALT czasu) osobno per profil - przełączenie nie nadpisuje innych
+profile_tag = "" if profile_spec == "car" else "_" + os.path.splitext(os.path.basename(profile_spec))[0]
+
+#Punkty X/Y -> najbliższy węzeł (indeks siatkowy budowany tylko gdy potrzebny)
+_index = None
+
+def snap_point(label: str, point_txt: str) -> int:
+    global _index
+    if _index is None:
+        _index = GridIndex(graph)
+    x, y = (float(c.replace(",", ".")) for c in point_txt.split()[:2])
+    vid, d = _index.nearest_node(x, y)
+    arcpy.AddMessage(f"[Przyciąganie] {label} ({x:.2f}, {y:.2f}) -> węzeł {vid} (odległość {d:.2f} m)")
+    return vid
+
+def resolve_vertex(label: str, vid_txt: str, point_txt: str) -> int:
+    if point_txt:
+        return snap_point(label, point_txt)
+    if not vid_txt:
+        arcpy.AddError(f"Podaj węzeł albo punkt: {label}")
+        raise SystemExit
+    return int(vid_txt)
+
+
+def _report(label: str, res: SearchResult, unit: str = "długość [m]") -> None:
+    arcpy.AddMessage(f"[{label}] węzły: {' -> '.join(map(str, res.nodes))}")
+    arcpy.AddMessage(f"[{label}] {unit}: {res.cost:.2f}")
+
+#ALT - tablice landmarków per metryka, liczone raz i zapisywane obok snapshotu
+def load_landmarks(metric: str) -> Landmarks:
+    lm_path = f"{snap_path}.alt_{metric}" + (profile_tag if metric == "time" else "")
+    lm_sig = source_signature([signature.hex(), metric, repr(profile_key(speed_kph))])
+    lm = open_landmarks(lm_path, lm_sig)
+    if lm is not None:
+        return lm
+    arcpy.AddMessage(f"[ALT] Brak landmarków ({metric}) dla tego grafu - preprocessing...")
+    lm = build_landmarks(graph, metric, speed_kph=speed_kph)
+    arcpy.AddMessage(f"[ALT] Landmarki: {list(lm.ids)} ({lm.nbytes() / 1e6:.1f} MB)")
+    try:
+        write_landmarks(lm, lm_path, lm_sig)
+    except OSError as e:
+        arcpy.AddWarning(f"Nie udało się zapisać landmarków: {e}")
+    return lm
+
+def _heuristic(metric: str, start_vertex_id: int, end_vertex_id: int):
+    if heuristic_mode != "ALT (landmarki)":
+        return None
+    return load_landmarks(metric).heuristic(end_vertex_id, start_vertex_id)
 
 #Dijkstra (po długości)
 def dijkstra(start_vertex_id: int, end_vertex_id: int) -> List[int]:
-    INF = float("inf")
-    dist: Dict[int, float] = defaultdict(lambda: INF)
-    pred: Dict[int, int] = defaultdict(lambda: None)
-    visited: Set[int] = set()
-    edge_to_vertex: Dict[int, int] = {}
-    neighbors_checked = 0
-
-    dist[start_vertex_id] = 0.0
-    pq: List[Tuple[float, int]] = [(0.0, start_vertex_id)]
-
-    while pq:
-        cur_d, u = heappop(pq)
-        if u in visited: continue
-        visited.add(u)
-        if u == end_vertex_id: break
-        for eid in vertices[u]["edge_out"]:
-            e = edges[eid]; v = e["id_to"]; neighbors_checked += 1
-            if not czy_dobry_kierunek(e["kier_auto"], e["id_from"], e["id_to"], u): continue
-            if v in visited: continue
-            nd = cur_d + e["edge_length_field"]
-            if nd < dist[v]:
-                dist[v] = nd; pred[v] = u; edge_to_vertex[v] = e["id"]; heappush(pq, (nd, v))
-
-    if dist[end_vertex_id] == INF:
+    res = instr.measure("Dijkstra", (start_vertex_id, end_vertex_id),
+                        routing.dijkstra, graph, start_vertex_id, end_vertex_id, queue=queue)
+    if not res.edges:
         arcpy.AddError("Brak ścieżki (Dijkstra)")
         return []
-
-    nodes, eids = reconstruct_path(pred, edge_to_vertex, start_vertex_id, end_vertex_id)
-    arcpy.AddMessage(f"[Dijkstra] węzły: {' -> '.join(map(str, nodes))}")
-    arcpy.AddMessage(f"[Dijkstra] długość [m]: {dist[end_vertex_id]:.2f}")
-    arcpy.AddMessage(f"[Dijkstra] |S|: {len(visited)} || sprawdzonych sąsiadów: {neighbors_checked}")
-    return eids
+    _report("Dijkstra", res)
+    arcpy.AddMessage(f"[Dijkstra] |S|: {res.settled} || sprawdzonych sąsiadów: {res.neighbors_checked}")
+    return res.edges
 
 #A* (po długości)
 def a_star_length(start_vertex_id: int, end_vertex_id: int) -> List[int]:
-    INF = float("inf")
-    g: Dict[int, float] = defaultdict(lambda: INF)
-    pred: Dict[int, int] = defaultdict(lambda: None)
-    visited: Set[int] = set()
-    neighbors_checked = 0
-    edge_to_vertex: Dict[int, int] = {}
-
-    g[start_vertex_id] = 0.0
-    pq_len: List[Tuple[float, int]] = []
-    heappush(pq_len, (_euclid(start_vertex_id, end_vertex_id), start_vertex_id))
-
-    while pq_len:
-        _, u = heappop(pq_len)
-        if u in visited: continue
-        visited.add(u)
-        if u == end_vertex_id: break
-        gu = g[u]
-        for eid in vertices[u]["edge_out"]:
-            e = edges[eid]
-            v = e["id_to"]
-            neighbors_checked += 1
-            if not czy_dobry_kierunek(e["kier_auto"], e["id_from"], e["id_to"], u):
-                continue
-            if v in visited: continue
-            tentative = gu + e["edge_length_field"]
-            if tentative < g[v]:
-                g[v] = tentative
-                pred[v] = u
-                edge_to_vertex[v] = e["id"]
-                f = tentative + _euclid(v, end_vertex_id)
-                heappush(pq_len, (f, v))
-
-    if g[end_vertex_id] == INF:
+    res = instr.measure("A* (długość)", (start_vertex_id, end_vertex_id),
+                        routing.a_star_length, graph, start_vertex_id, end_vertex_id,
+                        heuristic=_heuristic("length", start_vertex_id, end_vertex_id), queue=queue)
+    if not res.edges:
         arcpy.AddError("Brak ścieżki (A* długość)")
         return []
-
-    nodes, eids = reconstruct_path(pred, edge_to_vertex, start_vertex_id, end_vertex_id)
-    arcpy.AddMessage(f"[A* długość] węzły: {' -> '.join(map(str, nodes))}")
-    arcpy.AddMessage(f"[A* długość] długość [m]: {g[end_vertex_id]:.2f}")
-    arcpy.AddMessage(f"[A* długość] |S|: {len(visited)} || sprawdzonych sąsiadów: {neighbors_checked}")
-    return eids
+    _report("A* długość", res)
+    arcpy.AddMessage(f"[A* długość] |S|: {res.settled} || sprawdzonych sąsiadów: {res.neighbors_checked}")
+    return res.edges
 
 # ─── A* (po czasie / prędkości)
 def a_star_speed(start_vertex_id: int, end_vertex_id: int) -> List[int]:
-    """
-    Minimalizuje czas przejazdu: cost(edge) = length / speed(klasa_drogi).
-    Heurystyka: Euclid / VMAX_MPS (admissible i consistent) => zachowuje optymalność.
-    """
-    INF = float("inf")
-    g_time: Dict[int, float] = defaultdict(lambda: INF)   # sekundy
-    pred: Dict[int, int] = defaultdict(lambda: None)
-    visited: Set[int] = set()
-    neighbors_checked = 0
-    edge_to_vertex: Dict[int, int] = {}
-
-    g_time[start_vertex_id] = 0.0
-    pq: List[Tuple[float, int]] = []
-    heappush(pq, (_euclid(start_vertex_id, end_vertex_id) / VMAX_MPS, start_vertex_id))
-
-    while pq:
-        _, u = heappop(pq)
-        if u in visited:
-            continue
-        visited.add(u)
-        if u == end_vertex_id:
-            break
-
-        gu = g_time[u]
-        for eid in vertices[u]["edge_out"]:
-            e = edges[eid]
-            v = e["id_to"]
-            neighbors_checked += 1
-            if not czy_dobry_kierunek(e["kier_auto"], e["id_from"], e["id_to"], u):
-                continue
-            if v in visited:
-                continue
-
-            # czas na krawędzi
-            cls = e.get("klasa_drogi", "G")
-            v_mps = _mps(SPEED_KPH.get(cls, SPEED_KPH["G"]))
-            if v_mps <= 0:
-                continue
-            travel = e["edge_length_field"] / v_mps  # sekundy
-
-            tentative = gu + travel
-            if tentative < g_time[v]:
-                g_time[v] = tentative
-                pred[v] = u
-                edge_to_vertex[v] = e["id"]
-                h = _euclid(v, end_vertex_id) / VMAX_MPS
-                f = tentative + h
-                heappush(pq, (f, v))
-
-    if g_time[end_vertex_id] == INF:
+    res = instr.measure("A* (prędkość)", (start_vertex_id, end_vertex_id),
+                        routing.a_star_speed, graph, start_vertex_id, end_vertex_id, speed_kph=speed_kph,
+                        heuristic=_heuristic("time", start_vertex_id, end_vertex_id), queue=queue)
+    if not res.edges:
         arcpy.AddError("Brak ścieżki (A* prędkość)")
         return []
-
-    nodes, eids = reconstruct_path(pred, edge_to_vertex, start_vertex_id, end_vertex_id)
-    total_len = sum(edges[eid]["edge_length_field"] for eid in eids)
-    arcpy.AddMessage(f"[A* prędkość] węzły: {' -> '.join(map(str, nodes))}")
-    arcpy.AddMessage(f"[A* prędkość] czas [s]: {g_time[end_vertex_id]:.2f}")
+    total_len = sum(graph.edge_length(eid) for eid in res.edges)
+    _report("A* prędkość", res, "czas [s]")
     arcpy.AddMessage(f"[A* prędkość] długość [m]: {total_len:.2f}")
-    arcpy.AddMessage(f"[A* prędkość] |S|: {len(visited)} || sprawdzonych sąsiadów: {neighbors_checked}")
-    return eids
-
-
-#Trasa alternatywna
-def alternative_route(start_vertex_id: int, end_vertex_id: int, penalty_factor: float = 1.2) -> List[int]:
-    """
-    Wyznacza trasę alternatywną metodą kary kosztowej:
-    1. Znajduje najszybszą trasę A*.
-    2. Mnoży koszt każdej krawędzi tej trasy przez penalty_factor.
-    3. Oblicza trasę ponownie -> otrzymujemy alternatywę.
-    """
-    arcpy.AddMessage("\n[Alternatywa] 1. Szukanie trasy podstawowej (A* prędkość)...")
-    primary_edges = a_star_speed(start_vertex_id, end_vertex_id)
-
-    if not primary_edges:
-        arcpy.AddError("[Alternatywa] Brak trasy podstawowej – nie mogę wyznaczyć alternatywy.")
+    arcpy.AddMessage(f"[A* prędkość] |S|: {res.settled} || sprawdzonych sąsiadów: {res.neighbors_checked}")
+    return res.edges
+
+
+#Wersje dwukierunkowe (bez preprocessingu, sąsiedztwo wsteczne z grafu)
+BIDIRECTIONAL = {
+    "Dijkstra dwukierunkowy": (routing.bidirectional_dijkstra, "długość [m]"),
+    "A* dwukierunkowy (długość)": (routing.bidirectional_a_star_length, "długość [m]"),
+    "A* dwukierunkowy (prędkość)": (routing.bidirectional_a_star_speed, "czas [s]"),
+}
+
+def bidirectional(label: str, start_vertex_id: int, end_vertex_id: int) -> List[int]:
+    search, unit = BIDIRECTIONAL[label]
+    args = (graph, start_vertex_id, end_vertex_id)
+    if search is routing.bidirectional_a_star_speed:
+        args += (speed_kph,)
+    res = instr.measure(label, (start_vertex_id, end_vertex_id), search, *args, queue=queue)
+    if not res.edges:
+        arcpy.AddError(f"Brak ścieżki ({label})")
         return []
+    _report(label, res, unit)
+    arcpy.AddMessage(f"[{label}] |S|: {res.settled} || sprawdzonych sąsiadów: {res.neighbors_checked}")
+    return res.edges
+
+#Contraction Hierarchies (czas) - hierarchia liczona raz i zapisywana obok snapshotu
+def load_ch() -> ContractionHierarchy:
+    ch_path = snap_path + profile_tag + ".ch"
+    ch_sig = source_signature([signature.hex(), repr(profile_key(speed_kph))])
+    ch = open_ch(ch_path, ch_sig)
+    if ch is not None:
+        return ch
+    arcpy.AddMessage("[CH] Brak hierarchii dla tego grafu - preprocessing...")
+    ch = build_ch(graph, speed_kph)
+    arcpy.AddMessage(f"[CH] Preprocessing: {ch.preprocess_s:.1f} s, skrótów: {ch.n_shortcuts} "
+                     f"(krawędzi grafu: {graph.n_edges})")
+    try:
+        write_ch(ch, ch_path, ch_sig)
+    except OSError as e:
+        arcpy.AddWarning(f"Nie udało się zapisać hierarchii CH: {e}")
+    return ch
+
+def ch_speed(start_vertex_id: int, end_vertex_id: int) -> List[int]:
+    res = instr.measure("CH (prędkość)", (start_vertex_id, end_vertex_id),
+                        ch_query, load_ch(), graph, start_vertex_id, end_vertex_id, queue=queue)
+    if not res.edges:
+        arcpy.AddError("Brak ścieżki (CH prędkość)")
+        return []
+    total_len = sum(graph.edge_length(eid) for eid in res.edges)
+    _report("CH prędkość", res, "czas [s]")
+    arcpy.AddMessage(f"[CH prędkość] długość [m]: {total_len:.2f}")
+    arcpy.AddMessage(f"[CH prędkość] |S|: {res.settled} || sprawdzonych sąsiadów: {res.neighbors_checked}")
+    return res.edges
+
+
+#Trasy alternatywne (plateau / via-node) - dwa drzewa najkrótszych ścieżek, graf bez zmian
+def alternative_routes(start_vertex_id: int, end_vertex_id: int) -> List[List[int]]:
+    routes = instr.measure(algorithm, (start_vertex_id, end_vertex_id),
+                           alternatives, graph, start_vertex_id, end_vertex_id, k=alt_count, metric="time",
+                           max_stretch=alt_stretch, max_overlap=alt_overlap, speed_kph=speed_kph)
+    if not routes:
+        arcpy.AddError("Brak ścieżki (alternatywy)")
+        return []
+    best = routes[0].cost
+    for i, res in enumerate(routes, 1):
+        total_len = sum(graph.edge_length(eid) for eid in res.edges)
+        arcpy.AddMessage(f"[Alternatywa {i}] czas [s]: {res.cost:.2f} (+{(res.cost / best - 1) * 100:.1f}%) || "
+                         f"długość [m]: {total_len:.2f} || krawędzi: {len(res.edges)}")
+    arcpy.AddMessage(f"[Alternatywy] |S|: {routes[0].settled} || sprawdzonych sąsiadów: {routes[0].neighbors_checked}")
+    if len(routes) < alt_count:
+        arcpy.AddWarning(f"[Alternatywy] Znaleziono {len(routes)} z {alt_count} tras "
+                         f"(limity: objazd {alt_stretch:.0%}, pokrycie {alt_overlap:.0%})")
+    return [res.edges for res in routes]
+
+#k najkrótszych tras bez pętli (Yen), czas per k w komunikatach
+K_SHORTEST = {"k najkrótszych (długość)": ("length", "długość [m]"),
+              "k najkrótszych (prędkość)": ("time", "czas [s]")}
+
+def k_shortest(label: str, start_vertex_id: int, end_vertex_id: int) -> List[List[int]]:
+    metric, unit = K_SHORTEST[label]
+    t0 = time.perf_counter()
+    def collect() -> List[SearchResult]:
+        found = []
+        for i, res in enumerate(k_shortest_paths(graph, start_vertex_id, end_vertex_id, alt_count, metric,
+                                                 speed_kph, queue), 1):
+            arcpy.AddMessage(f"[k={i}] {unit}: {res.cost:.2f} || krawędzi: {len(res.edges)} || |S|: {res.settled} "
+                             f"|| sprawdzonych sąsiadów: {res.neighbors_checked} || {time.perf_counter() - t0:.3f} s")
+            found.append(res)
+        return found
+    routes = [res.edges for res in instr.measure(label, (start_vertex_id, end_vertex_id), collect)]
+    if not routes:
+        arcpy.AddError(f"Brak ścieżki ({label})")
+    elif len(routes) < alt_count:
+        arcpy.AddWarning(f"[{label}] Istnieje tylko {len(routes)} tras bez pętli")
+    return routes
 
-    # koszt podstawowy (czas)
-    base_cost = sum(
-        edges[eid]["edge_length_field"] / _mps(SPEED_KPH.get(edges[eid]["klasa_drogi"], SPEED_KPH["G"]))
-        for eid in primary_edges
-    )
-
-    arcpy.AddMessage(f"[Alternatywa] Koszt podstawowy (czas): {base_cost:.2f} s")
-    target_min_cost = base_cost * penalty_factor
-    arcpy.AddMessage(f"[Alternatywa] Cel (po karze): {target_min_cost:.2f} s (penalty_factor={penalty_factor:.2f})")
-
-    # 1) dodajemy karę czasową na krawędzie trasy pierwotnej
-    penalty_backup = {}
-
-    for eid in primary_edges:
-        e = edges[eid]
-        cls = e["klasa_drogi"]
-        v_mps = _mps(SPEED_KPH.get(cls, SPEED_KPH["G"]))
-        travel = e["edge_length_field"] / v_mps
-
-        penalty_backup[eid] = travel
-        penalty_travel = travel * penalty_factor
-
-        # zapisujemy zmodyfikowany czas
-        edges[eid]["__penalty_cost"] = penalty_travel
-
-    # 2) wykonujemy A* z wykorzystaniem zmodyfikowanych kosztów
-    arcpy.AddMessage("[Alternatywa] 2. Obliczanie trasy alternatywnej...")
-    alt_edges = a_star_speed_with_penalty(start_vertex_id, end_vertex_id)
-
-    # 3) przywracamy oryginalne koszty
-    for eid in primary_edges:
-        if "__penalty_cost" in edges[eid]:
-            del edges[eid]["__penalty_cost"]
-
-    if not alt_edges:
-        arcpy.AddWarning("[Alternatywa] Nie udało się znaleźć trasy alternatywnej.")
+# Wybór algorytmu
+def find_routes(start_vid: int, end_vid: int) -> List[List[int]]:
+    try:
+        routes = _dispatch(start_vid, end_vid)
+    except ValueError as e:                             # np. kolejka kubełkowa z wyszukiwaniem dwukierunkowym
+        arcpy.AddError(str(e))
+        raise SystemExit
+    return [r for r in routes if r]
+
+def _dispatch(start_vid: int, end_vid: int) -> List[List[int]]:
+    if algorithm == "Dijkstra":
+        routes = [dijkstra(start_vid, end_vid)]
+    elif algorithm == "A* (długość)":
+        routes = [a_star_length(start_vid, end_vid)]
+    elif algorithm == "A* (prędkość)":
+        routes = [a_star_speed(start_vid, end_vid)]
+    elif algorithm in BIDIRECTIONAL:
+        routes = [bidirectional(algorithm, start_vid, end_vid)]
+    elif algorithm == "CH (prędkość)":
+        routes = [ch_speed(start_vid, end_vid)]
+    elif algorithm == "A* (prędkość – alternatywa)":
+        routes = alternative_routes(start_vid, end_vid)
+    elif algorithm in K_SHORTEST:
+        routes = k_shortest(algorithm, start_vid, end_vid)
     else:
-        arcpy.AddMessage(f"[Alternatywa] Znaleziono trasę alternatywną. Liczba krawędzi: {len(alt_edges)}")
-
-    return alt_edges
-
-def a_star_speed_with_penalty(start_vertex_id: int, end_vertex_id: int) -> List[int]:
-    INF = float("inf")
-    g_time: Dict[int, float] = defaultdict(lambda: INF)
-    pred: Dict[int, int] = defaultdict(lambda: None)
-    visited: Set[int] = set()
-    edge_to_vertex: Dict[int, int] = {}
-    neighbors_checked = 0
-
-    g_time[start_vertex_id] = 0.0
-    pq: List[Tuple[float, int]] = []
-    heappush(pq, (_euclid(start_vertex_id, end_vertex_id) / VMAX_MPS, start_vertex_id))
-
-    while pq:
-        _, u = heappop(pq)
-        if u in visited:
-            continue
-        visited.add(u)
-        if u == end_vertex_id:
-            break
-
-        gu = g_time[u]
-        for eid in vertices[u]["edge_out"]:
-            e = edges[eid]
-            v = e["id_to"]
-            neighbors_checked += 1
-            if not czy_dobry_kierunek(e["kier_auto"], e["id_from"], e["id_to"], u):
-                continue
-            if v in visited:
-                continue
-
-            # koszt standardowy
-            cls = e.get("klasa_drogi", "G")
-            v_mps = _mps(SPEED_KPH.get(cls, SPEED_KPH["G"]))
-            base_time = e["edge_length_field"] / v_mps
-
-            # jeśli istnieje kara – użyj jej
-            travel = e.get("__penalty_cost", base_time)
-
-            tentative = gu + travel
-            if tentative < g_time[v]:
-                g_time[v] = tentative
-                pred[v] = u
-                edge_to_vertex[v] = eid
-                h = _euclid(v, end_vertex_id) / VMAX_MPS
-                heappush(pq, (tentative + h, v))
-
-    if g_time[end_vertex_id] == INF:
-        arcpy.AddError("Brak ścieżki (A* prędkość z karą)")
+        arcpy.AddError(f"Nieznany algorytm: {algorithm}")
+        raise SystemExit
+    return routes
+
+def route_xy(path_eids: List[int]) -> List[Tuple[float, float]]:
+    xy = [graph.vertex_xy(graph.edge_from(eid)) for eid in path_eids]
+    xy.append(graph.vertex_xy(graph.edge_to(path_eids[-1])))
+    return xy
+
+
+#Serwis tras (routing_service.py) - graf trzymany w pamięci, tu bez wczytywania grafu
+def remote_routes() -> Optional[List[List[Tuple[float, float]]]]:
+    """Geometrie tras z serwisu; None = serwis nieustawiony / niedostępny / inny graf / algorytm tylko lokalny."""
+    client = RoutingClient.from_env()
+    if client is None or algorithm not in SERVICE_ALGORITHMS or heuristic_mode == "ALT (landmarki)":
+        return None
+    try:
+        health = client.health()
+        if health["signature"] != fc_signature([nodes_fc, edges_fc]).hex():
+            arcpy.AddWarning(f"[Serwis] Serwis liczy na innym grafie ({health['snapshot']}) - liczenie lokalne")
+            return None
+        vids = []
+        for label, vid_txt, point_txt in (("start", start_txt, start_point), ("koniec", end_txt, end_point)):
+            if point_txt:
+                x, y = (float(c.replace(",", ".")) for c in point_txt.split()[:2])
+                hit = client.nearest(x, y)[0]
+                arcpy.AddMessage(f"[Przyciąganie] {label} ({x:.2f}, {y:.2f}) -> węzeł {hit['node_id']} "
+                                 f"(odległość {hit['distance']:.2f} m)")
+                vids.append(hit["node_id"])
+            elif not vid_txt:
+                return None                             # komunikat błędu jak przy liczeniu lokalnym
+            else:
+                vids.append(int(vid_txt))
+        res = client.route(vids[0], vids[1], algorithm, profile_spec, geometry=True, queue=queue)
+    except OSError as e:
+        arcpy.AddWarning(f"[Serwis] Serwis tras niedostępny ({e}) - liczenie lokalne")
+        return None
+    except ValueError as e:
+        arcpy.AddError(str(e))
+        raise SystemExit
+    if res["cost"] is None:
+        arcpy.AddError(f"Brak ścieżki ({algorithm})")
         return []
+    unit = "czas [s]" if res["unit"] == "s" else "długość [m]"
+    arcpy.AddMessage(f"[{algorithm}] węzły: {' -> '.join(map(str, res['nodes']))}")
+    arcpy.AddMessage(f"[{algorithm}] {unit}: {res['cost']:.2f} || długość [m]: {res['length']:.2f}")
+    arcpy.AddMessage(f"[{algorithm}] |S|: {res['settled']} || sprawdzonych sąsiadów: {res['neighbors_checked']} "
+                     f"|| serwis: {client.url}")
+    return [res["geometry"]]
 
-    nodes, eids = reconstruct_path(pred, edge_to_vertex, start_vertex_id, end_vertex_id)
-    arcpy.AddMessage(f"[A* prędkość z karą] czas [s]: {g_time[end_vertex_id]:.2f}")
-    arcpy.AddMessage(f"[A* prędkość z karą] |S|: {len(visited)} || sprawdzonych sąsiadów: {neighbors_checked}")
-    return eids
 
-# Wybór algorytmu
-if algorithm == "Dijkstra":
-    path_eids = dijkstra(start_vid, end_vid)
-elif algorithm == "A* (długość)":
-    path_eids = a_star_length(start_vid, end_vid)
-elif algorithm == "A* (prędkość)":
-    path_eids = a_star_speed(start_vid, end_vid)
-elif algorithm == "A* (prędkość – alternatywa)":
-    path_eids = alternative_route(start_vid, end_vid, penalty_factor=1.2)
-else:
-    arcpy.AddError(f"Nieznany algorytm: {algorithm}")
-    raise SystemExit
+routes_xy = remote_routes()
+if routes_xy is None:
+    with instr.phase("load"):
+        graph, snap_path, signature = load_graph(nodes_fc, edges_fc)
+    start_vid = resolve_vertex("start", start_txt, start_point)
+    end_vid   = resolve_vertex("koniec", end_txt, end_point)
+    routes_xy = [route_xy(r) for r in find_routes(start_vid, end_vid)]
 
 
 # Tworzymy output polyline
-sr = arcpy.Describe(nodes_fc).spatialReference
-if arcpy.Exists(out_fc):
-    arcpy.management.Delete(out_fc)
-
-arcpy.management.CreateFeatureclass(gdb_path, out_fc.split("\\")[-1], "POLYLINE", spatial_reference=sr)
-with arcpy.da.InsertCursor(out_fc, ["SHAPE@"]) as cur:
-    arr = arcpy.Array()
-    for eid in path_eids:
-        u = vertices[edges[eid]["id_from"]]
-        arr.add(arcpy.Point(u["x"], u["y"]))
-    v_end = vertices[edges[path_eids[-1]]["id_to"]]
-    arr.add(arcpy.Point(v_end["x"], v_end["y"]))
-    cur.insertRow([arcpy.Polyline(arr, sr)])
+with instr.phase("write"):
+    sr = arcpy.Describe(nodes_fc).spatialReference
+    if arcpy.Exists(out_fc):
+        arcpy.management.Delete(out_fc)
+
+    arcpy.management.CreateFeatureclass(gdb_path, out_fc.split("\\")[-1], "POLYLINE", spatial_reference=sr)
+    arcpy.management.AddField(out_fc, "route_nr", "SHORT")   # 1 = najlepsza, dalej alternatywy / kolejne k
+    with arcpy.da.InsertCursor(out_fc, ["SHAPE@", "route_nr"]) as cur:
+        for nr, xy in enumerate(routes_xy, 1):
+            arr = arcpy.Array([arcpy.Point(x, y) for x, y in xy])
+            cur.insertRow([arcpy.Polyline(arr, sr), nr])
 
 arcpy.AddMessage("Wyznaczono trasę i zapisano do: " + out_fc)
+if instr.enabled and instr.last is not None:
+    rec = instr.last
+    phases = " || ".join(f"{name} {ms:.1f} ms" for name, ms in rec["time_ms"].items())
+    arcpy.AddMessage(f"[Metryki] relaksacji: {rec['relaxations']} || wstawień do kolejki: {rec['heap_pushes']} || "
+                     f"nieaktualnych zdjęć z kopca: {rec['stale_pops']} || maks. kopiec: {rec['max_heap']} || {phases} -> {instr.path}")
+    instr.close()
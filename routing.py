@@ -0,0 +1,305 @@
+from heapq import heappush, heappop
+from array import array
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+import math
+
+from components import maybe_reachable
+from csr_graph import CSRGraph, KLASY
+from priority_queues import LazyHeap, exact_queue, open_queue
+from profiles import DEFAULT_PROFILE, PROFILES, profile_key
+from search_workspace import workspace_for, workspace_path
+
+# Prędkości (profil domyślny; inne - profiles.load_profile)
+SPEED_KPH = PROFILES[DEFAULT_PROFILE]
+def _mps(kph: float) -> float: return kph * 1000.0 / 3600.0
+VMAX_MPS = _mps(max(SPEED_KPH.values()))
+
+INF = float("inf")
+
+
+class SearchResult(NamedTuple):
+    nodes: List[int]         # kolejne wierzchołki trasy
+    edges: List[int]         # edge_id trasy
+    cost: float              # długość [m] albo czas [s] (INF = brak ścieżki)
+    settled: int             # |S|
+    neighbors_checked: int
+
+
+def _no_path(settled: int, neighbors_checked: int) -> SearchResult:
+    return SearchResult([], [], INF, settled, neighbors_checked)
+
+
+def speed_table(speed_kph: Dict[str, float] = SPEED_KPH) -> Tuple[float, ...]:
+    """Prędkość [m/s] per indeks klasy w CSRGraph.klasa (brak klasy -> jak "G")."""
+    return tuple(_mps(speed_kph.get(k, speed_kph["G"])) for k in KLASY)
+
+
+def edge_travel_time(graph: CSRGraph, eid: int, speed_kph: Dict[str, float] = SPEED_KPH) -> float:
+    s = graph.slot_of(eid)
+    return graph.lengths[s] / _mps(speed_kph.get(KLASY[graph.klasa[s]], speed_kph["G"]))
+
+
+METRICS = ("length", "time")
+
+def metric_weights(graph: CSRGraph, metric: str, speed_kph: Dict[str, float] = SPEED_KPH) -> array:
+    """
+    Koszt per slot: długość [m] albo czas [s]; INF dla krawędzi nieprzejezdnych.
+    Liczony raz na graf i profil (graph.weights_cache) - tablicy nie wolno modyfikować.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Nieznana metryka: {metric}")
+    key = (metric, profile_key(speed_kph) if metric == "time" else ())
+    w = graph.weights_cache.get(key)
+    if w is None:
+        w = graph.weights_cache[key] = _compile_weights(graph, metric, speed_kph)
+    return w
+
+
+def time_scale(speed_kph: Dict[str, float] = SPEED_KPH) -> float:
+    """Stała heurystyki czasu [s/m]: Euklides * time_scale nie przecenia czasu (1 / vmax profilu)."""
+    return 1.0 / _mps(max(speed_kph.values()))
+
+
+def _compile_weights(graph: CSRGraph, metric: str, speed_kph: Dict[str, float]) -> array:
+    lengths, klasa, passable = graph.lengths, graph.klasa, graph.passable
+    v_mps = speed_table(speed_kph)
+    w = array("d", [INF]) * graph.n_edges
+    for s in range(graph.n_edges):
+        if not passable[s]: continue
+        if metric == "length":
+            w[s] = lengths[s]
+        elif v_mps[klasa[s]] > 0:
+            w[s] = lengths[s] / v_mps[klasa[s]]
+    return w
+
+
+def _euclid(graph: CSRGraph, a: int, b: int) -> float:
+    return math.hypot(graph.xs[a] - graph.xs[b], graph.ys[a] - graph.ys[b])
+
+#Rekonstrukcja ścieżki
+def reconstruct_path(predecessors, edge_to_vertex, start, goal):
+    path_nodes, path_edges, cur = [], [], goal
+    while cur is not None:
+        path_nodes.append(cur)
+        if cur in edge_to_vertex:
+            path_edges.append(edge_to_vertex[cur])
+        cur = predecessors[cur]
+    path_nodes.reverse(); path_edges.reverse()
+    if not path_nodes or path_nodes[0] != start:
+        return [], []
+    return path_nodes, path_edges
+
+# ─── Wyszukiwanie jednokierunkowe (Dijkstra / A*) z wybieraną kolejką priorytetową
+def _search(graph: CSRGraph, start_vertex_id: int, end_vertex_id: int, weights: array, scale: float,
+            metric: str, heuristic: Optional[Callable[[int], float]] = None,
+            penalty: Optional[Dict[int, float]] = None, queue: str = "heapq") -> SearchResult:
+    """
+    Wspólna pętla dijkstra / a_star_length / a_star_speed. Klucz kolejki: g + h,
+    h = max(Euklides * scale, heuristic(v)) (scale 0 - Dijkstra). `queue` - nazwa z
+    priority_queues.QUEUES (kolejka z ws.queues): dokładne minimum (heapq / binary / 4ary) -
+    koniec po zdjęciu celu; kubełkowe (radix / dial) - koniec, gdy zdjęty klucz przekroczy
+    klucz celu, a poprawiona etykieta otwiera rozliczony wierzchołek ponownie.
+    """
+    if not maybe_reachable(graph, start_vertex_id, end_vertex_id):
+        return _no_path(0, 0)
+    offsets, targets, edge_ids, xs, ys = graph.offsets, graph.targets, graph.edge_ids, graph.xs, graph.ys
+    tx, ty = xs[end_vertex_id], ys[end_vertex_id]
+    hypot, inf = math.hypot, INF
+    ws = workspace_for(graph)
+    side = ws.fwd
+    g, pred, pred_edge, stamp = side.dist, side.pred, side.pred_edge, side.stamp
+    label = ws.begin(); done = label + 1
+    q = open_queue(ws, queue, metric, end_vertex_id)
+    push, pop, exact = q.push, q.pop, q.exact
+    heap = q.heap if type(q) is LazyHeap else None    # heapq: lista wprost, bez wywołań metod kolejki
+    settled = neighbors_checked = pops = max_heap = 0
+
+    g[start_vertex_id] = 0.0; stamp[start_vertex_id] = label
+    h0 = _euclid(graph, start_vertex_id, end_vertex_id) * scale
+    if heuristic is not None:
+        h0 = max(h0, heuristic(start_vertex_id))
+    push(h0, start_vertex_id)
+
+    while heap if heap is not None else len(q):
+        if heap is not None:
+            if len(heap) > max_heap: max_heap = len(heap)
+            pops += 1
+            key, u = heappop(heap)
+        else:
+            key, u = pop()
+        if stamp[u] == done: continue
+        if not exact and key > q.target_key: break      # pozostałe kubełki nie poprawią celu
+        stamp[u] = done; settled += 1
+        if exact and u == end_vertex_id: break
+        gu = g[u]
+        for s in range(offsets[u], offsets[u + 1]):
+            neighbors_checked += 1
+            w = weights[s]
+            if w == inf: continue
+            v = targets[s]
+            sv = stamp[v]
+            if sv == done and exact: continue
+            if penalty is not None:
+                w = penalty.get(edge_ids[s], w)
+                if w == inf: continue
+            tentative = gu + w
+            if sv < label or tentative < g[v]:
+                if sv == done:
+                    q.resettled += 1
+                g[v] = tentative; pred[v] = u; pred_edge[v] = edge_ids[s]; stamp[v] = label
+                h = hypot(xs[v] - tx, ys[v] - ty) * scale if scale else 0.0
+                if heuristic is not None:
+                    h = max(h, heuristic(v))
+                if heap is not None:
+                    heappush(heap, (tentative + h, v))
+                else:
+                    push(tentative + h, v)
+
+    if heap is not None:                                  # liczniki heapq jak w pozostałych kolejkach
+        q.pops = pops; q.pushes = pops + len(heap); q.max_size = max(max_heap, len(heap))
+    if stamp[end_vertex_id] < label:
+        return _no_path(settled, neighbors_checked)
+    nodes, eids = workspace_path(side, label, start_vertex_id, end_vertex_id)
+    return SearchResult(nodes, eids, g[end_vertex_id], settled, neighbors_checked)
+
+#Dijkstra (po długości)
+def dijkstra(graph: CSRGraph, start_vertex_id: int, end_vertex_id: int, metric: str = "length",
+             speed_kph: Dict[str, float] = SPEED_KPH, queue: str = "heapq") -> SearchResult:
+    """Dijkstra po długości (albo czasie: metric="time"); `queue` - kolejka z priority_queues.QUEUES."""
+    return _search(graph, start_vertex_id, end_vertex_id, metric_weights(graph, metric, speed_kph), 0.0,
+                   metric, queue=queue)
+
+#A* (po długości)
+def a_star_length(graph: CSRGraph, start_vertex_id: int, end_vertex_id: int,
+                  heuristic: Optional[Callable[[int], float]] = None, queue: str = "heapq") -> SearchResult:
+    """`heuristic(v)` - dodatkowe dolne ograniczenie do celu (np. ALT); używane max(Euclid, heuristic)."""
+    return _search(graph, start_vertex_id, end_vertex_id, metric_weights(graph, "length"), 1.0, "length",
+                   heuristic, queue=queue)
+
+# ─── A* (po czasie / prędkości)
+def a_star_speed(graph: CSRGraph, start_vertex_id: int, end_vertex_id: int,
+                 penalty: Optional[Dict[int, float]] = None,
+                 speed_kph: Dict[str, float] = SPEED_KPH,
+                 heuristic: Optional[Callable[[int], float]] = None, queue: str = "heapq") -> SearchResult:
+    """
+    Minimalizuje czas przejazdu: cost(edge) = length / speed(klasa_drogi).
+    Czasy krawędzi z metric_weights (tablica per slot, liczona raz na profil).
+    Heurystyka: Euclid * time_scale (1 / vmax profilu; admissible i consistent) => zachowuje optymalność.
+    `penalty` (edge_id -> czas [s]) nadpisuje koszt wybranych krawędzi (trasa alternatywna).
+    `heuristic(v)` - dodatkowe dolne ograniczenie czasu do celu (np. ALT), brane max z Euklidesem.
+    Para w różnych składowych (components.maybe_reachable) odrzucana bez przeszukiwania.
+    """
+    return _search(graph, start_vertex_id, end_vertex_id, metric_weights(graph, "time", speed_kph),
+                   time_scale(speed_kph), "time", heuristic, penalty, queue)
+
+# ─── Wyszukiwanie dwukierunkowe
+def _bidirectional(graph: CSRGraph, start_vertex_id: int, end_vertex_id: int,
+                   weights: array, potential_scale: Optional[float] = None,
+                   queue: str = "heapq") -> SearchResult:
+    """
+    Dwukierunkowy Dijkstra / A*: w przód po `offsets`, wstecz po `in_offsets`.
+    Koszt krawędzi: `weights` per slot (metric_weights - długość albo czas). Dla A* potencjał
+    uśredniony p(v) = (π_t(v) - π_s(v)) / 2 (π = Euklides * potential_scale) - spójny
+    w obu kierunkach, więc warunek stopu to top_f + top_b >= najlepsza znaleziona trasa.
+    `queue` - kolejka z dokładnym minimum (heapq / binary / 4ary), po jednej na kierunek.
+    """
+    ws = workspace_for(graph)
+    q_f, q_b = exact_queue(ws, queue), exact_queue(ws, queue, backward=True)
+    if start_vertex_id == end_vertex_id:
+        return SearchResult([start_vertex_id], [], 0.0, 1, 0)
+    if not maybe_reachable(graph, start_vertex_id, end_vertex_id):
+        return _no_path(0, 0)
+    offsets, targets, sources = graph.offsets, graph.targets, graph.sources
+    in_offsets, in_slots = graph.in_offsets, graph.in_slots
+    edge_ids, xs, ys = graph.edge_ids, graph.xs, graph.ys
+    sx, sy = xs[start_vertex_id], ys[start_vertex_id]
+    tx, ty = xs[end_vertex_id], ys[end_vertex_id]
+    hypot = math.hypot
+
+    def pot(v: int) -> float:
+        if potential_scale is None:
+            return 0.0
+        return (hypot(xs[v] - tx, ys[v] - ty) - hypot(xs[v] - sx, ys[v] - sy)) * 0.5 * potential_scale
+
+    fwd, bwd = ws.fwd, ws.bwd
+    dist_f, pred_f, edge_f, stamp_f = fwd.dist, fwd.pred, fwd.pred_edge, fwd.stamp
+    # wstecz: pred = następnik w stronę celu, pred_edge = edge_id v -> następnik
+    dist_b, pred_b, edge_b, stamp_b = bwd.dist, bwd.pred, bwd.pred_edge, bwd.stamp
+    label = ws.begin(); done = label + 1
+    dist_f[start_vertex_id] = 0.0; stamp_f[start_vertex_id] = label
+    dist_b[end_vertex_id] = 0.0; stamp_b[end_vertex_id] = label
+    q_f.push(pot(start_vertex_id), start_vertex_id)
+    q_b.push(-pot(end_vertex_id), end_vertex_id)
+    best = INF
+    meet = -1
+    settled = neighbors_checked = 0
+
+    while len(q_f) and len(q_b):
+        if q_f.min_key() + q_b.min_key() >= best:
+            break
+        if len(q_f) <= len(q_b):
+            _, u = q_f.pop()
+            if stamp_f[u] == done: continue
+            stamp_f[u] = done; settled += 1
+            du = dist_f[u]
+            for s in range(offsets[u], offsets[u + 1]):
+                neighbors_checked += 1
+                w = weights[s]
+                if w == INF: continue
+                v = targets[s]
+                sv = stamp_f[v]
+                if sv == done: continue
+                nd = du + w
+                if sv != label or nd < dist_f[v]:
+                    dist_f[v] = nd; pred_f[v] = u; edge_f[v] = edge_ids[s]; stamp_f[v] = label
+                    q_f.push(nd + pot(v), v)
+                    if stamp_b[v] >= label and nd + dist_b[v] < best:
+                        best = nd + dist_b[v]; meet = v
+        else:
+            _, u = q_b.pop()
+            if stamp_b[u] == done: continue
+            stamp_b[u] = done; settled += 1
+            du = dist_b[u]
+            for i in range(in_offsets[u], in_offsets[u + 1]):
+                neighbors_checked += 1
+                s = in_slots[i]
+                w = weights[s]
+                if w == INF: continue
+                v = sources[s]
+                sv = stamp_b[v]
+                if sv == done: continue
+                nd = du + w
+                if sv != label or nd < dist_b[v]:
+                    dist_b[v] = nd; pred_b[v] = u; edge_b[v] = edge_ids[s]; stamp_b[v] = label
+                    q_b.push(nd - pot(v), v)
+                    if stamp_f[v] >= label and nd + dist_f[v] < best:
+                        best = nd + dist_f[v]; meet = v
+
+    if meet < 0:
+        return _no_path(settled, neighbors_checked)
+    nodes, eids = workspace_path(fwd, label, start_vertex_id, meet)
+    cur = meet
+    while cur != end_vertex_id:
+        eids.append(edge_b[cur]); cur = pred_b[cur]
+        nodes.append(cur)
+    return SearchResult(nodes, eids, best, settled, neighbors_checked)
+
+
+def bidirectional_dijkstra(graph: CSRGraph, start_vertex_id: int, end_vertex_id: int,
+                           queue: str = "heapq") -> SearchResult:
+    """Dwukierunkowy Dijkstra po długości."""
+    return _bidirectional(graph, start_vertex_id, end_vertex_id, metric_weights(graph, "length"), queue=queue)
+
+
+def bidirectional_a_star_length(graph: CSRGraph, start_vertex_id: int, end_vertex_id: int,
+                                queue: str = "heapq") -> SearchResult:
+    """Dwukierunkowy A* po długości (potencjał: Euklides)."""
+    return _bidirectional(graph, start_vertex_id, end_vertex_id, metric_weights(graph, "length"),
+                          potential_scale=1.0, queue=queue)
+
+
+def bidirectional_a_star_speed(graph: CSRGraph, start_vertex_id: int, end_vertex_id: int,
+                               speed_kph: Dict[str, float] = SPEED_KPH, queue: str = "heapq") -> SearchResult:
+    """Dwukierunkowy A* po czasie (potencjał: Euklides * time_scale)."""
+    return _bidirectional(graph, start_vertex_id, end_vertex_id, metric_weights(graph, "time", speed_kph),
+                          time_scale(speed_kph), queue)
@@ -0,0 +1,64 @@
+"""
+Klient serwisu tras (routing_service.py) - tylko biblioteka standardowa, bez arcpy i bez grafu.
+
+route_finder.py używa go, gdy zmienna środowiskowa PAG2GRAPH_SERVICE wskazuje serwis
+(np. http://127.0.0.1:8765) liczący na tym samym snapshocie; inaczej liczy lokalnie.
+Błędy połączenia -> OSError, odpowiedź 4xx/5xx serwisu -> ValueError z komunikatem serwisu.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+import json
+import os
+
+SERVICE_ENV = "PAG2GRAPH_SERVICE"
+
+
+class RoutingClient:
+    def __init__(self, url: str, timeout: float = 30.0):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    @classmethod
+    def from_env(cls, timeout: float = 30.0) -> Optional["RoutingClient"]:
+        url = os.environ.get(SERVICE_ENV, "").strip()
+        return cls(url, timeout) if url else None
+
+    def _call(self, endpoint: str, payload: Optional[Dict[str, Any]] = None) -> Any:
+        data = None if payload is None else json.dumps(payload).encode("utf-8")
+        req = Request(self.url + endpoint, data=data, headers={"Content-Type": "application/json"})
+        try:
+            with urlopen(req, timeout=self.timeout) as resp:
+                return json.loads(resp.read())
+        except HTTPError as e:
+            try:
+                msg = json.loads(e.read()).get("error", e.reason)
+            except ValueError:
+                msg = e.reason
+            raise ValueError(f"Serwis tras ({e.code}): {msg}") from None
+
+    def health(self) -> Dict[str, Any]:
+        return self._call("/health")
+
+    def route(self, start: int, end: int, algorithm: str = "A* (prędkość)", profile: str = "car",
+              geometry: bool = False, cache: bool = False, queue: str = "heapq") -> Dict[str, Any]:
+        """
+        cost / length = None gdy brak ścieżki; geometry = [[x, y], ...] wierzchołków trasy.
+        cache=True - trasa z cache serwisu (route_cache.py); queue - kolejka priorytetowa (priority_queues.py).
+        """
+        return self._call("/route", {"start": start, "end": end, "algorithm": algorithm, "profile": profile,
+                                     "geometry": geometry, "cache": cache, "queue": queue})
+
+    def matrix(self, sources: Sequence[int], targets: Sequence[int], metric: str = "time",
+               profile: str = "car") -> List[List[Optional[float]]]:
+        return self._call("/matrix", {"sources": list(sources), "targets": list(targets),
+                                      "metric": metric, "profile": profile})["costs"]
+
+    def nearest(self, x: float, y: float, k: int = 1) -> List[Dict[str, float]]:
+        return self._call("/nearest", {"x": x, "y": y, "k": k})["nodes"]
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return self._call("/stats")
+
+    def cache_stats(self) -> Dict[str, float]:
+        return self._call("/cache")
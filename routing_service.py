@@ -0,0 +1,298 @@
+"""
+Lokalny serwis tras (HTTP/JSON, tylko 127.0.0.1) - graf wczytany raz i trzymany w pamięci.
+
+Każde wywołanie narzędzia route_finder płaci za start Pythona, import arcpy i wczytanie
+grafu; serwis robi to raz. Pętla asyncio obsługuje połączenia, wyszukiwania idą do puli
+procesów (każdy proces mapuje ten sam snapshot - jak w batch_routing), przyciąganie
+punktów do węzłów (GridIndex) liczone jest od razu w pętli. Klient: routing_client.py.
+
+Endpointy (parametry w JSON w treści POST albo w query string):
+    GET  /health   podpis snapshotu, |V|, |E| - klient sprawdza, czy serwis liczy na tym samym grafie
+    POST /route    {"start", "end", "algorithm", "profile", "geometry", "cache", "queue"}
+                   cache=true: LRU tras i drzewa najkrótszych ścieżek per start (route_cache.py)
+                   w procesie puli - koszt jak z algorytmu, trasa przy remisach może się różnić;
+                   queue: kolejka priorytetowa (priority_queues.py, domyślnie heapq; bez cache)
+    POST /matrix   {"sources", "targets", "metric", "profile"} - koszty (null = nieosiągalny)
+    POST /nearest  {"x", "y", "k"} albo {"points": [[x, y], ...]}
+    GET  /stats    liczba zapytań i percentyle opóźnień [ms] per endpoint
+    GET  /cache    trafienia i pamięć cache tras (suma po procesach puli)
+
+Uruchomienie (bez arcpy):
+    python routing_service.py graf.pag2graph --port 8765 --processes 4
+"""
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlsplit
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import routing
+from batch_routing import ALGORITHMS, _search
+from graph_snapshot import open_snapshot, read_signature
+from od_matrix import one_to_many
+from priority_queues import parse_queue
+from profiles import load_profile
+from route_cache import RouteCache
+from spatial_index import GridIndex
+
+HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}
+
+
+# --- pula procesów: każdy proces mapuje snapshot raz (initializer) ---
+_worker: Dict[str, Any] = {}
+
+def _init_worker(snapshot_path: str) -> None:
+    _worker["graph"] = open_snapshot(snapshot_path)
+    _worker["profiles"] = {}
+    _worker["cache"] = None
+
+def _profile(spec: str) -> Dict[str, float]:
+    profiles = _worker["profiles"]
+    if spec not in profiles:
+        profiles[spec] = load_profile(spec)
+    return profiles[spec]
+
+def _route_task(start: int, end: int, algorithm: str, profile: str, geometry: bool,
+                cache: bool = False, queue: str = "heapq") -> Dict[str, Any]:
+    graph = _worker["graph"]
+    if cache:
+        if _worker["cache"] is None:
+            _worker["cache"] = RouteCache(graph)
+        metric = "time" if ALGORITHMS[algorithm][1] == "s" else "length"
+        res = _worker["cache"].route(start, end, metric, _profile(profile))
+    else:
+        res = _search(algorithm, _profile(profile), queue=queue)(graph, start, end)
+    found = res.cost != routing.INF
+    out: Dict[str, Any] = {
+        "cost": res.cost if found else None,
+        "unit": ALGORITHMS[algorithm][1],
+        "length": sum(graph.edge_length(eid) for eid in res.edges) if found else None,
+        "nodes": res.nodes, "edges": res.edges,
+        "settled": res.settled, "neighbors_checked": res.neighbors_checked,
+    }
+    if geometry:
+        out["geometry"] = [graph.vertex_xy(v) for v in res.nodes]
+    if cache:
+        out["cache"] = dict(_worker["cache"].stats(), pid=os.getpid())
+    return out
+
+def _matrix_row_task(source: int, targets: Sequence[int], metric: str, profile: str) -> List[Optional[float]]:
+    graph = _worker["graph"]
+    costs = one_to_many(graph, routing.metric_weights(graph, metric, _profile(profile)), source, targets)
+    return [None if c == routing.INF else c for c in costs]
+
+
+class LatencyStats:
+    """Opóźnienia ostatnich `window` zapytań per endpoint (percentyle metodą najbliższej rangi)."""
+
+    def __init__(self, window: int = 10000):
+        self.window = window
+        self.samples: Dict[str, Deque[float]] = {}
+        self.counts: Dict[str, int] = {}
+
+    def record(self, endpoint: str, ms: float) -> None:
+        if endpoint not in self.samples:
+            self.samples[endpoint] = deque(maxlen=self.window)
+            self.counts[endpoint] = 0
+        self.samples[endpoint].append(ms)
+        self.counts[endpoint] += 1
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        out = {}
+        for endpoint, samples in self.samples.items():
+            ordered = sorted(samples)
+            def pct(p: float) -> float:
+                return ordered[min(len(ordered) - 1, max(0, int(round(p / 100.0 * len(ordered))) - 1))]
+            out[endpoint] = {"count": self.counts[endpoint], "p50_ms": pct(50), "p90_ms": pct(90),
+                             "p99_ms": pct(99), "max_ms": ordered[-1]}
+        return out
+
+    def format(self) -> str:
+        return "\n".join(f"  {ep}: {s['count']} zapytań || p50 {s['p50_ms']:.2f} ms || p90 {s['p90_ms']:.2f} ms "
+                         f"|| p99 {s['p99_ms']:.2f} ms || max {s['max_ms']:.2f} ms"
+                         for ep, s in sorted(self.summary().items()))
+
+
+class RoutingService:
+    """Serwer HTTP/1.1 (keep-alive) na asyncio.start_server - bez zależności spoza biblioteki standardowej."""
+
+    def __init__(self, snapshot_path: str, processes: int = 1):
+        self.snapshot_path = snapshot_path
+        self.graph = open_snapshot(snapshot_path)
+        if self.graph is None:
+            raise ValueError(f"Nie można wczytać snapshotu: {snapshot_path}")
+        self.signature = read_signature(snapshot_path) or b""
+        self.processes = processes
+        self.stats = LatencyStats()
+        self.cache_stats: Dict[int, Dict[str, Any]] = {}   # pid procesu puli -> ostatnie RouteCache.stats()
+        self._index = GridIndex(self.graph)            # przyciąganie punktów w pętli, bez puli
+        self._pool: Optional[Executor] = None
+        self._endpoints: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+            "/health": self.health, "/route": self.route, "/matrix": self.matrix,
+            "/nearest": self.nearest, "/stats": self.latency, "/cache": self.cache,
+        }
+
+    # --- endpointy ---
+    async def health(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"snapshot": os.path.abspath(self.snapshot_path), "signature": self.signature.hex(),
+                "n_vertices": self.graph.n_vertices, "n_edges": self.graph.n_edges,
+                "processes": self.processes, "algorithms": list(ALGORITHMS)}
+
+    def _vertex(self, value: Any) -> int:
+        vid = int(value)
+        if not self.graph.has_vertex(vid):
+            raise ValueError(f"Brak węzła {vid} w grafie")
+        return vid
+
+    async def route(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        algorithm = params.get("algorithm", "A* (prędkość)")
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Nieznany algorytm: {algorithm}")
+        queue = str(params.get("queue", "heapq"))
+        parse_queue(queue)
+        args = (self._vertex(params["start"]), self._vertex(params["end"]), algorithm,
+                str(params.get("profile", "car")), _flag(params.get("geometry", False)),
+                _flag(params.get("cache", False)), queue)
+        out = await asyncio.get_running_loop().run_in_executor(self._pool, _route_task, *args)
+        if "cache" in out:
+            stats = out.pop("cache")
+            self.cache_stats[stats.pop("pid")] = stats
+        return out
+
+    async def matrix(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        metric = params.get("metric", "time")
+        if metric not in routing.METRICS:
+            raise ValueError(f"Nieznana metryka: {metric}")
+        sources = [self._vertex(v) for v in _ids(params["sources"])]
+        targets = [self._vertex(v) for v in _ids(params["targets"])]
+        profile = str(params.get("profile", "car"))
+        loop = asyncio.get_running_loop()
+        rows = await asyncio.gather(*(loop.run_in_executor(self._pool, _matrix_row_task, s, targets, metric, profile)
+                                      for s in sources))
+        return {"sources": sources, "targets": targets, "metric": metric, "costs": rows}
+
+    async def nearest(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        if "points" in params:
+            return {"nodes": [self._index.nearest_node(float(x), float(y))[0] for x, y in params["points"]]}
+        hits = self._index.nearest_nodes(float(params["x"]), float(params["y"]), int(params.get("k", 1)))
+        return {"nodes": [{"node_id": vid, "distance": d} for vid, d in hits]}
+
+    async def latency(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return self.stats.summary()
+
+    async def cache(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        per_process = list(self.cache_stats.values())
+        total = {k: sum(s[k] for s in per_process)
+                 for k in ("queries", "route_hits", "tree_hits", "tree_resumed", "misses", "invalidations",
+                           "routes", "trees", "tree_vertices", "route_bytes", "tree_bytes")}
+        q = total["queries"]
+        total["route_hit_rate"] = total["route_hits"] / q if q else 0.0
+        total["tree_hit_rate"] = (total["tree_hits"] + total["tree_resumed"]) / q if q else 0.0
+        total["processes"] = len(per_process)
+        return total
+
+    # --- HTTP ---
+    async def _dispatch(self, target: str, body: bytes) -> Tuple[int, str, Any]:
+        url = urlsplit(target)
+        handler = self._endpoints.get(url.path)
+        if handler is None:
+            return 404, "(nieznany)", {"error": f"Nieznany endpoint: {url.path}"}
+        try:
+            params: Dict[str, Any] = dict(parse_qsl(url.query))
+            if body:
+                params.update(json.loads(body))
+            return 200, url.path, await handler(params)
+        except KeyError as e:
+            return 400, url.path, {"error": f"Brak parametru: {e.args[0]}"}
+        except (ValueError, TypeError) as e:
+            return 400, url.path, {"error": str(e)}
+        except Exception as e:   # błąd w procesie puli - odpowiedź zamiast zerwanego połączenia
+            return 500, url.path, {"error": f"{type(e).__name__}: {e}"}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                _, target, version = line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                body = await reader.readexactly(int(headers.get("content-length") or 0))
+                t0 = time.perf_counter()
+                status, endpoint, payload = await self._dispatch(target, body)
+                data = json.dumps(payload).encode("utf-8")
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                writer.write((f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                              f"Content-Type: application/json; charset=utf-8\r\n"
+                              f"Content-Length: {len(data)}\r\n"
+                              f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode("latin-1")
+                             + data)
+                await writer.drain()
+                self.stats.record(endpoint, (time.perf_counter() - t0) * 1000.0)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass                                        # klient zerwał połączenie / niepoprawne żądanie
+        finally:
+            writer.close()
+
+    async def serve(self, port: int = DEFAULT_PORT, ready: Optional[Callable[[int], None]] = None) -> None:
+        if self.processes > 0:
+            self._pool = ProcessPoolExecutor(self.processes, initializer=_init_worker,
+                                             initargs=(self.snapshot_path,))
+        else:                                           # bez puli: jeden wątek w tym procesie (np. testy)
+            _init_worker(self.snapshot_path)
+            self._pool = ThreadPoolExecutor(1)
+        server = await asyncio.start_server(self._handle, HOST, port)
+        try:
+            async with server:
+                if ready is not None:
+                    ready(server.sockets[0].getsockname()[1])
+                await server.serve_forever()
+        finally:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _flag(value: Any) -> bool:
+    return value if isinstance(value, bool) else str(value).lower() in ("1", "true", "tak", "yes")
+
+def _ids(value: Any) -> List[int]:
+    """Lista id z JSON albo '1,2,3' z query string."""
+    return [int(v) for v in (value.split(",") if isinstance(value, str) else value)]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Lokalny serwis tras HTTP/JSON na snapshocie grafu")
+    ap.add_argument("snapshot", help="plik .pag2graph zapisany przez graph.py")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT)
+    ap.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                    help="procesy wyszukiwania (0 = wątek w procesie serwisu)")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    service = RoutingService(args.snapshot, args.processes)
+    def ready(port: int) -> None:
+        print(f"[Serwis] http://{HOST}:{port} || |V|: {service.graph.n_vertices} || |E|: {service.graph.n_edges} "
+              f"|| {args.processes} proc. || start {time.perf_counter() - t0:.2f} s", flush=True)
+    try:
+        asyncio.run(service.serve(args.port, ready))
+    except KeyboardInterrupt:
+        pass
+    print(f"[Serwis] Opóźnienia:\n{service.stats.format()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Wielokrotnego użytku stan wyszukiwania (odległości, poprzedniki, krawędzie poprzedników,
+odwiedzone) w tablicach per wierzchołek zamiast słowników i zbiorów tworzonych na każde zapytanie.
+
+Ważność wpisu wyznacza znacznik epoki: stamp[v] == label - wierzchołek z etykietą w bieżącym
+zapytaniu (dist / pred aktualne), stamp[v] == label + 1 - rozliczony. Nowe zapytanie podbija
+epokę o 2 (begin), więc czyszczenie tablic kosztuje O(1), a zapytanie O(odwiedzonych) -
+bez alokacji O(V) i bez pracy GC na słownikach. Tablice zerowane są dopiero po wyczerpaniu
+zakresu 'I' (raz na ~2 mld zapytań).
+
+Jeden workspace na graf (graph.workspace, workspace_for) - tylko dla wyszukiwań wykonywanych
+po kolei w jednym wątku (procesy puli mają własne grafy). Zagnieżdżone wyszukiwanie w trakcie
+innego (np. w heurystyce) musi dostać osobny SearchWorkspace.
+"""
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+from csr_graph import CSRGraph
+
+INF = float("inf")
+_MAX_EPOCH = 2 ** 32 - 2
+
+
+class SearchSide:
+    """Tablice jednego kierunku wyszukiwania (w przód albo wstecz)."""
+    __slots__ = ("dist", "pred", "pred_edge", "stamp")
+
+    def __init__(self, n: int):
+        self.dist = array("d", [INF]) * n
+        self.pred = array("i", [0]) * n         # poprzednik (wstecz: następnik w stronę celu)
+        self.pred_edge = array("i", [0]) * n    # edge_id (CH: łuk) krawędzi pred[v] <-> v
+        self.stamp = array("I", [0]) * n
+
+    def grow(self, n: int) -> None:
+        extra = n - len(self.stamp)
+        if extra > 0:
+            self.dist.extend(array("d", [INF]) * extra)
+            self.pred.extend(array("i", [0]) * extra)
+            self.pred_edge.extend(array("i", [0]) * extra)
+            self.stamp.extend(array("I", [0]) * extra)
+
+    def nbytes(self) -> int:
+        return sum(a.itemsize * len(a) for a in (self.dist, self.pred, self.pred_edge, self.stamp))
+
+
+class SearchWorkspace:
+    __slots__ = ("n", "label", "fwd", "_bwd", "queues")
+
+    def __init__(self, n: int):
+        self.n = n
+        self.label = 0
+        self.fwd = SearchSide(n)
+        self._bwd: Optional[SearchSide] = None
+        self.queues: Dict[Tuple[str, bool], Any] = {}   # (nazwa, wstecz) -> kolejka (priority_queues.py)
+
+    @property
+    def bwd(self) -> SearchSide:
+        """Drugi kierunek (wyszukiwania dwukierunkowe) - tworzony przy pierwszym użyciu."""
+        if self._bwd is None:
+            self._bwd = SearchSide(self.n)
+        return self._bwd
+
+    def begin(self) -> int:
+        """Nowe zapytanie: znacznik etykiety (label; rozliczony = label + 1) ważny dla obu kierunków."""
+        self.label += 2
+        if self.label >= _MAX_EPOCH:
+            for side in (self.fwd, self._bwd):
+                if side is not None:
+                    side.stamp = array("I", [0]) * self.n
+            self.label = 2
+        return self.label
+
+    def grow(self, n: int) -> None:
+        if n > self.n:
+            self.n = n
+            for side in (self.fwd, self._bwd):
+                if side is not None:
+                    side.grow(n)
+            for q in self.queues.values():
+                q.grow(n)
+
+    def nbytes(self) -> int:
+        return self.fwd.nbytes() + (self._bwd.nbytes() if self._bwd is not None else 0)
+
+
+def workspace_for(graph: CSRGraph) -> SearchWorkspace:
+    """Workspace grafu (tworzony raz, powiększany gdy graph_update dołoży wierzchołki)."""
+    ws = graph.workspace
+    n = graph.max_vid + 1
+    if ws is None:
+        ws = graph.workspace = SearchWorkspace(n)
+    elif ws.n < n:
+        ws.grow(n)
+    return ws
+
+
+def workspace_path(side: SearchSide, label: int, start: int, goal: int) -> Tuple[List[int], List[int]]:
+    """(wierzchołki, edge_id) start -> goal po poprzednikach z bieżącego zapytania; ([], []) gdy brak."""
+    pred, pred_edge, stamp = side.pred, side.pred_edge, side.stamp
+    if stamp[goal] < label:
+        return [], []
+    nodes, eids, cur = [goal], [], goal
+    while cur != start:
+        eids.append(pred_edge[cur]); cur = pred[cur]; nodes.append(cur)
+    nodes.reverse(); eids.reverse()
+    return nodes, eids
@@ -0,0 +1,121 @@
+"""
+Pełna geometria odcinków jezdni (wszystkie wierzchołki linii) w zwartej postaci, po jezdnia_oid.
+
+Graf trzyma tylko końce odcinków; geometria z tych samych punktów FeatureClassToNumPyArray
+(explode_to_points), z których read_road_columns bierze końce. Współrzędne kwantowane do
+`resolution` (domyślnie 1 mm) względem narożnika zasięgu i zapisane jako int32 - 8 B na punkt
+zamiast 16. Plik obok snapshotu: <snapshot>.geom (format write_array_file).
+"""
+from array import array
+from typing import List, Optional, Tuple
+import struct
+
+import numpy as np
+
+from csr_graph import CSRGraph
+from graph_snapshot import open_array_file, write_array_file
+
+GEOMETRY_EXT = ".geom"
+
+
+class SegmentGeometry:
+    __slots__ = ("oids", "offsets", "qxy", "origin_x", "origin_y", "resolution")
+
+    def __init__(self, oids, offsets, qxy, origin_x: float, origin_y: float, resolution: float):
+        self.oids = oids            # 'i' jezdnia_oid rosnąco
+        self.offsets = offsets      # 'q' punkty odcinka i: qxy[2*offsets[i] : 2*offsets[i+1]]
+        self.qxy = qxy              # 'i' x, y na przemian, (x - origin_x) / resolution
+        self.origin_x = origin_x
+        self.origin_y = origin_y
+        self.resolution = resolution
+
+    @classmethod
+    def from_points(cls, oid: np.ndarray, x: np.ndarray, y: np.ndarray,
+                    resolution: float = 0.001) -> "SegmentGeometry":
+        """Z punktów rozbitych linii (kolejno po obiekcie, jak w columns_from_points); NaN pomijane."""
+        ok = ~(np.isnan(x) | np.isnan(y))
+        oid, x, y = oid[ok].astype(np.int64), x[ok], y[ok]
+        order = np.argsort(oid, kind="stable")          # kolejność punktów w obiekcie zachowana
+        oid, x, y = oid[order], x[order], y[order]
+        start = np.flatnonzero(np.concatenate(([True], oid[1:] != oid[:-1]))) if len(oid) else np.zeros(0, np.int64)
+        offsets = np.append(start, len(oid)).astype(np.int64)
+        ox = float(x.min()) if len(x) else 0.0
+        oy = float(y.min()) if len(y) else 0.0
+        qxy = np.empty(2 * len(x), np.int64)
+        qxy[0::2] = np.rint((x - ox) / resolution)
+        qxy[1::2] = np.rint((y - oy) / resolution)
+        if len(qxy) and qxy.max() > np.iinfo(np.int32).max:
+            raise ValueError(f"Zasięg danych za duży dla rozdzielczości {resolution} m")
+        return cls(array("i", oid[start].astype(np.int32).tobytes()), array("q", offsets.tobytes()),
+                   array("i", qxy.astype(np.int32).tobytes()), ox, oy, resolution)
+
+    def __len__(self) -> int:
+        return len(self.oids)
+
+    def index_of(self, jezdnia_oid: int) -> int:
+        """Pozycja odcinka (wyszukiwanie binarne); -1 gdy brak."""
+        oids = self.oids
+        lo, hi = 0, len(oids)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if oids[mid] < jezdnia_oid: lo = mid + 1
+            else: hi = mid
+        return lo if lo < len(oids) and oids[lo] == jezdnia_oid else -1
+
+    def coords(self, jezdnia_oid: int) -> Optional[List[Tuple[float, float]]]:
+        i = self.index_of(jezdnia_oid)
+        if i < 0:
+            return None
+        q, r, ox, oy = self.qxy, self.resolution, self.origin_x, self.origin_y
+        return [(ox + q[j] * r, oy + q[j + 1] * r) for j in range(2 * self.offsets[i], 2 * self.offsets[i + 1], 2)]
+
+    def nbytes(self) -> int:
+        return sum(a.itemsize * len(a) for a in (self.oids, self.offsets, self.qxy))
+
+
+def route_coords(graph: CSRGraph, edges: List[int], geometry: Optional[SegmentGeometry] = None) -> List[Tuple[float, float]]:
+    """
+    Punkty trasy (edge_id po kolei): pełna linia odcinka każdej krawędzi (odwrócona, gdy pierwszy
+    punkt leży bliżej węzła końcowego - jak w graph_export), bez geometrii odcinka - sam węzeł końcowy.
+    """
+    if not edges:
+        return []
+    xs, ys, oids = graph.xs, graph.ys, graph.jezdnia_oid
+    pts = [graph.vertex_xy(graph.edge_from(edges[0]))]
+    for eid in edges:
+        s = graph.slot_of(eid)
+        xy = geometry.coords(oids[s]) if geometry is not None else None
+        if xy is None or len(xy) < 2:
+            pts.append(graph.vertex_xy(graph.targets[s]))
+            continue
+        u = graph.sources[s]
+        (hx, hy), (tx, ty) = xy[0], xy[-1]
+        if (hx - xs[u]) ** 2 + (hy - ys[u]) ** 2 > (tx - xs[u]) ** 2 + (ty - ys[u]) ** 2:
+            xy.reverse()
+        pts.extend(xy[1:])
+    return pts
+
+
+def write_geometry(geom: SegmentGeometry, path: str, signature: bytes = b"") -> int:
+    meta = array("d", [geom.origin_x, geom.origin_y, geom.resolution])
+    return write_array_file(path, (("oids", "i", geom.oids), ("offsets", "q", geom.offsets),
+                                   ("qxy", "i", geom.qxy), ("meta", "d", meta)), len(geom), signature)
+
+
+def open_geometry(path: str, expected_signature: Optional[bytes] = None) -> Optional[SegmentGeometry]:
+    loaded = open_array_file(path, expected_signature)
+    if loaded is None:
+        return None
+    _, a = loaded
+    ox, oy, res = a["meta"]
+    return SegmentGeometry(a["oids"], a["offsets"], a["qxy"], ox, oy, res)
+
+
+# --- WKB (little endian, 2D) ---
+def wkb_point(x: float, y: float) -> bytes:
+    return struct.pack("<BIdd", 1, 1, x, y)
+
+
+def wkb_linestring(xy: List[Tuple[float, float]]) -> bytes:
+    flat = [c for p in xy for c in p]
+    return struct.pack(f"<BII{len(flat)}d", 1, 2, len(xy), *flat)
@@ -0,0 +1,188 @@
+"""
+Indeks przestrzenny (siatka regularna) wierzchołków i krawędzi grafu - przyciąganie
+dowolnych współrzędnych X/Y do grafu bez przeglądania wszystkich wierzchołków.
+
+Komórki przechowywane są jak sąsiedztwo w CSRGraph: offsets + items w tablicach.
+Zapytanie przegląda pierścienie komórek wokół punktu i kończy, gdy najbliższy
+nieprzejrzany pierścień jest dalej niż najlepszy kandydat (średnio kilka komórek).
+"""
+from array import array
+from heapq import nlargest
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+import math
+
+from csr_graph import CSRGraph
+from routing import INF
+
+
+class EdgeSnap(NamedTuple):
+    edge_id: int        # krawędź (dla dwukierunkowych - kierunek id_from < id_to)
+    x: float            # rzut punktu na odcinek id_from -> id_to
+    y: float
+    fraction: float     # położenie rzutu od id_from (0..1)
+    distance: float
+
+
+def _cells(points_cells: Sequence[int], n_cells: int) -> Tuple[array, array]:
+    """(offsets, items) - indeksy elementów pogrupowane po numerze komórki (sortowanie kubełkowe)."""
+    offsets = array("q", [0]) * (n_cells + 1)
+    for c in points_cells[0::2]:
+        offsets[c + 1] += 1
+    for i in range(1, n_cells + 1):
+        offsets[i] += offsets[i - 1]
+    fill = array("q", offsets)
+    items = array("i", [0]) * (len(points_cells) // 2)
+    for j in range(0, len(points_cells), 2):
+        c = points_cells[j]
+        items[fill[c]] = points_cells[j + 1]; fill[c] += 1
+    return offsets, items
+
+
+class GridIndex:
+    """Siatka nad zasięgiem grafu; wierzchołki w komórce punktu, krawędzie w komórkach swojego bbox."""
+
+    def __init__(self, graph: CSRGraph, cell_size: Optional[float] = None):
+        self.graph = graph
+        self.version = graph.version    # numery slotów krawędzi ważne tylko dla tej wersji grafu
+        xs, ys = graph.xs, graph.ys
+        vids = list(graph.vertex_ids())
+        if not vids:
+            raise ValueError("Pusty graf - brak wierzchołków do indeksowania")
+        self.minx = min(xs[v] for v in vids); maxx = max(xs[v] for v in vids)
+        self.miny = min(ys[v] for v in vids); maxy = max(ys[v] for v in vids)
+        if cell_size is None:
+            # ~2 wierzchołki na komórkę
+            area = max((maxx - self.minx) * (maxy - self.miny), 1.0)
+            cell_size = math.sqrt(2.0 * area / len(vids))
+        self.cell = max(float(cell_size), 1e-9)
+        self.nx = int((maxx - self.minx) / self.cell) + 1
+        self.ny = int((maxy - self.miny) / self.cell) + 1
+
+        pairs = array("q")
+        for v in vids:
+            pairs.append(self._cell_id(*self._cell_xy(xs[v], ys[v]))); pairs.append(v)
+        self.node_offsets, self.node_items = _cells(pairs, self.nx * self.ny)
+
+        # krawędzie: jeden slot na odcinek (para wierzchołków; przejezdny, jeśli odcinek ma taki),
+        # wpisany do komórek bbox
+        slot_of = {}
+        pairs = array("q")
+        sources, targets, passable = graph.sources, graph.targets, graph.passable
+        for s in range(graph.n_edges):
+            u, v = sources[s], targets[s]
+            key = (u, v) if u < v else (v, u)
+            prev = slot_of.get(key)
+            if prev is None or (passable[s] and not passable[prev]):
+                slot_of[key] = s
+        for s in sorted(slot_of.values()):
+            u, v = sources[s], targets[s]
+            ix0, iy0 = self._cell_xy(min(xs[u], xs[v]), min(ys[u], ys[v]))
+            ix1, iy1 = self._cell_xy(max(xs[u], xs[v]), max(ys[u], ys[v]))
+            for ix in range(ix0, ix1 + 1):
+                for iy in range(iy0, iy1 + 1):
+                    pairs.append(self._cell_id(ix, iy)); pairs.append(s)
+        self.edge_offsets, self.edge_items = _cells(pairs, self.nx * self.ny)
+
+    @property
+    def stale(self) -> bool:
+        """Graf zaktualizowany po budowie indeksu (graph_update.py) - indeks trzeba zbudować od nowa."""
+        return self.graph.version != self.version
+
+    def _cell_xy(self, x: float, y: float) -> Tuple[int, int]:
+        ix = min(max(int((x - self.minx) // self.cell), 0), self.nx - 1)
+        iy = min(max(int((y - self.miny) // self.cell), 0), self.ny - 1)
+        return ix, iy
+
+    def _cell_id(self, ix: int, iy: int) -> int:
+        return iy * self.nx + ix
+
+    def _rings(self, x: float, y: float):
+        """Kolejne pierścienie komórek: (numery komórek, dolne ograniczenie odległości poza blokiem)."""
+        cx, cy = self._cell_xy(x, y)
+        c, x0, y0 = self.cell, self.minx, self.miny
+        r = 0
+        while True:
+            ix0, ix1, iy0, iy1 = cx - r, cx + r, cy - r, cy + r
+            # tylko obwód bloku (przycięty do siatki)
+            ring = []
+            cols = range(max(ix0, 0), min(ix1, self.nx - 1) + 1)
+            for iy in {iy0, iy1}:
+                if 0 <= iy < self.ny:
+                    ring.extend(iy * self.nx + ix for ix in cols)
+            for ix in {ix0, ix1} if r else ():
+                if 0 <= ix < self.nx:
+                    ring.extend(iy * self.nx + ix for iy in range(max(iy0 + 1, 0), min(iy1 - 1, self.ny - 1) + 1))
+            # nieprzejrzane komórki leżą za którymś z boków bloku, który nie doszedł do brzegu siatki
+            sides = []
+            if ix0 > 0: sides.append(x - (x0 + ix0 * c))
+            if ix1 < self.nx - 1: sides.append((x0 + (ix1 + 1) * c) - x)
+            if iy0 > 0: sides.append(y - (y0 + iy0 * c))
+            if iy1 < self.ny - 1: sides.append((y0 + (iy1 + 1) * c) - y)
+            if not sides:
+                yield ring, INF
+                return
+            yield ring, max(0.0, min(sides))
+            r += 1
+
+    # --- wierzchołki ---
+    def nearest_nodes(self, x: float, y: float, k: int = 1) -> List[Tuple[int, float]]:
+        """k najbliższych wierzchołków: [(vid, odległość)] rosnąco."""
+        xs, ys = self.graph.xs, self.graph.ys
+        offsets, items = self.node_offsets, self.node_items
+        best: List[Tuple[float, int]] = []       # (-d, vid), co najwyżej k
+        hypot = math.hypot
+        for ring, bound in self._rings(x, y):
+            for c in ring:
+                for i in range(offsets[c], offsets[c + 1]):
+                    v = items[i]
+                    best.append((-hypot(xs[v] - x, ys[v] - y), -v))
+            if len(best) > k:
+                best = nlargest(k, best)
+            if len(best) >= k and -min(best)[0] <= bound:
+                break
+        best = nlargest(k, best)
+        return [(-nv, -nd) for nd, nv in best]
+
+    def nearest_node(self, x: float, y: float) -> Tuple[int, float]:
+        return self.nearest_nodes(x, y, 1)[0]
+
+    def snap_nodes(self, points: Iterable[Tuple[float, float]]) -> array:
+        """Najbliższy wierzchołek dla każdego punktu (array 'i')."""
+        return array("i", (self.nearest_node(x, y)[0] for x, y in points))
+
+    # --- krawędzie ---
+    def nearest_edge(self, x: float, y: float, passable_only: bool = True) -> EdgeSnap:
+        """
+        Najbliższy odcinek z rzutem punktu (prosta między wierzchołkami krawędzi).
+        `passable_only` - pomija odcinki nieprzejezdne w obu kierunkach (passable == 0).
+        """
+        g = self.graph
+        xs, ys, sources, targets, passable = g.xs, g.ys, g.sources, g.targets, g.passable
+        offsets, items = self.edge_offsets, self.edge_items
+        best_d, best_s, best_t = INF, -1, 0.0
+        checked = set()
+        for ring, bound in self._rings(x, y):
+            for c in ring:
+                for i in range(offsets[c], offsets[c + 1]):
+                    s = items[i]
+                    if s in checked: continue
+                    checked.add(s)
+                    if passable_only and not passable[s]: continue
+                    ax, ay = xs[sources[s]], ys[sources[s]]
+                    dx, dy = xs[targets[s]] - ax, ys[targets[s]] - ay
+                    seg2 = dx * dx + dy * dy
+                    t = 0.0 if seg2 == 0.0 else min(1.0, max(0.0, ((x - ax) * dx + (y - ay) * dy) / seg2))
+                    d = math.hypot(ax + t * dx - x, ay + t * dy - y)
+                    if d < best_d or (d == best_d and s < best_s):
+                        best_d, best_s, best_t = d, s, t
+            if best_s >= 0 and best_d <= bound:
+                break
+        if best_s < 0:
+            raise ValueError("Graf bez " + ("przejezdnych " if passable_only else "") + "krawędzi - brak odcinka do przyciągnięcia")
+        u, v = sources[best_s], targets[best_s]
+        return EdgeSnap(g.edge_ids[best_s], xs[u] + best_t * (xs[v] - xs[u]),
+                        ys[u] + best_t * (ys[v] - ys[u]), best_t, best_d)
+
+    def snap_edges(self, points: Iterable[Tuple[float, float]], passable_only: bool = True) -> List[EdgeSnap]:
+        return [self.nearest_edge(x, y, passable_only) for x, y in points]
+
@@ -0,0 +1,153 @@
+"""
+Syntetyczne sieci drogowe do testów wydajności (bez GDB i bez arcpy).
+
+Dwa układy, oba planarne:
+    grid    - siatka ulic z hierarchią: linie co 2^k są ważniejsze (A/S/GP na rzadkich liniach,
+              L/D na gęstych), klasy przydzielane liniom tak, by udział odcinków ~ `mix`
+    planar  - siatka z przesuniętymi węzłami i jedną losową przekątną na oczko (bez przecięć),
+              klasa losowana per odcinek wg `mix`
+Część odcinków jest usuwana (`drop`), `oneway` odcinków dostaje kier = 1 (kierunek losowy -
+końce zamieniane), `closed` kier = 3. Długość = odległość * (1 + krętość) >= odległość, więc
+heurystyki euklidesowe pozostają dopuszczalne. Wynik to RoadColumns - te same kolumny co
+z read_road_columns, graf budowany przez bulk_build.build_graph_columns.
+
+Uruchomienie (bez arcpy) - sieć ~1 mln odcinków do snapshotu:
+    python synthetic.py siec.pag2graph --layout grid --segments 1000000 --seed 1
+"""
+from typing import Dict, Optional, Sequence
+import argparse
+import math
+import time
+
+import numpy as np
+
+from bulk_build import RoadColumns, build_graph_columns
+from csr_graph import KLASA_IDX, KLASY, CSRGraph
+from graph_snapshot import source_signature, write_snapshot
+
+LAYOUTS = ("grid", "planar")
+
+# udział odcinków per klasa (rząd wielkości jak w BDOT10k dla obszaru z miastem)
+DEFAULT_MIX: Dict[str, float] = {"A": 0.01, "S": 0.02, "GP": 0.04, "G": 0.10, "Z": 0.18,
+                                 "L": 0.40, "D": 0.20, "I": 0.05}
+
+
+def _normalized(mix: Dict[str, float]) -> np.ndarray:
+    p = np.array([max(0.0, float(mix.get(k, 0.0))) for k in KLASY])
+    if p.sum() <= 0:
+        raise ValueError("Udziały klas dróg muszą mieć dodatnią sumę")
+    return p / p.sum()
+
+
+def _line_classes(n_lines: int, p: np.ndarray) -> np.ndarray:
+    """Klasa per linia siatki: linie o większej potędze 2 w indeksie dostają ważniejsze klasy."""
+    idx = np.arange(n_lines)
+    level = np.zeros(n_lines, np.int64)
+    for k in range(1, max(1, n_lines).bit_length() + 1):
+        level[idx % (1 << k) == 0] = k
+    order = np.lexsort((idx, -level))                 # najważniejsze linie pierwsze
+    bounds = np.cumsum(p) * n_lines
+    cls = np.empty(n_lines, np.uint8)
+    cls[order] = np.searchsorted(bounds, np.arange(n_lines) + 0.5).clip(0, len(p) - 1)
+    return cls
+
+
+def generate(layout: str = "grid", segments: int = 100_000, spacing: float = 150.0,
+             mix: Optional[Dict[str, float]] = None, oneway: float = 0.15, closed: float = 0.01,
+             drop: float = 0.08, seed: int = 1) -> RoadColumns:
+    """Kolumny ~`segments` odcinków w układzie `layout` (kolejność odcinków losowa, jak w GDB)."""
+    if layout not in LAYOUTS:
+        raise ValueError(f"Nieznany układ sieci: {layout}")
+    rng = np.random.default_rng(seed)
+    p = _normalized(mix or DEFAULT_MIX)
+    per_node = 2.0 if layout == "grid" else 2.5      # odcinków na węzeł siatki przed usunięciem
+    n = max(2, int(math.ceil(math.sqrt(segments / (per_node * (1.0 - drop))))))
+
+    gx, gy = np.meshgrid(np.arange(n, dtype=np.float64), np.arange(n, dtype=np.float64), indexing="ij")
+    if layout == "planar":                            # przesunięcie < 1/2 oczka - brak przecięć
+        gx = gx + rng.uniform(-0.3, 0.3, gx.shape)
+        gy = gy + rng.uniform(-0.3, 0.3, gy.shape)
+    X, Y = (gx * spacing).ravel(), (gy * spacing).ravel()
+    node = np.arange(n * n).reshape(n, n)            # node[i, j], i = kolumna (x), j = wiersz (y)
+
+    # odcinki poziome (wzdłuż wiersza j) i pionowe (wzdłuż kolumny i)
+    a = [node[:-1, :].ravel(), node[:, :-1].ravel()]
+    b = [node[1:, :].ravel(), node[:, 1:].ravel()]
+    if layout == "grid":
+        row_cls, col_cls = _line_classes(n, p), _line_classes(n, p)
+        k = [row_cls[np.broadcast_to(np.arange(n), (n - 1, n)).ravel()],
+             col_cls[np.broadcast_to(np.arange(n)[:, None], (n, n - 1)).ravel()]]
+    else:
+        diag = rng.random((n - 1, n - 1)) < 0.5        # jedna przekątna na oczko
+        ci, cj = np.nonzero(np.ones((n - 1, n - 1), bool))
+        d = diag.ravel()
+        a.append(np.where(d, node[ci, cj], node[ci + 1, cj]))
+        b.append(np.where(d, node[ci + 1, cj + 1], node[ci, cj + 1]))
+        k = [rng.choice(len(p), size=len(x), p=p).astype(np.uint8) for x in a]
+    a, b, k = np.concatenate(a), np.concatenate(b), np.concatenate(k)
+
+    keep = rng.random(len(a)) >= drop
+    a, b, k = a[keep], b[keep], k[keep]
+    m = len(a)
+    u = rng.random(m)
+    kier = np.where(u < closed, 3, np.where(u < closed + oneway, 1, 0)).astype(np.int8)
+    swap = (kier == 1) & (rng.random(m) < 0.5)       # jednokierunkowe w losową stronę
+    a, b = np.where(swap, b, a), np.where(swap, a, b)
+    dist = np.hypot(X[b] - X[a], Y[b] - Y[a])
+    length = dist * (1.0 + rng.uniform(0.0, 0.15, m))
+    perm = rng.permutation(m)
+    return RoadColumns(np.arange(1, m + 1, dtype=np.int32), X[a][perm], Y[a][perm], X[b][perm], Y[b][perm],
+                       length[perm], k[perm], kier[perm])
+
+
+def generate_graph(layout: str = "grid", segments: int = 100_000, seed: int = 1, **kwargs) -> CSRGraph:
+    return build_graph_columns(generate(layout, segments, seed=seed, **kwargs))
+
+
+def describe(cols: RoadColumns) -> str:
+    share = np.bincount(cols.klasa, minlength=len(KLASY)) / max(1, len(cols.klasa))
+    kier = np.bincount(cols.kier.astype(np.int64), minlength=4) / max(1, len(cols.kier))
+    classes = ", ".join(f"{c}: {share[i]:.1%}" for i, c in enumerate(KLASY) if share[i] > 0)
+    return (f"odcinków: {len(cols.oid)} || klasy: {classes} || "
+            f"kier 0/1/3: {kier[0]:.1%} / {kier[1]:.1%} / {kier[3]:.1%}")
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """'A=0.01,S=0.02,...' -> słownik udziałów (klasy spoza KLASY odrzucane)."""
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        name, _, value = part.partition("=")
+        if name.strip() not in KLASA_IDX:
+            raise ValueError(f"Nieznana klasa drogi: {name}")
+        mix[name.strip()] = float(value)
+    return mix
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Syntetyczna sieć drogowa -> snapshot grafu")
+    ap.add_argument("out", help="wynikowy plik .pag2graph")
+    ap.add_argument("--layout", choices=LAYOUTS, default="grid")
+    ap.add_argument("--segments", type=int, default=100_000, help="docelowa liczba odcinków (10k .. 5M)")
+    ap.add_argument("--spacing", type=float, default=150.0, help="oczko siatki [m]")
+    ap.add_argument("--mix", type=parse_mix, default=None, help="udziały klas, np. A=0.01,S=0.02,G=0.1,L=0.5")
+    ap.add_argument("--oneway", type=float, default=0.15, help="udział odcinków jednokierunkowych")
+    ap.add_argument("--closed", type=float, default=0.01, help="udział odcinków zamkniętych (kier 3)")
+    ap.add_argument("--drop", type=float, default=0.08, help="udział usuniętych odcinków siatki")
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    cols = generate(args.layout, args.segments, args.spacing, args.mix, args.oneway, args.closed,
+                    args.drop, args.seed)
+    t1 = time.perf_counter()
+    graph = build_graph_columns(cols)
+    t2 = time.perf_counter()
+    sig = source_signature(["synthetic", args.layout, str(args.segments), str(args.seed)])
+    size = write_snapshot(graph, args.out, sig)
+    print(f"[Sieć] {describe(cols)}")
+    print(f"[Sieć] |V|: {graph.n_vertices} || |E|: {graph.n_edges} || generowanie {t1 - t0:.2f} s || "
+          f"budowa {t2 - t1:.2f} s || snapshot {size / 1e6:.1f} MB ({time.perf_counter() - t2:.2f} s) -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Wspólne dane testów: małe sieci syntetyczne (synthetic.generate) i pary zapytań z największej SCC.
+Moduły projektu leżą w katalogu głównym (skrypty bez pakietu) - dopisany do sys.path.
+
+Uruchomienie (bez arcpy):
+    python -m pytest -q
+"""
+import os
+import sys
+from typing import List, Tuple
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmark import query_pairs                  # noqa: E402
+from bulk_build import RoadColumns, build_graph_columns   # noqa: E402
+from csr_graph import KLASY, CSRGraph, RoadRow       # noqa: E402
+from synthetic import generate                       # noqa: E402
+
+
+def road_rows(cols: RoadColumns) -> List[RoadRow]:
+    """Kolumny -> wiersze jak z read_road_rows (klasa jako kod tekstowy)."""
+    return [(int(cols.oid[i]), float(cols.x1[i]), float(cols.y1[i]), float(cols.x2[i]), float(cols.y2[i]),
+             float(cols.length[i]), KLASY[cols.klasa[i]], int(cols.kier[i])) for i in range(len(cols.oid))]
+
+
+@pytest.fixture(scope="session", params=["grid", "planar"])
+def cols(request) -> RoadColumns:
+    return generate(request.param, 3000, seed=2)
+
+
+@pytest.fixture(scope="session")
+def graph(cols) -> CSRGraph:
+    return build_graph_columns(cols)
+
+
+@pytest.fixture(scope="session")
+def pairs(graph) -> List[Tuple[int, int]]:
+    return query_pairs(graph, 25, seed=3)
+
+
+def same_cost(a: float, b: float) -> bool:
+    return a == b or abs(a - b) <= 1e-6 * max(1.0, abs(a))
@@ -0,0 +1,35 @@
+"""Trasy alternatywne i drzewa najkrótszych ścieżek z limitem kosztu."""
+import routing
+from alternatives import alternatives, shortest_path_tree
+from routing import INF
+
+from conftest import same_cost
+
+
+def test_limited_tree_keeps_only_settled(graph, pairs):
+    weights = routing.metric_weights(graph, "time")
+    s, t = pairs[0]
+    full = shortest_path_tree(graph, weights, s)
+    limit = sorted(full.dist[v] for v in full.order)[len(full.order) // 10]
+    tree = shortest_path_tree(graph, weights, s, limit=limit)
+    assert tree.settled == len(tree.order) == len(set(tree.order))
+    inside = set(tree.order)
+    for v in range(graph.max_vid + 1):
+        if v in inside:
+            assert tree.dist[v] == full.dist[v] <= limit
+        else:
+            assert tree.dist[v] == INF and tree.parent[v] == -1
+
+
+def test_alternatives_bounds(graph, pairs):
+    for s, t in pairs:
+        routes = alternatives(graph, s, t, k=3, max_stretch=0.25)
+        opt = routing.dijkstra(graph, s, t, "time").cost
+        if opt == INF:
+            assert routes == []
+            continue
+        assert same_cost(routes[0].cost, opt)
+        for r in routes:
+            assert r.cost <= 1.25 * opt * (1 + 1e-9)
+            assert r.nodes[0] == s and r.nodes[-1] == t and len(set(r.nodes)) == len(r.nodes)
+        assert len({tuple(r.edges) for r in routes}) == len(routes)
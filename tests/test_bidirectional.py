@@ -0,0 +1,30 @@
+"""Wyszukiwania dwukierunkowe względem jednokierunkowego Dijkstry."""
+import routing
+from components import ensure_components
+
+from conftest import same_cost
+
+
+def test_bidirectional_matches_dijkstra(graph, pairs):
+    for s, t in pairs:
+        length = routing.dijkstra(graph, s, t).cost
+        time = routing.dijkstra(graph, s, t, "time").cost
+        assert same_cost(routing.bidirectional_dijkstra(graph, s, t).cost, length)
+        assert same_cost(routing.bidirectional_a_star_length(graph, s, t).cost, length)
+        res = routing.bidirectional_a_star_speed(graph, s, t)
+        assert same_cost(res.cost, time)
+        assert res.nodes[0] == s and res.nodes[-1] == t
+        assert all(graph.edge_from(e) == u and graph.edge_to(e) == v
+                   for e, u, v in zip(res.edges, res.nodes, res.nodes[1:]))
+
+
+def test_bidirectional_across_components(graph, pairs):
+    """Pary spoza jednej SCC: osiągalne tylko w jedną stronę albo wcale."""
+    ensure_components(graph)
+    big = graph.scc[pairs[0][0]]
+    outside = [v for v in graph.vertex_ids() if graph.scc[v] != big][:10]
+    assert outside
+    for s, _ in pairs[:5]:
+        for v in outside:
+            for a, b in ((s, v), (v, s)):
+                assert same_cost(routing.bidirectional_dijkstra(graph, a, b).cost, routing.dijkstra(graph, a, b).cost)
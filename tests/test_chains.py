@@ -0,0 +1,36 @@
+"""Trasy na grafie ze ściągniętymi łańcuchami względem Dijkstry na pełnym grafie."""
+import pytest
+
+import routing
+from benchmark import query_pairs
+from bulk_build import build_graph_columns
+from chains import ChainGraph
+from synthetic import generate
+
+from conftest import same_cost
+
+
+@pytest.fixture(scope="module")
+def sparse():
+    """Rzadka siatka (dużo usuniętych odcinków) - wiele wierzchołków stopnia 2."""
+    return build_graph_columns(generate("grid", 3000, drop=0.35, seed=6))
+
+
+@pytest.mark.parametrize("metric", routing.METRICS)
+def test_chains_match_full_graph(sparse, metric):
+    cg = ChainGraph(sparse)
+    assert cg.graph.n_vertices < sparse.n_vertices
+    interior = [v for v in sparse.vertex_ids() if cg._on(v)]
+    assert interior
+    pairs = query_pairs(sparse, 25, seed=7) + list(zip(interior[:10], interior[-10:]))
+    weights = routing.metric_weights(sparse, metric)
+    for s, t in pairs:
+        ref = routing.dijkstra(sparse, s, t, metric)
+        res = cg.shortest_path(s, t, metric)
+        assert same_cost(res.cost, ref.cost)
+        if res.cost == routing.INF:
+            continue
+        assert res.nodes[0] == s and res.nodes[-1] == t
+        assert [sparse.edge_from(e) for e in res.edges] == res.nodes[:-1]
+        assert [sparse.edge_to(e) for e in res.edges] == res.nodes[1:]
+        assert same_cost(sum(weights[sparse.slot_of(e)] for e in res.edges), res.cost)
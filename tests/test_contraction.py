@@ -0,0 +1,22 @@
+"""Zapytania CH względem Dijkstry po czasie na tym samym grafie."""
+import routing
+from contraction import build_ch, ch_query
+
+from conftest import same_cost
+
+
+def test_ch_matches_dijkstra(graph, pairs):
+    ch = build_ch(graph)
+    for s, t in pairs:
+        res = ch_query(ch, graph, s, t)
+        ref = routing.dijkstra(graph, s, t, "time")
+        assert same_cost(res.cost, ref.cost)
+        assert res.nodes[0] == s and res.nodes[-1] == t
+        # trasa rozwinięta ze skrótów ma koszt taki jak wynik zapytania
+        w = routing.metric_weights(graph, "time")
+        assert same_cost(sum(w[graph.slot_of(e)] for e in res.edges), res.cost)
+
+
+def test_ch_same_vertex(graph, pairs):
+    s = pairs[0][0]
+    assert ch_query(build_ch(graph), graph, s, s).cost == 0.0
@@ -0,0 +1,83 @@
+"""CSR (build_graph_rows / build_graph_columns) względem słownikowej budowy grafu i Dijkstry z wersji wyjściowej."""
+from collections import defaultdict
+from heapq import heappop, heappush
+from typing import Dict, List, Tuple
+
+import routing
+from bulk_build import build_graph_columns
+from csr_graph import _snap_key, build_graph_rows, czy_dobry_kierunek
+from tiled_build import same_graph
+
+from conftest import road_rows
+
+
+def dict_graph(rows, snap_tol: float = 0.25) -> Tuple[Dict[int, Dict], Dict[int, Dict]]:
+    """Słowniki vertices / edges jak build_graph_from_fc przed CSR."""
+    vertices: Dict[int, Dict] = {}
+    edges: Dict[int, Dict] = {}
+    by_snap: Dict[Tuple[int, int], int] = {}
+    next_eid = 1
+    for oid, x1, y1, x2, y2, length_m, klasa, kier in rows:
+        for x, y in ((x1, y1), (x2, y2)):
+            k = _snap_key(x, y, snap_tol)
+            if k not in by_snap:
+                by_snap[k] = len(by_snap) + 1
+                vertices[by_snap[k]] = {"x": x, "y": y, "edge_out": []}
+        u, v = by_snap[_snap_key(x1, y1, snap_tol)], by_snap[_snap_key(x2, y2, snap_tol)]
+        pairs = {3: (), 1: ((u, v),), 2: ((v, u),)}.get(kier, ((u, v), (v, u)))
+        for a, b in pairs:
+            edges[next_eid] = {"id": next_eid, "id_from": a, "id_to": b, "edge_length_field": length_m,
+                               "kier_auto": kier, "klasa_drogi": klasa, "jezdnia_oid": oid}
+            vertices[a]["edge_out"].append(next_eid)
+            next_eid += 1
+    return vertices, edges
+
+
+def dict_dijkstra(vertices, edges, start: int, goal: int) -> Tuple[float, List[int]]:
+    dist: Dict[int, float] = defaultdict(lambda: routing.INF)
+    pred: Dict[int, Tuple[int, int]] = {}
+    visited = set()
+    dist[start] = 0.0
+    pq = [(0.0, start)]
+    while pq:
+        d, u = heappop(pq)
+        if u in visited: continue
+        visited.add(u)
+        if u == goal: break
+        for eid in vertices[u]["edge_out"]:
+            e = edges[eid]; v = e["id_to"]
+            if not czy_dobry_kierunek(e["kier_auto"], e["id_from"], e["id_to"], u) or v in visited: continue
+            nd = d + e["edge_length_field"]
+            if nd < dist[v]:
+                dist[v] = nd; pred[v] = (u, eid); heappush(pq, (nd, v))
+    eids, cur = [], goal
+    while cur in pred:
+        cur, eid = pred[cur]
+        eids.append(eid)
+    return dist[goal], eids[::-1]
+
+
+def test_csr_matches_dict_build(cols):
+    rows = road_rows(cols)
+    vertices, edges = dict_graph(rows)
+    g = build_graph_rows(rows)
+    assert (g.n_vertices, g.n_edges) == (len(vertices), len(edges))
+    for vid, v in vertices.items():
+        assert g.vertex_xy(vid) == (v["x"], v["y"])
+        assert [g.edge_ids[s] for s in g.out_slots(vid)] == v["edge_out"]
+    for eid, e in edges.items():
+        assert g.edge_record(eid) == (e["id_from"], e["id_to"], e["edge_length_field"], e["klasa_drogi"],
+                                      e["kier_auto"], e["jezdnia_oid"])
+
+
+def test_columns_build_matches_rows_build(cols):
+    assert same_graph(build_graph_columns(cols), build_graph_rows(road_rows(cols)))
+
+
+def test_dijkstra_matches_dict_search(cols, graph, pairs):
+    vertices, edges = dict_graph(road_rows(cols))
+    for s, t in pairs:
+        cost, eids = dict_dijkstra(vertices, edges, s, t)
+        res = routing.dijkstra(graph, s, t)
+        assert res.cost == cost
+        assert res.edges == eids
@@ -0,0 +1,128 @@
+"""GraphUpdater.apply względem pełnej przebudowy grafu ze zmienionych wierszy."""
+from collections import defaultdict
+
+import routing
+from benchmark import query_pairs
+from bulk_build import build_graph_columns
+from components import ensure_components
+from csr_graph import CSRGraphBuilder, build_graph_rows
+from graph_snapshot import open_snapshot, source_signature, write_snapshot
+from graph_update import GraphUpdater, component_labels, gdb_edits
+
+from conftest import road_rows, same_cost
+
+
+def adjacency(graph):
+    """Krawędzie po współrzędnych końców - numeracja vid / edge_id różni się od przebudowy."""
+    out = defaultdict(list)
+    for s in range(graph.n_edges):
+        rec = graph.edge_record(graph.edge_ids[s])
+        out[graph.vertex_xy(rec[0])].append((graph.vertex_xy(rec[1]),) + rec[2:])
+    return {xy: sorted(edges) for xy, edges in out.items()}
+
+
+def edit(rows):
+    """(wstawione, zmienione, usunięte oid, wiersze po zmianie) - każdy rodzaj zmiany po kilka razy."""
+    by_oid = {r[0]: r for r in rows}
+    oids = sorted(by_oid)
+    deleted = oids[0:40:4]
+    updated = []
+    for oid in oids[1:40:4]:                        # tylko atrybuty - zapis w miejscu
+        r = by_oid[oid]
+        updated.append(r[:5] + (r[5] * 1.5, "Z", r[7]))
+    for oid in oids[2:40:4]:                        # zmiana kierunku
+        r = by_oid[oid]
+        updated.append(r[:7] + ((r[7] + 1) % 4,))
+    for oid, other in zip(oids[3:40:4], oids[-10:]):   # przesunięty koniec na istniejący wierzchołek
+        r, o = by_oid[oid], by_oid[other]
+        updated.append((oid, r[1], r[2], o[3], o[4], r[5], r[6], r[7]))
+    nxt = max(oids) + 1
+    inserted = []
+    for i, (a, b) in enumerate(zip(oids[100:110], oids[200:210])):
+        ra, rb = by_oid[a], by_oid[b]
+        inserted.append((nxt + i, ra[1], ra[2], rb[3], rb[4], 123.0, "L", i % 3))
+    inserted.append((nxt + 10, rows[0][1], rows[0][2], -1000.0, -1000.0, 50.0, "D", 0))   # nowy wierzchołek
+    changed = {r[0]: r for r in updated}
+    after = [changed.get(r[0], r) for r in rows if r[0] not in set(deleted)] + inserted
+    return inserted, updated, deleted, after
+
+
+def test_update_matches_rebuild(cols):
+    g = build_graph_columns(cols)
+    for s, t in query_pairs(g, 5, seed=8):          # cache wag przed zmianą - musi być przeniesiony
+        routing.dijkstra(g, s, t, "time")
+    inserted, updated, deleted, after = edit(road_rows(cols))
+    version = g.version
+    GraphUpdater(g).apply(inserted=inserted, updated=updated, deleted=deleted)
+    full = build_graph_rows(after)
+    assert g.version == version + 1
+    assert g.n_edges == full.n_edges
+    assert adjacency(g) == adjacency(full)
+
+    vid = {g.vertex_xy(v): v for v in g.vertex_ids()}
+    for metric in routing.METRICS:
+        for s, t in query_pairs(full, 25, seed=9):
+            ref = routing.dijkstra(full, s, t, metric)
+            res = routing.dijkstra(g, vid[full.vertex_xy(s)], vid[full.vertex_xy(t)], metric)
+            assert same_cost(res.cost, ref.cost)
+
+
+def export_rows(graph):
+    """Wiersze klas nodes / edges jak z graph.export_graph_to_gdb (node_id / edge_id -> pola)."""
+    ensure_components(graph)
+    nodes = {v: (graph.xs[v], graph.ys[v], graph.scc[v], graph.wcc[v]) for v in graph.vertex_ids()}
+    edges = {e: graph.edge_record(e) for e in graph.edge_ids_sorted()}
+    return nodes, edges
+
+
+def load_rows(nodes, edges):
+    """Graf z wierszy klas jak gdb_graph.load_graph_from_gdb (kolejność kursora = kolejność wstawiania)."""
+    builder = CSRGraphBuilder()
+    for vid, (x, y, _, _) in nodes.items():
+        builder.add_vertex(vid, x, y)
+    for eid, rec in edges.items():
+        builder.add_edge(eid, *rec)
+    return builder.build()
+
+
+def test_gdb_round_trip(cols, tmp_path):
+    """update_gdb bez arcpy: snapshot (mmap) -> apply -> gdb_edits na wierszach klas -> snapshot z nowym podpisem."""
+    path = str(tmp_path / "graf.pag2graph")
+    nodes, edges = export_rows(build_graph_columns(cols))
+    before = source_signature(["gdb", "v1"])
+    write_snapshot(load_rows(nodes, edges), path, before)
+
+    g = open_snapshot(path, before)
+    updater = GraphUpdater(g)
+    updater.detach()                                # nadpisanie zmapowanego pliku niżej
+    old_labels = component_labels(g)
+    inserted, updated, deleted, _ = edit(road_rows(cols))
+    change = updater.apply(inserted=inserted, updated=updated, deleted=deleted)
+    edits = gdb_edits(g, change, old_labels)
+
+    for vid in edits.delete_nodes:
+        del nodes[vid]
+    for eid in edits.delete_edges:
+        del edges[eid]
+    for vid, scc, wcc in edits.update_nodes:
+        nodes[vid] = nodes[vid][:2] + (scc, wcc)
+    for eid, *rec in edits.update_edges:
+        edges[eid] = tuple(rec)
+    for vid, x, y, scc, wcc in edits.insert_nodes:
+        nodes[vid] = (x, y, scc, wcc)
+    for eid, *rec in edits.insert_edges:
+        edges[eid] = tuple(rec)
+
+    after = source_signature(["gdb", "v2"])         # fc_signature klas po edycji
+    write_snapshot(g, path, after)
+    assert open_snapshot(path, before) is None      # stary podpis - nieaktualny
+    snap = open_snapshot(path, after)
+    gdb = load_rows(nodes, edges)                   # to, co route_finder zbudowałby z klas
+    assert list(snap.vertex_ids()) == list(gdb.vertex_ids())
+    for v in gdb.vertex_ids():
+        assert snap.vertex_xy(v) == gdb.vertex_xy(v)
+        assert ([snap.edge_record(snap.edge_ids[s]) for s in snap.out_slots(v)] ==
+                [gdb.edge_record(gdb.edge_ids[s]) for s in gdb.out_slots(v)])
+        assert (snap.scc[v], snap.wcc[v]) == nodes[v][2:]
+    for s, t in query_pairs(gdb, 25, seed=10):
+        assert routing.dijkstra(snap, s, t, "time").cost == routing.dijkstra(gdb, s, t, "time").cost
@@ -0,0 +1,50 @@
+"""Liczniki Instrumentation.measure dla każdej kolejki priority_queues."""
+import pytest
+
+import priority_queues
+import routing
+from alternatives import shortest_path_tree
+from instrumentation import Instrumentation
+from ksp import k_shortest_paths
+
+QUEUE_SPECS = list(priority_queues.QUEUES) + ["dial:5"]
+
+
+@pytest.mark.parametrize("queue", QUEUE_SPECS)
+def test_queue_counters_reported(graph, pairs, queue):
+    ins = Instrumentation()
+    original = priority_queues._queue
+    for s, t in pairs[:5]:
+        res = ins.measure("a_star_speed", (s, t), routing.a_star_speed, graph, s, t, queue=queue)
+        rec = ins.last
+        if res.settled == 0:
+            continue
+        assert rec["heap_pushes"] > 0 and rec["heap_pops"] >= res.settled and rec["max_heap"] > 0
+        if queue in ("binary", "4ary"):
+            assert rec["stale_pops"] == 0           # decrease-key - bez nieaktualnych wpisów
+    assert priority_queues._queue is original
+
+
+def test_reopened_queue_counters_accumulate(graph, pairs):
+    """Yen otwiera kolejkę odgałęzień wiele razy - liczniki sumowane, nie tylko z ostatniego otwarcia."""
+    ins = Instrumentation()
+    s, t = pairs[0]
+    weights = routing.metric_weights(graph, "time")
+    ins.measure("tree", (s, t), shortest_path_tree, graph, weights, t, True)
+    tree_pushes = ins.last["heap_pushes"]           # drzewo wstecz Yena - zawsze heapq
+    for queue in ("heapq", "binary"):
+        ins.measure("ksp", (s, t), lambda: list(k_shortest_paths(graph, s, t, 4, queue=queue)))
+        spur_pushes = ins.last["heap_pushes"] - tree_pushes
+        assert spur_pushes > 3                      # >= jedno wstawienie w każdym odgałęzieniu
+
+
+def test_relaxations_separate_from_queue_pushes(graph, pairs):
+    ins = Instrumentation(records=False)
+    for s, t in pairs:
+        ins.measure("heapq", (s, t), routing.dijkstra, graph, s, t, "time")
+        assert ins.last["relaxations"] == ins.last["heap_pushes"]     # heapq: każda poprawa to nowy wpis
+        ins.measure("binary", (s, t), routing.dijkstra, graph, s, t, "time", queue="binary")
+        assert ins.last["heap_pushes"] <= ins.last["relaxations"]
+    totals = ins.summary()
+    assert totals["binary"]["relaxations"] == totals["heapq"]["relaxations"]
+    assert totals["binary"]["heap_pushes"] < totals["binary"]["relaxations"]   # decrease-key bez nowych wpisów
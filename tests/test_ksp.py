@@ -0,0 +1,46 @@
+"""Yen (k_shortest_paths) względem pełnego wyliczenia tras bez pętli na małej sieci."""
+from typing import List
+
+import pytest
+
+import routing
+from benchmark import query_pairs
+from bulk_build import build_graph_columns
+from ksp import k_shortest_paths
+from synthetic import generate
+
+from conftest import same_cost
+
+
+def all_loopless_costs(graph, weights, s: int, t: int) -> List[float]:
+    costs: List[float] = []
+    on_path = {s}
+
+    def walk(u: int, cost: float) -> None:
+        if u == t:
+            costs.append(cost)
+            return
+        for slot in graph.out_slots(u):
+            v = graph.targets[slot]
+            if weights[slot] == routing.INF or v in on_path:
+                continue
+            on_path.add(v)
+            walk(v, cost + weights[slot])
+            on_path.discard(v)
+
+    walk(s, 0.0)
+    return sorted(costs)
+
+
+@pytest.mark.parametrize("metric", routing.METRICS)
+def test_yen_matches_enumeration(metric):
+    graph = build_graph_columns(generate("planar", 24, seed=4))
+    weights = routing.metric_weights(graph, metric)
+    for s, t in query_pairs(graph, 8, seed=5):
+        expected = all_loopless_costs(graph, weights, s, t)[:12]
+        found = list(k_shortest_paths(graph, s, t, 12, metric))
+        assert len(found) == len(expected)
+        for res, cost in zip(found, expected):
+            assert same_cost(res.cost, cost)
+            assert len(set(res.nodes)) == len(res.nodes)
+        assert len({tuple(r.edges) for r in found}) == len(found)
@@ -0,0 +1,19 @@
+"""A* z heurystyką ALT względem Dijkstry (koszt dokładny, nie więcej rozliczonych niż sam Euklides)."""
+import pytest
+
+import routing
+from landmarks import build_landmarks
+
+from conftest import same_cost
+
+
+@pytest.mark.parametrize("metric", routing.METRICS)
+def test_alt_matches_dijkstra(graph, pairs, metric):
+    lm = build_landmarks(graph, metric, k=4)
+    search = routing.a_star_speed if metric == "time" else routing.a_star_length
+    for s, t in pairs:
+        ref = routing.dijkstra(graph, s, t, metric)
+        plain = search(graph, s, t)
+        alt = search(graph, s, t, heuristic=lm.heuristic(t, s))
+        assert same_cost(alt.cost, ref.cost)
+        assert alt.settled <= plain.settled
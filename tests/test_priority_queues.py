@@ -0,0 +1,57 @@
+"""Kolejki priorytetowe (priority_queues.QUEUES) w kernelach routing.py - te same koszty co heapq."""
+import pytest
+
+import routing
+from contraction import build_ch, ch_query
+from ksp import k_shortest_paths
+from priority_queues import QUEUES, compare_queues, parse_queue
+
+from conftest import same_cost
+
+SPECS = list(QUEUES) + ["radix:0.5", "dial:5"]
+KERNELS = {
+    "dijkstra_length": lambda g, s, t, q: routing.dijkstra(g, s, t, "length", queue=q),
+    "dijkstra_time": lambda g, s, t, q: routing.dijkstra(g, s, t, "time", queue=q),
+    "a_star_length": lambda g, s, t, q: routing.a_star_length(g, s, t, queue=q),
+    "a_star_speed": lambda g, s, t, q: routing.a_star_speed(g, s, t, queue=q),
+}
+
+
+@pytest.mark.parametrize("kernel", KERNELS)
+def test_queues_match_heapq(graph, pairs, kernel):
+    search = KERNELS[kernel]
+    for s, t in pairs:
+        ref = search(graph, s, t, "heapq")
+        for spec in SPECS[1:]:
+            res = search(graph, s, t, spec)
+            assert same_cost(res.cost, ref.cost), spec
+            assert res.nodes[:1] == ref.nodes[:1] and res.nodes[-1:] == ref.nodes[-1:]
+
+
+@pytest.mark.parametrize("metric", routing.METRICS)
+def test_compare_queues_no_mismatches(graph, pairs, metric):
+    results = compare_queues(graph, pairs[:10], SPECS, metric)
+    assert list(results) == SPECS
+    assert all(r["mismatches"] == 0 for r in results.values())
+
+
+def test_exact_queues_in_bidirectional_and_ch(graph, pairs):
+    ch = build_ch(graph)
+    s, t = next((s, t) for s, t in pairs if s != t)
+    ref = routing.dijkstra(graph, s, t, "time").cost
+    for spec in ("binary", "4ary"):
+        assert same_cost(routing.bidirectional_a_star_speed(graph, s, t, queue=spec).cost, ref)
+        assert same_cost(ch_query(ch, graph, s, t, queue=spec).cost, ref)
+    for spec in ("radix", "dial:5"):
+        with pytest.raises(ValueError):
+            routing.bidirectional_dijkstra(graph, s, t, queue=spec)
+        with pytest.raises(ValueError):
+            ch_query(ch, graph, s, t, queue=spec)
+        with pytest.raises(ValueError):
+            next(k_shortest_paths(graph, s, t, 2, queue=spec))
+
+
+@pytest.mark.parametrize("spec", ["fib", "radix:0", "dial:-1", "dial:x"])
+def test_bad_queue_spec(spec):
+    with pytest.raises(ValueError):
+        parse_queue(spec)
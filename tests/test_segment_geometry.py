@@ -0,0 +1,32 @@
+"""route_coords - trasa z pełnej geometrii odcinków (kierunek linii względem krawędzi)."""
+import numpy as np
+
+import routing
+from segment_geometry import SegmentGeometry, route_coords
+
+
+def bent_geometry(cols) -> SegmentGeometry:
+    """Odcinki z dodatkowym punktem załamania w środku (przesunięty o 3 m w bok)."""
+    oid = np.repeat(cols.oid.astype(np.int64), 3)
+    x = np.column_stack((cols.x1, (cols.x1 + cols.x2) / 2 + 3.0, cols.x2)).ravel()
+    y = np.column_stack((cols.y1, (cols.y1 + cols.y2) / 2, cols.y2)).ravel()
+    return SegmentGeometry.from_points(oid, x, y)
+
+
+def test_route_coords_follow_geometry(cols, graph, pairs):
+    geometry = bent_geometry(cols)
+    for s, t in pairs:
+        res = routing.dijkstra(graph, s, t)
+        if not res.edges:
+            continue
+        plain = route_coords(graph, res.edges)
+        assert plain == [graph.vertex_xy(v) for v in res.nodes]
+        full = route_coords(graph, res.edges, geometry)
+        assert len(full) == 2 * len(res.edges) + 1
+        # co drugi punkt to węzeł trasy (z dokładnością kwantowania 1 mm), pomiędzy - załamania
+        for (x, y), v in zip(full[::2], res.nodes):
+            vx, vy = graph.vertex_xy(v)
+            assert abs(x - vx) <= 1e-3 and abs(y - vy) <= 1e-3
+        for (x, y), u, v in zip(full[1::2], res.nodes, res.nodes[1:]):
+            (ux, uy), (vx, vy) = graph.vertex_xy(u), graph.vertex_xy(v)
+            assert abs(x - ((ux + vx) / 2 + 3.0)) <= 1e-3 and abs(y - (uy + vy) / 2) <= 1e-3
@@ -0,0 +1,35 @@
+"""build_graph_tiled (kafle + scalanie) względem sekwencyjnej build_graph_columns."""
+import numpy as np
+import pytest
+
+from bulk_build import RoadColumns, build_graph_columns
+from tiled_build import build_graph_tiled, same_graph
+
+
+def take(cols: RoadColumns, rows) -> RoadColumns:
+    return RoadColumns(*(a[rows] for a in cols))
+
+
+@pytest.mark.parametrize("tiles", [(1, 1), (2, 3), (4, 4), (9, 7)])
+def test_tiled_matches_sequential(cols, tiles):
+    assert same_graph(build_graph_tiled(cols, tiles=tiles), build_graph_columns(cols))
+
+
+def test_tiled_with_jittered_ends(cols):
+    """Końce przesunięte o ułamek tolerancji - klucze przyciągania rozchodzą się także na granicach kafli."""
+    rng = np.random.default_rng(11)
+    n = len(cols.oid)
+    jittered = cols._replace(x1=cols.x1 + rng.uniform(-0.2, 0.2, n), y2=cols.y2 + rng.uniform(-0.2, 0.2, n))
+    for snap_tol in (0.25, 1.0):
+        assert same_graph(build_graph_tiled(jittered, snap_tol, tiles=(5, 5)),
+                          build_graph_columns(jittered, snap_tol))
+
+
+def test_tiled_small_inputs(cols):
+    for rows in (np.arange(0), np.arange(1), np.arange(7)):
+        part = take(cols, rows)
+        assert same_graph(build_graph_tiled(part, tiles=(3, 3)), build_graph_columns(part))
+
+
+def test_tiled_in_processes(cols):
+    assert same_graph(build_graph_tiled(cols, tiles=(3, 3), processes=2), build_graph_columns(cols))
@@ -0,0 +1,34 @@
+"""day_profile (wszystkie wyjazdy naraz) względem td_a_star uruchamianego osobno dla każdego wyjazdu."""
+import pytest
+
+from routing import INF
+from time_dependent import DAY_S, compile_profiles, day_profile, route_travel_time, td_a_star
+
+from conftest import same_cost
+
+DEPARTURES = [0.0, 6.5 * 3600, 7.75 * 3600, 12 * 3600, 16.5 * 3600, DAY_S - 300]
+
+
+@pytest.fixture(scope="module")
+def profiles(graph):
+    return compile_profiles(graph)
+
+
+def test_day_profile_matches_td_a_star(graph, pairs, profiles):
+    for s, t in pairs[:12]:
+        day = day_profile(graph, s, t, profiles, departures=DEPARTURES)
+        assert day.departures == DEPARTURES
+        for dep, travel, route in zip(DEPARTURES, day.travel_s, day.routes):
+            ref = td_a_star(graph, s, t, dep, profiles)
+            assert same_cost(travel, ref.cost)
+            if travel < INF:
+                assert same_cost(route_travel_time(graph, route, dep, profiles), travel)
+                assert same_cost(route_travel_time(graph, ref.edges, dep, profiles), ref.cost)
+
+
+def test_day_profile_default_departures(graph, pairs, profiles):
+    s, t = pairs[0]
+    day = day_profile(graph, s, t, profiles, step_s=3600.0)
+    assert day.departures == [3600.0 * h for h in range(24)]
+    assert len(day.travel_s) == len(day.routes) == 24
+    assert day_profile(graph, s, s, profiles, step_s=3600.0).travel_s == [0.0] * 24
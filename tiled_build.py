@@ -0,0 +1,282 @@
+"""
+Budowa CSRGraph z kafli przestrzennych w puli procesów (zamiast jednego przebiegu z globalnym
+słownikiem vertex_ids_by_snap).
+
+Odcinki dzielone są na siatkę nx × ny kafli nad zasięgiem wg pierwszego końca (x1, y1). Proces
+dla kafla składa fragment CSR kafla: klucze _snap_key końców -> wierzchołki kafla (numerowane
+po pierwszym wystąpieniu w kaflu), krawędzie jego odcinków z globalnymi edge_id i sloty kafla
+posortowane po źródle (offsets + targets). Każdy klucz ma kafel-właściciel (kafel punktu po
+przyciągnięciu); wierzchołki kafla o kluczu z innego kafla proces zgłasza jako graniczne.
+
+Scalanie w procesie głównym uzgadnia tylko klucze graniczne (odwołania między kaflami i ich
+odpowiedniki w kaflu-właścicielu) i przenumerowuje fragmenty: numer wierzchołka = kolejność
+pierwszego wystąpienia (znaczniki pozycji końców + cumsum, bez sortowania), slot = początek
+źródła + pozycja we fragmencie; tylko sloty ze źródłem granicznym są porządkowane po edge_id
+między kaflami. Siatka snap_tol jest globalna, więc koniec na granicy kafli ma w obu kaflach ten
+sam klucz całkowity. Graf jest identyczny z build_graph_columns (i build_graph_rows) dla tego
+samego snap_tol, niezależnie od siatki kafli i liczby procesów.
+
+Uruchomienie (bez arcpy, sieć syntetyczna; --check porównuje z budową sekwencyjną):
+    python tiled_build.py planar:2000000 --tiles 4x4 --processes 4 --check
+"""
+from multiprocessing import Pool
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+import argparse
+import os
+import time
+
+import numpy as np
+
+from bulk_build import (RoadColumns, build_graph_columns, edge_counts, expand_edges, graph_from_slots, snap_keys,
+                        stable_order)
+from csr_graph import CSRGraph
+
+
+class TileGrid(NamedTuple):
+    x0: float               # lewy dolny róg siatki
+    y0: float
+    fx: float               # kafli na jednostkę współrzędnej
+    fy: float
+    nx: int
+    ny: int
+
+
+class KeySpace(NamedTuple):
+    """Kod klucza _snap_key: (kx - kx0) * span + (ky - ky0) - jedna liczba int64 zamiast pary."""
+    kx0: int
+    ky0: int
+    span: int
+
+
+class TileFragment(NamedTuple):
+    codes: np.ndarray       # int64, kody kluczy wierzchołków kafla (rosnąco)
+    code_vertex: np.ndarray # int64, wierzchołek kafla dla codes[i]
+    first: np.ndarray       # int64 per wierzchołek kafla: 2 * wiersz + koniec pierwszego wystąpienia w kaflu
+    border: np.ndarray      # int64, wierzchołki kafla o kluczu z innego kafla
+    border_code: np.ndarray # int64, ich kody
+    border_owner: np.ndarray  # int64, ich kafel-właściciel (numer w siatce)
+    offsets: np.ndarray     # int64, CSR kafla: sloty wierzchołka v to offsets[v]:offsets[v + 1]
+    targets: np.ndarray     # int32 per slot kafla: wierzchołek kafla
+    eids: np.ndarray        # int32 per slot kafla: edge_id (globalny)
+    rows: np.ndarray        # int32 per slot kafla: wiersz odcinka (globalny)
+
+
+def tile_grid(cols: RoadColumns, nx: int, ny: int) -> TileGrid:
+    x0, x1 = float(cols.x1.min()), float(cols.x1.max())
+    y0, y1 = float(cols.y1.min()), float(cols.y1.max())
+    return TileGrid(x0, y0, nx / max(x1 - x0, 1e-9), ny / max(y1 - y0, 1e-9), nx, ny)
+
+
+def tile_of(grid: TileGrid, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Numer kafla (ix * ny + iy) punktów; punkty poza zasięgiem - kafel brzegowy."""
+    ix = np.clip(((x - grid.x0) * grid.fx).astype(np.int64), 0, grid.nx - 1)
+    iy = np.clip(((y - grid.y0) * grid.fy).astype(np.int64), 0, grid.ny - 1)
+    return ix * grid.ny + iy
+
+
+def tile_rows(cols: RoadColumns, grid: TileGrid) -> Tuple[List[int], List[np.ndarray]]:
+    """(numery kafli, numery wierszy rosnąco) niepustych kafli siatki wg (x1, y1)."""
+    tile = tile_of(grid, cols.x1, cols.y1)
+    order = stable_order(tile)                        # wiersze kafla pozostają rosnąco
+    bounds = np.searchsorted(tile[order], np.arange(grid.nx * grid.ny + 1))
+    nonempty = [t for t in range(grid.nx * grid.ny) if bounds[t + 1] > bounds[t]]
+    return nonempty, [order[bounds[t]:bounds[t + 1]] for t in nonempty]
+
+
+def key_space(cols: RoadColumns, snap_tol: float) -> Optional[KeySpace]:
+    """Zakres kluczy _snap_key końców całej sieci; None gdy kody nie mieszczą się w int64."""
+    lo = [min(float(a.min()), float(b.min())) for a, b in ((cols.x1, cols.x2), (cols.y1, cols.y2))]
+    hi = [max(float(a.max()), float(b.max())) for a, b in ((cols.x1, cols.x2), (cols.y1, cols.y2))]
+    (kx0, ky0), (kx1, ky1) = ([int(k[0]) for k in snap_keys(np.array([x]), np.array([y]), snap_tol)]
+                              for x, y in (lo, hi))
+    span = ky1 - ky0 + 1
+    return KeySpace(kx0, ky0, span) if (kx1 - kx0 + 1) * span < 2 ** 62 else None
+
+
+def tile_fragment(tile: int, rows: np.ndarray, x1: np.ndarray, y1: np.ndarray, x2: np.ndarray,
+                  y2: np.ndarray, kier: np.ndarray, eid_base: np.ndarray, snap_tol: float,
+                  keys: KeySpace, grid: TileGrid) -> TileFragment:
+    """
+    Fragment CSR kafla z jego odcinków (`rows` - numery globalne, rosnąco; `eid_base` - liczba
+    krawędzi odcinków przed każdym wierszem w całej sieci).
+    """
+    k = len(rows)
+    px = np.empty(2 * k); px[0::2] = x1; px[1::2] = x2
+    py = np.empty(2 * k); py[0::2] = y1; py[1::2] = y2
+    kx, ky = snap_keys(px, py, snap_tol)
+    code = (kx - keys.kx0) * keys.span + (ky - keys.ky0)
+    by_code = np.argsort(code, kind="stable")         # pierwszy w grupie = najwcześniejszy koniec
+    sc = code[by_code]
+    new = np.concatenate(([True], sc[1:] != sc[:-1]))
+    head = by_code[new]
+    order = np.argsort(head)                          # wierzchołki kafla po pierwszym wystąpieniu
+    vertex_of_code = np.empty(len(head), np.int64); vertex_of_code[order] = np.arange(len(head))
+    local = np.empty(2 * k, np.int64); local[by_code] = vertex_of_code[np.cumsum(new) - 1]
+    head = head[order]
+    first = 2 * np.asarray(rows, np.int64)[head >> 1] + (head & 1)
+
+    owner = tile_of(grid, kx[head] * snap_tol, ky[head] * snap_tol)
+    border = np.flatnonzero(owner != tile)
+
+    row, within, src, dst = expand_edges(kier, local[0::2], local[1::2])
+    slot = stable_order(src)
+    offsets = np.zeros(len(head) + 1, np.int64)
+    np.cumsum(np.bincount(src, minlength=len(head)), out=offsets[1:])
+    # per slot int32 (jak tablice CSRGraph) - połowa danych do przesłania z procesu
+    return TileFragment(sc[new], vertex_of_code, first, border, code[head[border]], owner[border], offsets,
+                        dst[slot].astype(np.int32), (eid_base[row] + within + 1)[slot].astype(np.int32),
+                        np.asarray(rows, np.int32)[row[slot]])
+
+
+def _tile_task(task) -> TileFragment:
+    return tile_fragment(*task)
+
+
+def _border_vertices(tiles: Sequence[int], parts: Sequence[TileFragment]
+                     ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Wierzchołki kafli z kluczem występującym w więcej niż jednym kaflu: odwołania do klucza
+    z innego kafla i ich odpowiedniki w kaflu-właścicielu. Zwraca (kod, pozycja pierwszego
+    wystąpienia w kaflu, indeks fragmentu, wierzchołek kafla).
+    """
+    part_of_tile = {t: i for i, t in enumerate(tiles)}
+    code, first, part, vertex = [], [], [], []
+    for i, p in enumerate(parts):
+        code.append(p.border_code); first.append(p.first[p.border])
+        part.append(np.full(len(p.border), i, np.int64)); vertex.append(p.border)
+    ref_code = np.concatenate(code) if code else np.zeros(0, np.int64)
+    ref_owner = np.concatenate([p.border_owner for p in parts]) if parts else np.zeros(0, np.int64)
+    for owner in np.unique(ref_owner):
+        i = part_of_tile.get(int(owner))
+        if i is None:
+            continue                                  # kafel-właściciel bez własnych odcinków
+        p = parts[i]
+        want = np.unique(ref_code[ref_owner == owner])
+        at = np.minimum(np.searchsorted(p.codes, want), len(p.codes) - 1)
+        hit = p.codes[at] == want
+        v = p.code_vertex[at[hit]]
+        code.append(want[hit]); first.append(p.first[v]); part.append(np.full(len(v), i, np.int64)); vertex.append(v)
+    if not code:
+        return (np.zeros(0, np.int64),) * 4
+    return tuple(np.concatenate(a) for a in (code, first, part, vertex))
+
+
+def merge_tiles(cols: RoadColumns, tiles: Sequence[int], parts: Sequence[TileFragment]) -> CSRGraph:
+    """Uzgodnienie wierzchołków granicznych i przenumerowanie fragmentów kafli (jak build_graph_columns)."""
+    n = len(cols.oid)
+    # wierzchołek graniczny: pierwsze wystąpienie = najmniejsza pozycja we wszystkich kaflach
+    b_code, b_first, b_part, b_vertex = _border_vertices(tiles, parts)
+    by_code = np.lexsort((b_first, b_code))
+    sc = b_code[by_code]
+    new = np.concatenate(([True], sc[1:] != sc[:-1])) if len(sc) else np.zeros(0, bool)
+    group = np.empty(len(sc), np.int64); group[by_code] = np.cumsum(new) - 1
+    g_first = b_first[by_code[new]][group]            # per wpis: globalne pierwsze wystąpienie
+
+    shared = [np.zeros(len(p.first), bool) for p in parts]
+    for i, s in enumerate(shared):
+        s[b_vertex[b_part == i]] = True
+    # numer wierzchołka = liczba pierwszych wystąpień do pozycji włącznie
+    mark = np.zeros(2 * n, bool)
+    for p, s in zip(parts, shared):
+        mark[p.first[~s]] = True
+    mark[g_first] = True
+    vid_at = np.cumsum(mark)
+    gv = [vid_at[p.first] for p in parts]
+    for i, v in enumerate(gv):
+        sel = b_part == i
+        v[b_vertex[sel]] = vid_at[g_first[sel]]
+
+    heads = np.flatnonzero(mark)
+    max_vid = len(heads)
+    xs = np.full(max_vid + 1, np.nan); ys = np.full(max_vid + 1, np.nan)
+    end = (heads & 1).astype(bool); r = heads >> 1
+    xs[1:] = np.where(end, cols.x2[r], cols.x1[r]); ys[1:] = np.where(end, cols.y2[r], cols.y1[r])
+
+    # sloty: fragmenty są już po źródle, więc slot = początek źródła + pozycja w grupie fragmentu
+    deg = [np.diff(p.offsets) for p in parts]
+    src = np.concatenate([np.repeat(v, d) for v, d in zip(gv, deg)]) if parts else np.zeros(0, np.int64)
+    dst = np.concatenate([v[p.targets] for v, p in zip(gv, parts)]) if parts else np.zeros(0, np.int64)
+    eids = np.concatenate([p.eids for p in parts]) if parts else np.zeros(0, np.int64)
+    rows = np.concatenate([p.rows for p in parts]) if parts else np.zeros(0, np.int64)
+    rank = np.concatenate([np.arange(len(p.targets)) - np.repeat(p.offsets[:-1], d)
+                           for p, d in zip(parts, deg)]) if parts else np.zeros(0, np.int64)
+    # źródło graniczne ma sloty w kilku fragmentach - kolejność po edge_id tylko dla nich
+    cross = np.flatnonzero(np.concatenate([np.repeat(s, d) for s, d in zip(shared, deg)])) if parts else np.zeros(0, np.int64)
+    cross = cross[np.lexsort((eids[cross], src[cross]))]
+    cs = src[cross]
+    starts = np.flatnonzero(np.concatenate(([True], cs[1:] != cs[:-1]))) if len(cs) else np.zeros(0, np.int64)
+    rank[cross] = np.arange(len(cs)) - np.repeat(starts, np.diff(np.append(starts, len(cs))))
+
+    out_offsets = np.zeros(max_vid + 2, np.int64)
+    np.cumsum(np.bincount(src, minlength=max_vid + 1), out=out_offsets[1:])
+    slot = out_offsets[src] + rank
+    m = len(src)
+    s_src = np.empty(m, np.int64); s_dst = np.empty(m, np.int64)
+    s_eid = np.empty(m, np.int64); s_row = np.empty(m, np.int64)
+    s_src[slot] = src; s_dst[slot] = dst; s_eid[slot] = eids; s_row[slot] = rows
+    return graph_from_slots(cols, s_row, s_src, s_dst, s_eid, xs, ys)
+
+
+def build_graph_tiled(cols: RoadColumns, snap_tol: float = 0.25, tiles: Tuple[int, int] = (4, 4),
+                      processes: int = 1) -> CSRGraph:
+    """Graf identyczny z build_graph_columns(cols, snap_tol); fragmenty kafli liczone w `processes` procesach."""
+    keys = key_space(cols, snap_tol) if len(cols.oid) else None
+    if keys is None:
+        return build_graph_columns(cols, snap_tol)    # pusta sieć albo klucze poza int64
+    grid = tile_grid(cols, *tiles)
+    tile_ids, rows = tile_rows(cols, grid)
+    cnt = edge_counts(cols.kier)
+    eid_base = (np.cumsum(cnt) - cnt).astype(np.int32)    # edge_id = eid_base[wiersz] + numer w wierszu + 1
+    tasks = [(t, r.astype(np.int32), cols.x1[r], cols.y1[r], cols.x2[r], cols.y2[r], cols.kier[r], eid_base[r],
+              snap_tol, keys, grid) for t, r in zip(tile_ids, rows)]
+    if processes <= 1 or len(tasks) <= 1:
+        parts = [_tile_task(t) for t in tasks]
+    else:
+        with Pool(min(processes, len(tasks))) as pool:
+            parts = pool.map(_tile_task, tasks, chunksize=1)   # wyniki w kolejności kafli
+    return merge_tiles(cols, tile_ids, parts)
+
+
+def same_graph(a: CSRGraph, b: CSRGraph) -> bool:
+    """Równość wszystkich tablic CSR (NaN w xs / ys traktowane jako równe)."""
+    if (a.n_vertices, a.n_edges) != (b.n_vertices, b.n_edges):
+        return False
+    for name in ("offsets", "sources", "targets", "lengths", "klasa", "kier", "passable", "edge_ids",
+                 "jezdnia_oid", "edge_slot", "in_offsets", "in_slots"):
+        if getattr(a, name) != getattr(b, name):
+            return False
+    return all(np.array_equal(np.asarray(getattr(a, c)), np.asarray(getattr(b, c)), equal_nan=True)
+               for c in ("xs", "ys"))
+
+
+def _parse_tiles(text: str) -> Tuple[int, int]:
+    nx, _, ny = text.lower().partition("x")
+    return int(nx), int(ny or nx)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Budowa grafu z kafli w puli procesów")
+    ap.add_argument("network", help="sieć syntetyczna 'grid:200000' / 'planar:50000'")
+    ap.add_argument("--tiles", type=_parse_tiles, default=(4, 4), help="siatka kafli, np. 4x4")
+    ap.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--snap-tol", type=float, default=0.25)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--check", action="store_true", help="porównanie z build_graph_columns")
+    args = ap.parse_args(argv)
+
+    from synthetic import generate
+    layout, _, size = args.network.partition(":")
+    cols = generate(layout, int(size or 100_000), seed=args.seed)
+    t0 = time.perf_counter()
+    graph = build_graph_tiled(cols, args.snap_tol, args.tiles, args.processes)
+    tiled_s = time.perf_counter() - t0
+    print(f"[Kafle {args.tiles[0]}x{args.tiles[1]}] |V|: {graph.n_vertices} || |E|: {graph.n_edges} || "
+          f"{tiled_s:.2f} s ({args.processes} proc.)")
+    if args.check:
+        t0 = time.perf_counter()
+        ref = build_graph_columns(cols, args.snap_tol)
+        print(f"[Sekwencyjnie] {time.perf_counter() - t0:.2f} s || identyczny: {same_graph(graph, ref)}")
+
+
+if __name__ == "__main__":
+    main()
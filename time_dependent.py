@@ -0,0 +1,353 @@
+"""
+Trasy zależne od pory dnia: czas przejazdu krawędzi = czas swobodny (profil prędkości) * φ(t).
+
+φ(t) - współczynnik czasu per klasa drogi (opcjonalnie per krawędź), zadany w punktach co
+`step` sekund doby (domyślnie co godzinę: udział prędkości profilu o pełnej godzinie),
+między punktami liniowo, okresowo co dobę - czas przejazdu jest więc funkcją kawałkami liniową.
+Przechowywane: jedna tablica 'd' wierszy × punktów (+ opcjonalnie wiersz per slot), wagi
+swobodne z routing.metric_weights. Przy kompilacji sprawdzany jest warunek FIFO (późniejszy
+wyjazd nie daje wcześniejszego przyjazdu: nachylenie czasu przejazdu >= -1), więc Dijkstra / A*
+po czasie przyjazdu daje najwcześniejszy przyjazd. Heurystyka A*: Euklides * time_scale * min φ
+- dolne ograniczenie dla dowolnej godziny wyjazdu (dopuszczalna i spójna).
+
+day_profile liczy czasy przejazdu dla wszystkich godzin wyjazdu (np. 96 co 15 min) jednym
+przeszukiwaniem: etykieta wierzchołka to wektor czasów przyjazdu (numpy), wierzchołek wraca do
+kolejki, gdy poprawi się którakolwiek składowa. Wynik jak z 96 osobnych wyszukiwań.
+
+Uruchomienie (bez arcpy):
+    python time_dependent.py graf.pag2graph 12 3456 --departure 07:30
+    python time_dependent.py graf.pag2graph 12 3456 --day --step 15 --hourly godziny.json
+Plik godzin (JSON): {"hourly": {"G": [24 udziały prędkości], ...}, "edges": {"edge_id": [...]}}
+"""
+from heapq import heappop, heappush
+from array import array
+from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+import argparse
+import json
+import math
+import time
+
+import numpy as np
+
+from components import maybe_reachable
+from csr_graph import KLASY, CSRGraph
+from profiles import load_profile
+from routing import INF, SPEED_KPH, SearchResult, metric_weights, time_scale
+from search_workspace import workspace_for, workspace_path
+
+DAY_S = 86400.0
+
+# udział prędkości profilu o pełnej godzinie 0:00 .. 23:00 (szczyty 7-9 i 15-18)
+_URBAN = [1.0] * 6 + [0.8, 0.55, 0.6, 0.8] + [0.85] * 5 + [0.7, 0.55, 0.6, 0.8] + [0.9, 0.95, 1.0, 1.0, 1.0]
+_ARTERIAL = [1.0] * 6 + [0.9, 0.7, 0.75, 0.9] + [0.95] * 5 + [0.85, 0.7, 0.75, 0.9] + [1.0] * 5
+_LOCAL = [1.0] * 6 + [0.9, 0.8, 0.8, 0.9] + [0.95] * 5 + [0.9, 0.8, 0.8, 0.9] + [1.0] * 5
+DEFAULT_HOURLY: Dict[str, List[float]] = {"A": _ARTERIAL, "S": _ARTERIAL, "GP": _URBAN, "G": _URBAN,
+                                          "Z": _URBAN, "L": _LOCAL, "D": [1.0] * 24, "I": [1.0] * 24}
+
+
+class TravelTimeProfiles:
+    """φ per wiersz: wiersze 0..len(KLASY)-1 = klasy dróg, dalsze = krawędzie z własnym profilem."""
+
+    __slots__ = ("n", "step", "factors", "slot_row", "min_factor")
+
+    def __init__(self, factors: array, n: int, slot_row: Optional[array] = None):
+        self.n = n                      # punktów na dobę
+        self.step = DAY_S / n           # [s] między punktami
+        self.factors = factors          # 'd' wiersz r: factors[r * n : (r + 1) * n]
+        self.slot_row = slot_row        # 'H' wiersz per slot; None = wiersz klasy (graph.klasa)
+        self.min_factor = min(factors) if len(factors) else 1.0
+
+    def factor(self, row: int, t: float) -> float:
+        x = (t % DAY_S) / self.step
+        i = int(x)
+        j = i + 1 if i + 1 < self.n else 0
+        a = self.factors[row * self.n + i]
+        return a + (self.factors[row * self.n + j] - a) * (x - i)
+
+
+def _factors(ratios: Sequence[float], n: int, name: str) -> List[float]:
+    if len(ratios) != n:
+        raise ValueError(f"Profil godzinowy {name}: {len(ratios)} punktów zamiast {n}")
+    if min(ratios) <= 0:
+        raise ValueError(f"Profil godzinowy {name}: udział prędkości musi być dodatni")
+    return [1.0 / float(r) for r in ratios]
+
+
+def compile_profiles(graph: CSRGraph, hourly: Dict[str, Sequence[float]] = DEFAULT_HOURLY,
+                     edge_hourly: Optional[Dict[int, Sequence[float]]] = None,
+                     speed_kph: Dict[str, float] = SPEED_KPH) -> TravelTimeProfiles:
+    """
+    `hourly` - klasa -> udziały prędkości w punktach doby (brakujące klasy jak "G", bez "G" - 1.0);
+    `edge_hourly` - edge_id -> własne udziały. FIFO sprawdzane dla najdłuższej krawędzi wiersza.
+    """
+    n = len(next(iter(hourly.values()))) if hourly else 24
+    default = hourly.get("G", [1.0] * n)
+    factors = array("d")
+    for k in KLASY:
+        factors.extend(_factors(hourly.get(k, default), n, k))
+    slot_row = None
+    if edge_hourly:
+        slot_row = array("H", graph.klasa)
+        for i, (eid, ratios) in enumerate(sorted(edge_hourly.items())):
+            s = graph.slot_of(int(eid)) if 0 < int(eid) < len(graph.edge_slot) else -1
+            if s < 0:
+                raise ValueError(f"Brak krawędzi {eid} dla profilu godzinowego")
+            factors.extend(_factors(ratios, n, f"krawędź {eid}"))
+            slot_row[s] = len(KLASY) + i
+    prof = TravelTimeProfiles(factors, n, slot_row)
+
+    # FIFO: base * (φ[j] - φ[i]) / step >= -1 dla najdłuższego czasu swobodnego w wierszu
+    base = np.frombuffer(metric_weights(graph, "time", speed_kph), np.float64)
+    rows = np.frombuffer(slot_row if slot_row is not None else graph.klasa,
+                         np.uint16 if slot_row is not None else np.uint8)
+    finite = np.isfinite(base)
+    max_base = np.zeros(len(factors) // n)
+    np.maximum.at(max_base, rows[finite], base[finite])
+    phi = np.frombuffer(factors, np.float64).reshape(-1, n)
+    drop = ((phi - np.roll(phi, -1, axis=1)) / prof.step).max(axis=1)      # najszybszy spadek φ
+    bad = np.flatnonzero(max_base * drop > 1.0)
+    if len(bad):
+        r = int(bad[0])
+        name = KLASY[r] if r < len(KLASY) else f"krawędź {sorted(edge_hourly)[r - len(KLASY)]}"
+        raise ValueError(f"Profil godzinowy {name} łamie FIFO (spadek czasu przejazdu szybszy niż upływ czasu)")
+    return prof
+
+
+def td_a_star(graph: CSRGraph, start_vertex_id: int, end_vertex_id: int, departure_s: float,
+              profiles: TravelTimeProfiles, speed_kph: Dict[str, float] = SPEED_KPH) -> SearchResult:
+    """
+    Najwcześniejszy przyjazd przy wyjeździe o `departure_s` [s od północy]; cost = czas przejazdu [s].
+    Jak a_star_speed, ale waga krawędzi zależy od chwili wjazdu na nią.
+    """
+    if not maybe_reachable(graph, start_vertex_id, end_vertex_id):
+        return SearchResult([], [], INF, 0, 0)
+    offsets, targets, edge_ids, xs, ys = graph.offsets, graph.targets, graph.edge_ids, graph.xs, graph.ys
+    base = metric_weights(graph, "time", speed_kph)
+    rows = profiles.slot_row if profiles.slot_row is not None else graph.klasa
+    F, n, step = profiles.factors, profiles.n, profiles.step
+    tx, ty = xs[end_vertex_id], ys[end_vertex_id]
+    hypot, inf = math.hypot, INF
+    scale = time_scale(speed_kph) * profiles.min_factor
+    ws = workspace_for(graph)
+    side = ws.fwd
+    arrival, pred, pred_edge, stamp = side.dist, side.pred, side.pred_edge, side.stamp
+    label = ws.begin(); done = label + 1
+    settled = neighbors_checked = 0
+
+    arrival[start_vertex_id] = departure_s; stamp[start_vertex_id] = label
+    pq: List[Tuple[float, int]] = [(departure_s + hypot(xs[start_vertex_id] - tx, ys[start_vertex_id] - ty) * scale,
+                                    start_vertex_id)]
+    while pq:
+        _, u = heappop(pq)
+        if stamp[u] == done:
+            continue
+        stamp[u] = done; settled += 1
+        if u == end_vertex_id:
+            break
+        tu = arrival[u]
+        x = (tu % DAY_S) / step
+        i = int(x); f = x - i
+        j = i + 1 if i + 1 < n else 0
+        for s in range(offsets[u], offsets[u + 1]):
+            neighbors_checked += 1
+            w = base[s]
+            if w == inf:
+                continue
+            v = targets[s]
+            sv = stamp[v]
+            if sv == done:
+                continue
+            r = rows[s] * n
+            a = F[r + i]
+            ta = tu + w * (a + (F[r + j] - a) * f)
+            if sv < label or ta < arrival[v]:
+                arrival[v] = ta; pred[v] = u; pred_edge[v] = edge_ids[s]; stamp[v] = label
+                heappush(pq, (ta + hypot(xs[v] - tx, ys[v] - ty) * scale, v))
+
+    if stamp[end_vertex_id] < label:
+        return SearchResult([], [], INF, settled, neighbors_checked)
+    nodes, eids = workspace_path(side, label, start_vertex_id, end_vertex_id)
+    return SearchResult(nodes, eids, arrival[end_vertex_id] - departure_s, settled, neighbors_checked)
+
+
+def route_travel_time(graph: CSRGraph, edges: Sequence[int], departure_s: float,
+                      profiles: TravelTimeProfiles, speed_kph: Dict[str, float] = SPEED_KPH) -> float:
+    """Czas przejazdu gotowej trasy (edge_id) przy wyjeździe o `departure_s`."""
+    base = metric_weights(graph, "time", speed_kph)
+    rows = profiles.slot_row if profiles.slot_row is not None else graph.klasa
+    t = departure_s
+    for eid in edges:
+        s = graph.slot_of(eid)
+        t += base[s] * profiles.factor(rows[s], t)
+    return t - departure_s
+
+
+def td_search(departure_s: float, speed_kph: Dict[str, float] = SPEED_KPH,
+              hourly: Dict[str, Sequence[float]] = DEFAULT_HOURLY):
+    """search(graph, start, end) dla wyjazdu o `departure_s` - profile kompilowane raz na graf (batch_routing)."""
+    compiled: Dict[int, Tuple[CSRGraph, TravelTimeProfiles]] = {}
+
+    def search(graph: CSRGraph, start_vertex_id: int, end_vertex_id: int) -> SearchResult:
+        entry = compiled.get(id(graph))
+        if entry is None or entry[0] is not graph:
+            entry = compiled[id(graph)] = (graph, compile_profiles(graph, hourly, speed_kph=speed_kph))
+        return td_a_star(graph, start_vertex_id, end_vertex_id, departure_s, entry[1], speed_kph)
+    return search
+
+
+class DayProfile(NamedTuple):
+    departures: List[float]          # [s od północy]
+    travel_s: List[float]            # czas przejazdu per wyjazd (INF = brak ścieżki)
+    routes: List[List[int]]          # edge_id trasy per wyjazd (ta sama lista dla tej samej trasy)
+    settled: int                     # rozwinięcia wierzchołków (z powrotami do kolejki)
+    neighbors_checked: int
+
+
+def day_profile(graph: CSRGraph, start_vertex_id: int, end_vertex_id: int, profiles: TravelTimeProfiles,
+                step_s: float = 900.0, speed_kph: Dict[str, float] = SPEED_KPH,
+                departures: Optional[Sequence[float]] = None) -> DayProfile:
+    """
+    Najwcześniejsze przyjazdy dla wszystkich `departures` (domyślnie co `step_s` przez dobę) jednym
+    przeszukiwaniem z etykietami-wektorami. Klucz kolejki = najmniejszy czas przejazdu wśród
+    poprawionych składowych + heurystyka; koniec, gdy klucz >= najdłuższego czasu do celu.
+    """
+    dep = np.asarray(departures if departures is not None else np.arange(0.0, DAY_S, step_s), np.float64)
+    k = len(dep)
+    if start_vertex_id == end_vertex_id:
+        return DayProfile(dep.tolist(), [0.0] * k, [[]] * k, 0, 0)
+    if not maybe_reachable(graph, start_vertex_id, end_vertex_id):
+        return DayProfile(dep.tolist(), [INF] * k, [[] for _ in range(k)], 0, 0)
+    offsets, targets, sources, xs, ys = graph.offsets, graph.targets, graph.sources, graph.xs, graph.ys
+    base = metric_weights(graph, "time", speed_kph)
+    rows = profiles.slot_row if profiles.slot_row is not None else graph.klasa
+    phi = np.frombuffer(profiles.factors, np.float64).reshape(-1, profiles.n)
+    n, step = profiles.n, profiles.step
+    tx, ty = xs[end_vertex_id], ys[end_vertex_id]
+    hypot, inf = math.hypot, INF
+    scale = time_scale(speed_kph) * profiles.min_factor
+
+    arrival: Dict[int, np.ndarray] = {start_vertex_id: dep.copy()}
+    pred: Dict[int, np.ndarray] = {start_vertex_id: np.full(k, -1, np.int64)}   # slot krawędzi per wyjazd
+    dirty: Set[int] = {start_vertex_id}
+    pq: List[Tuple[float, int]] = [(hypot(xs[start_vertex_id] - tx, ys[start_vertex_id] - ty) * scale,
+                                    start_vertex_id)]
+    worst = INF                                      # najdłuższy czas przejazdu do celu (po wyjazdach)
+    settled = neighbors_checked = 0
+    while pq:
+        key, u = heappop(pq)
+        if key >= worst:
+            break
+        if u not in dirty:
+            continue
+        dirty.discard(u)
+        settled += 1
+        tu = arrival[u]
+        x = (tu % DAY_S) / step
+        i = x.astype(np.int64)
+        f = x - i
+        j = np.where(i + 1 < n, i + 1, 0)
+        for s in range(offsets[u], offsets[u + 1]):
+            neighbors_checked += 1
+            w = base[s]
+            if w == inf:
+                continue
+            v = targets[s]
+            row = phi[rows[s]]
+            a = row[i]
+            ta = tu + w * (a + (row[j] - a) * f)
+            cur = arrival.get(v)
+            if cur is None:
+                arrival[v] = ta
+                pred[v] = np.full(k, s, np.int64)
+                better_key = float((ta - dep).min())
+            else:
+                better = ta < cur
+                if not better.any():
+                    continue
+                cur[better] = ta[better]
+                pred[v][better] = s
+                better_key = float((ta - dep)[better].min())
+            if v == end_vertex_id:
+                worst = float((arrival[v] - dep).max())
+                continue
+            dirty.add(v)
+            heappush(pq, (better_key + hypot(xs[v] - tx, ys[v] - ty) * scale, v))
+
+    if end_vertex_id not in arrival:
+        return DayProfile(dep.tolist(), [INF] * k, [[] for _ in range(k)], settled, neighbors_checked)
+    edge_ids = graph.edge_ids
+    routes, seen = [], {}
+    for c in range(k):
+        eids, v = [], end_vertex_id
+        while v != start_vertex_id:
+            s = int(pred[v][c])
+            eids.append(edge_ids[s]); v = sources[s]
+        eids.reverse()
+        routes.append(seen.setdefault(tuple(eids), eids))
+    return DayProfile(dep.tolist(), (arrival[end_vertex_id] - dep).tolist(), routes, settled, neighbors_checked)
+
+
+def load_hourly(path: str) -> Tuple[Dict[str, List[float]], Dict[int, List[float]]]:
+    """Plik JSON {"hourly": {klasa: [...]}, "edges": {edge_id: [...]}} albo sam słownik klas."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    hourly = data.get("hourly", data) if isinstance(data, dict) else None
+    if not isinstance(hourly, dict):
+        raise ValueError(f"Plik {path}: oczekiwano słownika klas z listami udziałów prędkości")
+    hourly = {str(k): [float(x) for x in v] for k, v in hourly.items() if k != "edges"}
+    lengths = {len(v) for v in hourly.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"Plik {path}: różna liczba punktów doby między klasami")
+    edges = {int(e): [float(x) for x in v] for e, v in data.get("edges", {}).items()}
+    return hourly, edges
+
+
+def parse_clock(text: str) -> float:
+    """'07:30' albo '7.5' -> sekundy od północy."""
+    if ":" in text:
+        h, m = text.split(":", 1)
+        return (int(h) * 60 + float(m)) * 60.0
+    return float(text) * 3600.0
+
+
+def _clock(t: float) -> str:
+    t = int(round(t)) % int(DAY_S)
+    return f"{t // 3600:02d}:{t % 3600 // 60:02d}"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    from graph_snapshot import open_snapshot
+    ap = argparse.ArgumentParser(description="Trasy zależne od godziny wyjazdu")
+    ap.add_argument("snapshot", help="plik .pag2graph")
+    ap.add_argument("start", type=int)
+    ap.add_argument("end", type=int)
+    ap.add_argument("--departure", default="08:00", help="godzina wyjazdu HH:MM")
+    ap.add_argument("--day", action="store_true", help="czasy przejazdu dla wyjazdów przez całą dobę")
+    ap.add_argument("--step", type=float, default=15.0, help="krok wyjazdów dla --day [min]")
+    ap.add_argument("--hourly", help="plik JSON z udziałami prędkości (domyślnie wbudowane szczyty)")
+    ap.add_argument("--profile", default="car", help="profil prędkości: car, truck albo plik JSON")
+    args = ap.parse_args(argv)
+
+    graph = open_snapshot(args.snapshot)
+    if graph is None:
+        ap.error(f"Nie można wczytać snapshotu: {args.snapshot}")
+    speed_kph = load_profile(args.profile)
+    hourly, edges = load_hourly(args.hourly) if args.hourly else (DEFAULT_HOURLY, {})
+    profiles = compile_profiles(graph, hourly, edges, speed_kph)
+    t0 = time.perf_counter()
+    if not args.day:
+        res = td_a_star(graph, args.start, args.end, parse_clock(args.departure), profiles, speed_kph)
+        print(f"[Trasa] wyjazd {args.departure} || czas {res.cost / 60.0:.1f} min || krawędzi {len(res.edges)} || "
+              f"|S| {res.settled} || {(time.perf_counter() - t0) * 1000:.1f} ms")
+        return
+    prof = day_profile(graph, args.start, args.end, profiles, args.step * 60.0, speed_kph)
+    dt = time.perf_counter() - t0
+    ids = {}
+    for d, tt, r in zip(prof.departures, prof.travel_s, prof.routes):
+        print(f"{_clock(d)}  {tt / 60.0:7.1f} min  trasa {ids.setdefault(id(r), len(ids) + 1)}")
+    print(f"[Doba] {len(prof.departures)} wyjazdów || tras: {len(ids)} || rozwinięć {prof.settled} || "
+          f"{dt * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
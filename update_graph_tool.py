@@ -0,0 +1,35 @@
+import arcpy
+import time
+from typing import List
+
+import graph as graph_build
+
+
+def _oids(text: str) -> List[int]:
+    return [int(t) for t in text.replace(",", ";").replace(" ", ";").split(";") if t.strip()]
+
+
+#Po edycji kilku odcinków jezdni: klasy nodes / edges z graph.py i snapshot obok geobazy
+#aktualizowane przyrostowo (graph.update_graph_from_fc); odcinki z listy OBJECTID albo zaznaczenia
+def main() -> None:
+    roads     = arcpy.GetParameterAsText(0)
+    nodes_fc  = arcpy.GetParameterAsText(1)
+    edges_fc  = arcpy.GetParameterAsText(2)
+    changed   = _oids(arcpy.GetParameterAsText(3))     # np. "12;15;230" (wstawione albo zmienione)
+    deleted   = _oids(arcpy.GetParameterAsText(4))
+    if not changed and not deleted:
+        fids = getattr(arcpy.Describe(roads), "FIDSet", "")
+        changed = _oids(fids)
+        if changed:
+            arcpy.AddMessage(f"[UPDATE] Zaznaczonych odcinków: {len(changed)}")
+    if not changed and not deleted:
+        arcpy.AddError("Podaj zmienione / usunięte OBJECTID albo zaznacz odcinki na warstwie jezdni")
+        return
+
+    t0 = time.perf_counter()
+    graph_build.update_graph_from_fc(roads, nodes_fc, edges_fc, changed, deleted)
+    arcpy.AddMessage(f"[UPDATE] Klasy i snapshot zaktualizowane w {time.perf_counter() - t0:.2f} s")
+
+
+if __name__ == "__main__":
+    main()